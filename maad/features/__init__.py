@@ -30,6 +30,7 @@ Alpha acoustic indices
     temporal_activity
     temporal_events
     acoustic_complexity_index
+    StreamingACI
     frequency_entropy
     number_of_peaks
     spectral_entropy
@@ -43,6 +44,8 @@ Alpha acoustic indices
     roughness
     temporal_leq
     spectral_leq
+    StreamingTemporalLeq
+    StreamingSpectralLeq
     surface_roughness
     tfsd
     more_entropy
@@ -52,6 +55,13 @@ Alpha acoustic indices
     all_temporal_alpha_indices
     all_spectral_alpha_indices
 
+Batch processing
+----------------
+.. autosummary::
+    :toctree: generated/
+    
+    batch_alpha_indices
+
 Temporal features
 -----------------
 .. autosummary::
@@ -92,6 +102,7 @@ from .alpha_indices import (temporal_median,
                             temporal_activity,
                             temporal_events,
                             acoustic_complexity_index,
+                            StreamingACI,
                             frequency_entropy,
                             number_of_peaks,
                             spectral_entropy,
@@ -105,6 +116,8 @@ from .alpha_indices import (temporal_median,
                             roughness,
                             temporal_leq,
                             spectral_leq,
+                            StreamingTemporalLeq,
+                            StreamingSpectralLeq,
                             surface_roughness,
                             tfsd,
                             more_entropy,
@@ -114,6 +127,8 @@ from .alpha_indices import (temporal_median,
                             all_temporal_alpha_indices,
                             all_spectral_alpha_indices)
 
+from .batch import batch_alpha_indices
+
 __all__ = [
            # shape
            'filter_multires', 
@@ -138,6 +153,7 @@ __all__ = [
            "temporal_activity",
            "temporal_events",
            "acoustic_complexity_index",
+           'StreamingACI',
            "frequency_entropy",
            "number_of_peaks",
            "spectral_entropy",
@@ -152,6 +168,8 @@ __all__ = [
            "roughness",
            'temporal_leq',
            'spectral_leq',
+           'StreamingTemporalLeq',
+           'StreamingSpectralLeq',
            "surface_roughness",
            "tfsd",
            "more_entropy",
@@ -159,4 +177,6 @@ __all__ = [
            "frequency_raoq",
            "region_of_interest_index",
            'all_temporal_alpha_indices',
-           'all_spectral_alpha_indices']
\ No newline at end of file
+           'all_spectral_alpha_indices',
+           # batch
+           'batch_alpha_indices']
\ No newline at end of file
@@ -19,7 +19,6 @@ import numbers
 import numpy as np 
 from numpy import sum, log, min, max, abs, mean, median, sqrt, diff, var
 from skimage.morphology import opening
-from scipy.ndimage.morphology import binary_erosion, binary_dilation
 from scipy.stats import rankdata
 from scipy.signal import find_peaks
 import matplotlib.pyplot as plt
@@ -32,6 +31,7 @@ _MIN_ = sys.float_info.min
 from maad.util import (rle, index_bw, amplitude2dB, power2dB, dB2power, mean_dB,
                        skewness, kurtosis, format_features, into_bins, entropy, 
                        linear_scale, plot1d, plot2d, overlay_rois)
+from maad.util.miscellaneous import _min_value
 from maad.spl import wav2leq, psd2leq, power2dBSPL
 from maad.features import (centroid_features, zero_crossing_rate, temporal_moments, 
                            spectral_moments)
@@ -44,6 +44,44 @@ from maad.rois import select_rois, create_mask
 # =============================================================================
 # Private functions
 # =============================================================================
+# Indices computed by all_temporal_alpha_indices
+_TEMPORAL_INDICES = ['ZCR', 'MEANt', 'VARt', 'SKEWt', 'KURTt', 'LEQt', 'BGNt', 
+                     'SNRt', 'MED', 'Ht', 'ACTtFraction', 'ACTtCount', 'ACTtMean',
+                     'EVNtFraction', 'EVNtMean', 'EVNtCount']
+
+# Indices computed by all_spectral_alpha_indices, grouped by the function that
+# computes them : group => (indices, per bin indices)
+_SPECTRAL_GROUPS = {
+    'LTS' : ([], ['LTS']),
+    'MOMENTSf' : (['MEANf', 'VARf', 'SKEWf', 'KURTf'], []),
+    'MOMENTSt_per_bin' : ([], ['MEANt_per_bin', 'VARt_per_bin', 'SKEWt_per_bin', 
+                               'KURTt_per_bin']),
+    'NBPEAKS' : (['NBPEAKS'], []),
+    'LEQf' : (['LEQf'], ['LEQf_per_bin']),
+    'SNRf' : (['ENRf', 'BGNf', 'SNRf'], ['ENRf_per_bin', 'BGNf_per_bin', 
+                                         'SNRf_per_bin']),
+    'Hf' : (['Hf'], ['Ht_per_bin']),
+    'EPS' : (['EAS', 'ECU', 'ECV', 'EPS', 'EPS_KURT', 'EPS_SKEW'], []),
+    'ACI' : (['ACI'], ['ACI_per_bin']),
+    'NDSI' : (['NDSI', 'rBA', 'AnthroEnergy', 'BioEnergy'], []),
+    'BI' : (['BI'], []),
+    'ROU' : (['ROU'], ['ROU_per_bin']),
+    'ADI' : (['ADI'], []),
+    'AEI' : (['AEI'], []),
+    'COVER' : (['LFC', 'MFC', 'HFC'], []),
+    'ACTsp' : (['ACTspFract', 'ACTspCount', 'ACTspMean'], 
+               ['ACTspFract_per_bin', 'ACTspCount_per_bin']),
+    'EVNsp' : (['EVNspFract', 'EVNspMean', 'EVNspCount'], 
+               ['EVNspFract_per_bin', 'EVNspMean_per_bin', 'EVNspCount_per_bin']),
+    'TFSD' : (['TFSD'], []),
+    'H_more' : (['H_Havrda', 'H_Renyi', 'H_pairedShannon', 'H_gamma', 
+                 'H_GiniSimpson'], []),
+    'RAOQ' : (['RAOQ'], []),
+    'AGI' : (['AGI'], ['AGI_per_bin']),
+    'ROI' : (['ROItotal', 'ROIcover'], []),
+    }
+
+#%%
 def _acoustic_activity (xdB, dB_threshold, axis=1):
     """
     Acoustic Activity [1]_ [2]_:
@@ -92,6 +130,39 @@ def _acoustic_activity (xdB, dB_threshold, axis=1):
     ACTmean = mean_dB(xdB[xdB>dB_threshold])
     return ACTfract, ACTcount, ACTmean 
 
+#%%
+def _event_runs(EVN):
+    """
+    Run-length encoding of the events (runs of non zero values) of each row
+    of a binary matrix, for all the rows at once (see `util.rle` for a 
+    vector).
+
+    Parameters
+    ----------
+    EVN : 2d ndarray
+        binary matrix
+
+    Returns
+    -------
+    rows : 1d ndarray of ints
+        row of each event
+    starts : 1d ndarray of ints
+        index of the first value of each event in its row
+    lengths : 1d ndarray of ints
+        length of each event
+    """
+    n_rows, n = EVN.shape
+    # pad each row with 0 on both sides to detect the edges of the events
+    b = np.zeros((n_rows, n+2), dtype=bool)
+    b[:, 1:-1] = EVN
+    # the edges of the events (start, stop) alternate in each row as the rows
+    # begin and end with 0
+    edges = np.flatnonzero(b[:, 1:] != b[:, :-1])
+    starts, stops = edges[0::2], edges[1::2]
+    lengths = stops - starts
+    rows, starts = np.divmod(starts, n+1)
+    return rows, starts, lengths
+
 #%%    
 def _acoustic_events(xdB, dt, dB_threshold=6, rejectDuration=None):
     """
@@ -140,51 +211,53 @@ def _acoustic_events(xdB, dt, dB_threshold=6, rejectDuration=None):
     if xdB.ndim ==2 : duration = (xdB.shape[1]-1) * dt
     
     xdB = np.asarray(xdB)
+    if xdB.ndim not in (1, 2) : 
+        raise ValueError ('xdB must be a vector (1d) or a matrix (2d)')
     # thresholding => binary
-    EVN = (xdB>=dB_threshold)*1  
+    binary = np.atleast_2d(xdB>=dB_threshold)
+    EVN = binary*1 if rejectDuration is None else None
+    
+    # Find the events (runs of 1) of all the rows at once
+    rows, starts, lengths = _event_runs(binary)
+    n_rows = binary.shape[0]
+    
     # Remove events shorter than 'rejectLength' 
-    # (done by erosion+dilation = opening)
+    # (same result as an opening, i.e. erosion+dilation, by a line of 
+    # rejectLength+1 points)
     if rejectDuration is not None:
         rejectLength = int(round(rejectDuration / dt))
-        # tricks. Depending on the dimension of bin_x 
-        # if bin_x is a vector
-        if EVN.ndim == 1 : kernel = np.ones(rejectLength+1)
-        # if bin_x is a matrix
-        elif EVN.ndim == 2 : kernel = [list(np.ones(rejectLength+1))]  
-        else: print("xdB must be a vector or a matrix")
-        # Morphological tool : Opening
-        EVN = binary_erosion(EVN, structure=kernel)
-        EVN = binary_dilation(EVN, structure=kernel) 
+        keep = lengths >= rejectLength+1
+        # set the values of the events that are removed to 0
+        width = binary.shape[1]+1
+        first = rows[~keep]*width + starts[~keep]
+        marks = np.zeros(n_rows*width, dtype=np.int8)
+        marks[first] = 1
+        marks[first + lengths[~keep]] = -1
+        marks = np.cumsum(marks.reshape(n_rows, width), axis=1, dtype=np.int8)
+        EVN = binary & (marks[:, :-1] == 0)
+        rows, lengths = rows[keep], lengths[keep]
+    EVN = EVN.reshape(xdB.shape)
     
     # Extract the characteristics of each event : 
     # duration (mean and sum in s) and count
+    count = np.bincount(rows, minlength=n_rows)
+    total = np.bincount(rows, weights=lengths, minlength=n_rows)
+    # total events duration in s 
+    EVNsum = total * dt
+    # mean events duration in s
+    with np.errstate(invalid='ignore', divide='ignore'):
+        EVNmean = total / count * dt
+    # number of events per s
+    EVNcount = count / duration
+    
     if EVN.ndim == 2 :
-        EVNsum = []
-        EVNmean = []
-        EVNcount = []
-        for i, b in enumerate(EVN) :
-            l, v = rle(b)  
-            if sum(l[v==1])!=0 :
-                # mean events duration in s
-                EVNmean.append(mean(l[v==1]) * dt)
-            else:
-                EVNmean.append(0)    
-            # total events duration in s 
-            EVNsum.append(sum(l[v==1]) * dt)
-            # number of events
-            EVNcount.append(sum(v)/ duration)
-    elif EVN.ndim == 1 :
-        l, v = rle(EVN) 
-        if sum(l[v==1]) !=0 :
-            # mean events duration in s
-            EVNmean = mean(l[v==1]) * dt
-        else:
-            EVNmean = 0
-        # total events duration in s 
-        EVNsum = sum(l[v==1]) * dt
-        # number of events per s
-        EVNcount = sum(v) / duration
-    else: print("xdB must be a vector or a matrix")
+        EVNsum = list(EVNsum)
+        EVNmean = [m if c > 0 else 0 for m, c in zip(EVNmean, count)]
+        EVNcount = list(EVNcount)
+    else :
+        EVNsum = EVNsum[0]
+        EVNmean = EVNmean[0] if count[0] > 0 else 0
+        EVNcount = EVNcount[0]
     
     return EVNsum, EVNmean, EVNcount, EVN
 
@@ -279,9 +352,11 @@ def _gini(x, corr=False):
     return G
 
 #%%
-def _raoQ (p, bins):
+def _raoQ_pairwise (p, bins):
     """
-    Compute Rao's Quadratic entropy in 1d [1]_
+    Compute Rao's Quadratic entropy in 1d [1]_ with the pairwise distances 
+    between all the bins (O(n²) memory and time). Reference implementation
+    of `_raoQ`.
     
     Parameters
     ---------
@@ -324,6 +399,58 @@ def _raoQ (p, bins):
     
     return Q
 
+#%%
+def _raoQ (p, bins):
+    """
+    Compute Rao's Quadratic entropy in 1d [1]_
+    
+    The bins being 1d, the sum of pi*pj*|bi-bj| over all the pairs is 
+    computed with the cumulative sums of p and p*bins over the sorted bins, 
+    in O(n log n) time and O(n) memory. The value is the same as 
+    `_raoQ_pairwise` up to the floating point rounding.
+    
+    Parameters
+    ---------
+    p : ndarray of floats (1d)
+        a vector containing the probality of each bin
+    bins : ndarray of floats (1d)
+        a vector containing the value of each bin
+        
+    Return
+    ------
+    Q : scalar
+        Rao's Quadratic entropy value
+    
+    Reference:
+    ---------
+    .. [1] Botta-Dukát, Zoltán, Rao’s quadratic entropy as a measure of functional diversity based on multiple traits, Journal of Vegetation Science, 2005. `DOI: 10.1111/j.1654-1103.2005.tb02393.x <https://doi.org/10.1111/j.1654-1103.2005.tb02393.x>`_ 
+    
+    """
+    
+    # be sure they are ndarray
+    p = np.asarray(p)
+    bins = np.asarray(bins)
+    
+    # Normalize p by the sum in order to get the sum of p = 1
+    p = p/np.sum(p)
+    
+    # Bins is normalized by the bins range
+    bins = bins/(bins.max() - bins.min())
+    
+    # sort the bins in increasing order
+    order = np.argsort(bins, kind='stable')
+    bins = bins[order]
+    p = p[order]
+    
+    # for each bin j, sum of pi*(bj-bi) over the bins i before j
+    P = np.concatenate(([0], np.cumsum(p)[:-1]))
+    PB = np.concatenate(([0], np.cumsum(p*bins)[:-1]))
+    
+    # each pair (i,j) is counted twice in the pairwise sum
+    Q = 2*np.sum(p*(bins*P - PB))*2*sqrt(2)
+    
+    return Q
+
 #%%
 # =============================================================================
 # Public functions
@@ -450,7 +577,7 @@ def roughness (x, norm=None, axis=0) :
 #               TEMPORAL ECOACOUSTICS INDICES
 #******************************************************************************
 #=============================================================================
-def temporal_median (s, mode ='fast', Nt=512) :
+def temporal_median (s, mode ='fast', Nt=512, env=None) :
     """
     Computes the median of the envelope of an audio signal.
 
@@ -465,6 +592,9 @@ def temporal_median (s, mode ='fast', Nt=512) :
         - "Hilbert" : estimation of the envelope from the Hilbert transform. The method is slow
     Nt : integer, optional, default is 512
         Size of each frame. The largest, the highest is the approximation.
+    env : 1D array, optional, default is None
+        Precomputed envelope of s (see `sound.envelope`). If given, mode and 
+        Nt are ignored and the envelope is not computed again.
     
     Returns
     -------
@@ -480,14 +610,15 @@ def temporal_median (s, mode ='fast', Nt=512) :
     
     """
     # Envelope
-    env = envelope(s, mode=mode, Nt=Nt)
+    if env is None :
+        env = envelope(s, mode=mode, Nt=Nt)
     # median
     MED = np.median(env)
 
     return MED
 
 #=============================================================================
-def temporal_entropy (s, compatibility="QUT", mode ='fast', Nt=512) :
+def temporal_entropy (s, compatibility="QUT", mode ='fast', Nt=512, env=None) :
     """
     Computes the entropy of the envelope of an audio signal.
 
@@ -507,6 +638,9 @@ def temporal_entropy (s, compatibility="QUT", mode ='fast', Nt=512) :
         - "Hilbert" : estimation of the envelope from the Hilbert transform. The method is slow.
     Nt : integer, optional, default is 512
         Size of each frame. The largest, the highest is the approximation.
+    env : 1D array, optional, default is None
+        Precomputed envelope of s (see `sound.envelope`). If given, mode and 
+        Nt are ignored and the envelope is not computed again.
    
     Returns
     -------
@@ -534,7 +668,8 @@ def temporal_entropy (s, compatibility="QUT", mode ='fast', Nt=512) :
 
     """
     # Envelope
-    env = envelope(s, mode=mode, Nt=Nt)
+    if env is None :
+        env = envelope(s, mode=mode, Nt=Nt)
     # Entropy
     if compatibility == 'QUT':
         Ht = entropy(env**2)
@@ -598,7 +733,7 @@ def acoustic_richness_index (Ht_array, M_array):
 
 #=============================================================================
 
-def temporal_activity (s, dB_threshold=3, mode='fast', Nt=512):
+def temporal_activity (s, dB_threshold=3, mode='fast', Nt=512, env=None):
     """
     Compute the acoustic activity index in temporal domain.
     
@@ -627,6 +762,9 @@ def temporal_activity (s, dB_threshold=3, mode='fast', Nt=512):
             The method is slow
     Nt : integer, optional, default is 512
         Size of each frame. The largest, the highest is the approximation.    
+    env : 1D array, optional, default is None
+        Precomputed envelope of s (see `sound.envelope`). If given, mode and 
+        Nt are ignored and the envelope is not computed again.
     
     Returns
     -------    
@@ -655,13 +793,14 @@ def temporal_activity (s, dB_threshold=3, mode='fast', Nt=512):
     s = np.asarray(s) 
     
     ### envelope
-    if mode == 'fast' :
-        env = envelope(s, mode='fast', Nt=Nt)
-    elif mode == 'hilbert' :
-        env = envelope(s, mode='hilbert')
+    if env is None :
+        if mode == 'fast' :
+            env = envelope(s, mode='fast', Nt=Nt)
+        elif mode == 'hilbert' :
+            env = envelope(s, mode='hilbert')
 
     ### get background value
-    _,BGNt,_ = temporal_snr(s, mode, Nt)
+    _,BGNt,_ = temporal_snr(s, mode, Nt, env=env)
     
     # linear to power dB
     envdB = amplitude2dB(env)
@@ -675,7 +814,7 @@ def temporal_activity (s, dB_threshold=3, mode='fast', Nt=512):
 
 #=============================================================================
 def temporal_events (s, fs, dB_threshold=3, rejectDuration=None, 
-                  mode='fast', Nt=512, display=False, **kwargs):
+                  mode='fast', Nt=512, display=False, env=None, **kwargs):
     """
     Compute the acoustic event index from an audio signal [1]_ [2]_.
     
@@ -718,6 +857,9 @@ def temporal_events (s, fs, dB_threshold=3, rejectDuration=None,
         Size of each frame. The largest, the highest is the approximation.
     display : boolean, optional, default is False
         Display the selected events on the audio waveform
+    env : 1D array, optional, default is None
+        Precomputed envelope of s (see `sound.envelope`) obtained with the 
+        same mode and Nt. If given, the envelope is not computed again.
     \*\*kwargs, optional. 
         This parameter is used by plt.plot
 
@@ -752,17 +894,19 @@ def temporal_events (s, fs, dB_threshold=3, rejectDuration=None,
     
     ### envelope
     if mode == 'fast' :
-        env = envelope(s, mode, Nt)
+        if env is None :
+            env = envelope(s, mode, Nt)
         dt =1/fs*Nt
     elif mode == 'hilbert' :
-        env = envelope(s, mode)
+        if env is None :
+            env = envelope(s, mode)
         dt = 1/fs
     
     # Time vector
     tn = np.arange(0,len(env),1)*len(s)/fs/len(env)
     
     ### get background value
-    _,BGNt,_ = temporal_snr(s, mode, Nt)
+    _,BGNt,_ = temporal_snr(s, mode, Nt, env=env)
     
     # linear to power dB
     envdB = 10*np.log10(env**2)
@@ -1411,6 +1555,93 @@ def acoustic_complexity_index(Sxx):
     
     return ACI_xx, ACI_per_bin, ACI_sum 
 
+#=============================================================================
+class StreamingACI(object):
+    """
+    Compute the Acoustic Complexity Index (ACI) from a spectrogram received 
+    block by block (e.g. from `sound.StreamingSpectrogram`).
+
+    Consecutive blocks of columns of the spectrogram are pushed with 
+    `update`. Only the sums per frequency bin of the absolute differences 
+    between consecutive columns and of the spectrogram are kept in memory, 
+    with the last column of the previous block for the difference across 
+    the boundary between blocks. `finalize` returns the same values as 
+    `acoustic_complexity_index` on the whole spectrogram.
+    
+    See Also
+    --------
+    acoustic_complexity_index, sound.StreamingSpectrogram
+
+    Notes
+    -----
+    The ACI per bin is computed as the sum of the differences divided by 
+    the sum of the spectrogram, instead of the sum of the ratios. The values
+    are the same as `acoustic_complexity_index` up to the floating point 
+    rounding.
+
+    Examples
+    --------
+    >>> stream = maad.sound.StreamingSpectrogram(fs=44100, mode='amplitude')
+    >>> aci = maad.features.StreamingACI()
+    >>> for s_block, _ in maad.sound.iter_blocks('../data/cold_forest_daylight.wav', block_duration=5):
+    ...     Sxx_block, _ = stream.update(s_block)
+    ...     aci.update(Sxx_block)
+    >>> Sxx_block, _ = stream.flush()
+    >>> _, ACI = aci.update(Sxx_block).finalize()
+    >>> print('ACI : %2.0f ' %ACI)
+    ACI : 306
+    """
+    
+    def __init__(self):
+        # last column of the previous block
+        self._last = None
+        # sum of the absolute differences per bin
+        self._diff = 0
+        # sum of the spectrogram per bin
+        self._sum = 0
+        
+    def update(self, Sxx):
+        """
+        Push the next columns of the spectrogram.
+
+        Parameters
+        ----------
+        Sxx : 2d ndarray of floats
+            Next columns of the spectrogram. The number of columns may be 0.
+
+        Returns
+        -------
+        self : StreamingACI
+        """
+        Sxx = np.asarray(Sxx)
+        if Sxx.shape[1] == 0 :
+            return self
+        if self._last is not None :
+            X = np.concatenate((self._last, Sxx), axis=1)
+        else :
+            X = Sxx
+        self._diff = self._diff + sum(abs(diff(X,1)), axis=1)
+        self._sum = self._sum + sum(Sxx, axis=1)
+        self._last = Sxx[:, -1:].copy()
+        return self
+    
+    def finalize(self):
+        """
+        Compute the ACI of all the columns pushed.
+
+        Returns
+        -------
+        ACI_per_bin: 1d ndarray of scalars
+            ACI value for each frequency bin
+        ACI_sum: scalar
+            Sum of ACI value per frequency bin (Common definition)
+        """
+        if self._last is None :
+            raise ValueError ('No column of the spectrogram was pushed with update')
+        ACI_per_bin = self._diff / self._sum
+        ACI_sum = sum(ACI_per_bin)
+        return ACI_per_bin, ACI_sum
+
 #=============================================================================
 def acoustic_diversity_index (Sxx, fn, fmin=0, fmax=20000, bin_step=1000, 
                             dB_threshold=-50, index="shannon"):
@@ -1880,6 +2111,194 @@ def spectral_leq (X, gain, Vadc=2, sensitivity=-35, dBref=94, pRef = 20e-6):
     
     return LEQf, LEQf_per_bin
 
+#=============================================================================
+class StreamingTemporalLeq(object):
+    """
+    Computes the Equivalent Continuous Sound level (Leq) of an audio signal 
+    received block by block (e.g. from `sound.iter_blocks`).
+
+    The Leq of each integration step dt is computed as soon as its samples 
+    have been pushed with `update`, the samples of the last incomplete step 
+    being kept for the next block. Only the sum of the energies 
+    (10^(Leq/10)) of the steps and their number are kept, so the memory 
+    does not grow with the duration of the signal. `finalize` returns the 
+    same value as `temporal_leq` on the whole signal, up to the floating 
+    point rounding.
+
+    Parameters
+    ----------
+    fs : Integer
+        sampling frequency in Hz
+    gain : integer
+        Total gain applied to the sound (preamplifer + amplifier)
+    Vadc : scalar, optional, default is 2Vpp (=>+/-1V)
+        Maximal voltage (peak to peak) converted by the analog to digital convertor ADC    
+    sensitivity : float, optional, default is -35 (dB/V)
+        Sensitivity of the microphone
+    dBref : integer, optional, default is 94 (dBSPL)
+        Pressure sound level used for the calibration of the microphone 
+        (usually 94dB, sometimes 114dB)
+    dt : float, optional, default is 1 (second)
+        Integration step to compute the Leq (Equivalent Continuous Sound level)
+
+    See Also
+    --------
+    temporal_leq, StreamingSpectralLeq, sound.iter_blocks
+
+    Examples
+    --------
+    >>> leq = maad.features.StreamingTemporalLeq(fs=44100, gain=42)
+    >>> for s_block, _ in maad.sound.iter_blocks('../data/spinetail.wav', block_duration=5):
+    ...     leq.update(s_block)
+    >>> print('Leq is %2.1fdB SPL' % leq.finalize())
+    Leq is 63.7dB SPL
+    """
+    
+    def __init__(self, fs, gain, Vadc=2, sensitivity=-35, dBref=94, dt=1):
+        self.fs = fs
+        self.gain = gain
+        self.Vadc = Vadc
+        self.sensitivity = sensitivity
+        self.dBref = dBref
+        self.dt = dt
+        # samples of the last incomplete integration step
+        self._tail = None
+        # sum of the energies of the integration steps and number of steps
+        self._energy = 0
+        self._n = 0
+        
+    def update(self, s):
+        """
+        Push the next block of the audio signal.
+
+        Parameters
+        ----------
+        s : 1D array of floats
+            Next block of the audio signal
+
+        Returns
+        -------
+        self : StreamingTemporalLeq
+        """
+        s = np.asarray(s)
+        if self._tail is not None :
+            s = np.concatenate((self._tail, s))
+        # number of samples of the complete integration steps
+        dN = int(np.floor(self.dt*self.fs))
+        N = (len(s)//dN)*dN
+        if N > 0 :
+            leq = wav2leq(s[:N], self.fs, self.gain, self.Vadc, self.dt, 
+                          self.sensitivity, self.dBref)
+            self._energy = self._energy + sum(10**(leq/10))
+            self._n += len(leq)
+        self._tail = s[N:].copy()
+        return self
+    
+    def finalize(self):
+        """
+        Compute the Leq of the signal pushed. As for `temporal_leq`, the 
+        samples of the last incomplete integration step are ignored.
+
+        Returns
+        -------
+        LEQt: float
+            Equivalent Continuous Sound level (Leq) in dB SPL
+        """
+        if self._n == 0 :
+            raise ValueError ('No complete integration step was pushed with update')
+        # same as mean_dB of the Leq of the steps
+        return 10*np.log10(self._energy/self._n)
+
+#=============================================================================
+class StreamingSpectralLeq(object):
+    """
+    Computes the Equivalent Continuous Sound level (Leq) from a power 
+    spectrogram received block by block (e.g. from 
+    `sound.StreamingSpectrogram`).
+
+    Only the sum of the spectrogram per frequency bin and the number of 
+    columns are kept in memory. `finalize` returns the same values as 
+    `spectral_leq` on the whole spectrogram, up to the floating point 
+    rounding of the average along the time axis.
+
+    Parameters
+    ----------
+    gain : integer
+        Total gain applied to the sound (preamplifer + amplifier)
+    Vadc : scalar, optional, default is 2Vpp (=>+/-1V)
+        Maximal voltage (peak to peak) converted by the analog to digital convertor ADC    
+    sensitivity : float, optional, default is -35 (dB/V)
+        Sensitivity of the microphone
+    dBref : integer, optional, default is 94 (dBSPL)
+        Pressure sound level used for the calibration of the microphone 
+        (usually 94dB, sometimes 114dB)
+    pRef : Sound pressure reference in the medium (air : 20e-6, water : 1e-6)
+
+    See Also
+    --------
+    spectral_leq, StreamingTemporalLeq, sound.StreamingSpectrogram
+
+    Examples
+    --------
+    >>> stream = maad.sound.StreamingSpectrogram(fs=44100)
+    >>> leq = maad.features.StreamingSpectralLeq(gain=42)
+    >>> for s_block, _ in maad.sound.iter_blocks('../data/spinetail.wav', block_duration=5):
+    ...     Sxx_block, _ = stream.update(s_block)
+    ...     leq.update(Sxx_block)
+    >>> Sxx_block, _ = stream.flush()
+    >>> Leqf, Leqf_per_bin = leq.update(Sxx_block).finalize()
+    >>> print('Leq (from spectrogram) is %2.1fdB SPL' % Leqf)
+    Leq (from spectrogram) is 63.7dB SPL
+    """
+    
+    def __init__(self, gain, Vadc=2, sensitivity=-35, dBref=94, pRef=20e-6):
+        self.gain = gain
+        self.Vadc = Vadc
+        self.sensitivity = sensitivity
+        self.dBref = dBref
+        self.pRef = pRef
+        self._sum = 0
+        self._n = 0
+        
+    def update(self, Sxx):
+        """
+        Push the next columns of the power spectrogram.
+
+        Parameters
+        ----------
+        Sxx : 2d ndarray of floats
+            Next columns of the power spectrogram
+
+        Returns
+        -------
+        self : StreamingSpectralLeq
+        """
+        Sxx = np.asarray(Sxx)
+        self._sum = self._sum + sum(Sxx, axis=1)
+        self._n += Sxx.shape[1]
+        return self
+    
+    def finalize(self):
+        """
+        Compute the Leq of the columns pushed.
+
+        Returns
+        -------
+        LEQf: float
+            Equivalent Continuous Sound level (Leq) in dB SPL
+        LEQf_per_bin: 1d ndarray of floats
+            Leq of each frequency bin in dB SPL
+        """
+        if self._n == 0 :
+            raise ValueError ('No column of the spectrogram was pushed with update')
+        # average spectrogram along time direction
+        X = self._sum / self._n
+        LEQf_per_bin = power2dBSPL(X, self.gain, self.Vadc, self.sensitivity, 
+                                   self.dBref, self.pRef)
+        LEQf = psd2leq(X, self.gain, self.Vadc, self.sensitivity, self.dBref, 
+                       self.pRef)
+        return LEQf, LEQf_per_bin
+
 #=============================================================================
 
 def more_entropy(x, order=3, axis=0) :
@@ -1959,7 +2378,7 @@ def more_entropy(x, order=3, axis=0) :
                 pmf = x/np.sum(x,axis)
             elif axis == 1 :                     
                 pmf = (x.transpose()/np.sum(x,axis)).transpose()
-            pmf[pmf==0] = _MIN_
+            pmf[pmf==0] = _min_value(pmf)
             # alpha order entropy of Havrda and Charvat
             H_Havrda = (1-np.sum(pmf**order, axis=axis)) / (2**(order-1)-1)
             # alpha order entropy of Renyi
@@ -2450,6 +2869,9 @@ def all_temporal_alpha_indices(s, fs, verbose=False, display=False, **kwargs):
         Nt : integer, optional, default is 512
             Size of each frame. The largest, the highest is the approximation.
             
+        The envelope is computed once and shared by the indices SNRt, BGNt, 
+        MED, Ht, ACTt... and EVNt...
+            
         For entropy
         
         compatibility : string {'QUT', 'seewave'}, default is 'QUT'
@@ -2535,6 +2957,9 @@ def all_temporal_alpha_indices(s, fs, verbose=False, display=False, **kwargs):
     #### create a list
     df_temporal_indices=[] 
     
+    #### envelope shared by SNRt, MED, Ht, ACTt and EVNt
+    env = envelope(s, mode=mode, Nt=Nt)
+    
     """************************* Zero Crossing Rate ************ ***********""" 
     ZCR = zero_crossing_rate(s,fs)
     df_temporal_indices += [ZCR]
@@ -2557,20 +2982,20 @@ def all_temporal_alpha_indices(s, fs, verbose=False, display=False, **kwargs):
         print("LEQt %2.5f" % LEQt)
     
     """************ Signal to noise Ratio and noise energy   *************"""
-    _,BGNt,SNRt = temporal_snr(s, mode, Nt)  
+    _,BGNt,SNRt = temporal_snr(s, mode, Nt, env=env)  
     df_temporal_indices += [BGNt, SNRt]
     if verbose :
         print("SNRt %2.5f" % SNRt) 
         print("BGNt %2.5f" % BGNt)
     
     """*********************** median energy   ***************************"""
-    MED =  temporal_median(s, mode, Nt)
+    MED =  temporal_median(s, mode, Nt, env=env)
     df_temporal_indices += [MED]
     if verbose :
         print("MED %2.5f" % MED)
     
     """*******************  energy concentration : entropy****************"""
-    Ht =  temporal_entropy(s, compatibility, mode, Nt)
+    Ht =  temporal_entropy(s, compatibility, mode, Nt, env=env)
     df_temporal_indices += [Ht]
     if verbose :
         print("Ht %2.5f" % Ht)
@@ -2578,7 +3003,7 @@ def all_temporal_alpha_indices(s, fs, verbose=False, display=False, **kwargs):
     """**************************** Acoustic activity ********************"""
     """ ACT & EVN [TOWSEY] """
     ACTtFraction, ACTtCount, ACTtMean = temporal_activity (s,dB_threshold,
-                                                        mode, Nt)
+                                                        mode, Nt, env=env)
     df_temporal_indices += [ACTtFraction, ACTtCount, ACTtMean]
     if verbose :
         print("ACTtFraction %2.5f" % ACTtFraction)
@@ -2588,7 +3013,8 @@ def all_temporal_alpha_indices(s, fs, verbose=False, display=False, **kwargs):
     EVNtFraction, EVNtMean, EVNtCount, _ = temporal_events (s, fs, dB_threshold,
                                                          rejectDuration,
                                                          mode, Nt,
-                                                         display=display)
+                                                         display=display,
+                                                         env=env)
     df_temporal_indices += [EVNtFraction, EVNtMean, EVNtCount]
     if verbose :    
         print("EVNtFraction %2.5f" % EVNtFraction)
@@ -2596,22 +3022,7 @@ def all_temporal_alpha_indices(s, fs, verbose=False, display=False, **kwargs):
         print("EVNtCount %2.5f" % EVNtCount)
     
     df_temporal_indices = pd.DataFrame([df_temporal_indices], 
-                                    columns=['ZCR',
-                                            'MEANt', 
-                                            'VARt', 
-                                            'SKEWt', 
-                                            'KURTt',
-                                            'LEQt',
-                                            'BGNt', 
-                                            'SNRt',
-                                            'MED',
-                                            'Ht',
-                                            'ACTtFraction', 
-                                            'ACTtCount', 
-                                            'ACTtMean',
-                                            'EVNtFraction', 
-                                            'EVNtMean', 
-                                            'EVNtCount'])
+                                    columns=_TEMPORAL_INDICES)
     return df_temporal_indices
 
 
@@ -2619,7 +3030,7 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
                       flim_low=[0,1000], 
                       flim_mid=[1000,10000], 
                       flim_hi=[10000,20000], 
-                      verbose=False, display=False, **kwargs):
+                      verbose=False, display=False, indices=None, **kwargs):
     """
     Computes the acoustic indices in spectral (spectrum (1d) or spectrogram (2d)) domain.
 
@@ -2627,6 +3038,9 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
     ----------
     Sxx_power : 2D array of floats
         Power spectrogram to process (taken directly from maad.sound.spectrogram)
+        If Sxx_power is float32, the intermediate spectrograms are kept in 
+        single precision. The indices stay within 0.1% of the indices 
+        computed in double precision.
     tn : 1d ndarray of floats
         time vector (horizontal x-axis)
     fn : 1d ndarray of floats
@@ -2641,6 +3055,14 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
         print indices on the default terminal
     display : boolean, default is False
         Display graphs
+    indices : list of strings, optional, default is None
+        Names of the indices to compute (e.g. ['ACI', 'NDSI', 'BI', 'LEQf']).
+        Per bin indices can also be requested (e.g. 'ACI_per_bin'). Only the
+        intermediate spectrograms and spectrums needed by the requested indices 
+        are computed (e.g. the spectrogram without stationnary noise is only 
+        computed for EAS...EPS_SKEW, LFC...HFC, ACTsp..., EVNsp... and ROI...).
+        Indices computed by the same function are computed together. If None, 
+        all the indices are computed.
     \*\*kwargs : arguments for functions:
     
         - spectral_leq
@@ -2730,7 +3152,7 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
         Dataframe containing of the calculated spectral indices :
     df_per_bin_indices : Panda dataframe
         Dataframe containing of the calculated spectral indices  per frequency
-        bin :
+        bin. The first column is the frequency vector.
            
     See Also
     --------
@@ -2768,11 +3190,31 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
     >>> print('ROItotal var night vs day: %2.2f %%' % var.ROItotal)
     ROItotal var night vs day: 248.68 %
     
+    Compute only a selection of indices
+    
+    >>> df_spectral_indices, _ = maad.features.all_spectral_alpha_indices(Sxx_power,tn,fn,indices=['ACI','NDSI','BI','ADI'])
+    >>> list(df_spectral_indices.columns)
+    ['ACI', 'NDSI', 'BI', 'ADI']
+    
     """
     
     # extent
     kwargs.update({'extent':(tn[0], tn[-1], fn[0], fn[-1])})
     
+    #### select the groups of indices to compute
+    if indices is None :
+        groups = list(_SPECTRAL_GROUPS)
+    else :
+        if isinstance(indices, str) :
+            indices = [indices]
+        known = [name for group in _SPECTRAL_GROUPS.values() for names in group 
+                 for name in names]
+        unknown = [name for name in indices if name not in known]
+        if len(unknown) > 0 :
+            raise ValueError ('Unknown spectral indices: {}'.format(unknown))
+        groups = [key for key, (names, names_per_bin) in _SPECTRAL_GROUPS.items()
+                  if set(indices) & set(names + names_per_bin)]
+    
     #### get variables  
     R_compatible = kwargs.pop('R_compatible','soundecology') 
     
@@ -2806,9 +3248,8 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
     # removed)
     # -30 seems to give reasonable results that are more or less expected
     
-    #### create a list
-    df_spectral_indices=[] 
-    df_per_bin_indices=[] 
+    #### create a dictionary of the computed indices
+    values = {'frequencies' : fn.tolist()}
     
     ### for flim to be ndarray
     flim_low = np.asarray(flim_low)
@@ -2816,90 +3257,104 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
     flim_hi = np.asarray(flim_hi)
         
     #### Prepare different spectrograms and spectrums
-    # amplitude spectrogram
-    Sxx_amplitude = sqrt(Sxx_power)
-    # mean amplitude spectrum
-    S_amplitude = avg_amplitude_spectro(Sxx_amplitude)
-    # mean power spectrum
-    S_power = avg_power_spectro(Sxx_power)
+    # Each intermediate spectrogram or spectrum is computed the first time
+    # a selected index needs it, and is then reused by the other indices.
+    intermediates = {'Sxx_power' : Sxx_power}
+    recipes = {
+        # amplitude spectrogram
+        'Sxx_amplitude' : lambda : sqrt(get('Sxx_power')),
+        # mean amplitude spectrum
+        'S_amplitude' : lambda : avg_amplitude_spectro(get('Sxx_amplitude')),
+        # mean power spectrum
+        'S_power' : lambda : avg_power_spectro(get('Sxx_power')),
+        # Remove stationnary noise with median_equalizer as it is fast reliable
+        'Sxx_power_noNoise' : lambda : median_equalizer(get('Sxx_power'), 
+                                                        display=display, 
+                                                        **kwargs),
+        # Convert into dB
+        'Sxx_dB_noNoise' : lambda : power2dB(get('Sxx_power_noNoise'))
+        }
+    def get(name) :
+        if name not in intermediates :
+            intermediates[name] = recipes[name]()
+        return intermediates[name]
     
     """************************* Long term spectrogram *********************"""
-    # mean power spectrum => for long term spectrogram (LTS)
-    LTS = avg_power_spectro(Sxx_power)
-    df_per_bin_indices +=[fn.tolist()]
-    df_per_bin_indices +=[LTS.tolist()]
+    if 'LTS' in groups :
+        # mean power spectrum => for long term spectrogram (LTS)
+        values['LTS'] = get('S_power').tolist()
     
     """**************************** 4 spectrum moments *********************""" 
-    MEANf, VARf, SKEWf, KURTf = spectral_moments(S_amplitude)
-    df_spectral_indices += [MEANf, VARf, SKEWf, KURTf]
-    if verbose :
-        print("MEANf %2.5f" % MEANf)
-        print("VARf %2.5f" % VARf)
-        print("SKEWf %2.5f" % SKEWf)
-        print("KURTf %2.5f" % KURTf)
+    if 'MOMENTSf' in groups :
+        MEANf, VARf, SKEWf, KURTf = spectral_moments(get('S_amplitude'))
+        values.update(MEANf=MEANf, VARf=VARf, SKEWf=SKEWf, KURTf=KURTf)
+        if verbose :
+            print("MEANf %2.5f" % MEANf)
+            print("VARf %2.5f" % VARf)
+            print("SKEWf %2.5f" % SKEWf)
+            print("KURTf %2.5f" % KURTf)
      
     """*********************** 4 audio moments per bin ********************""" 
-    MEANt_per_bin, VARt_per_bin, SKEWt_per_bin, KURTt_per_bin = spectral_moments(Sxx_amplitude, axis=1) 
-    MEANt_per_bin = np.asarray(MEANt_per_bin).tolist()
-    VARt_per_bin = np.asarray(VARt_per_bin).tolist()
-    SKEWt_per_bin = np.asarray(SKEWt_per_bin).tolist()
-    KURTt_per_bin = np.asarray(KURTt_per_bin).tolist()
-    df_per_bin_indices += [MEANt_per_bin,VARt_per_bin,
-                           SKEWt_per_bin,KURTt_per_bin]
+    if 'MOMENTSt_per_bin' in groups :
+        MEANt_per_bin, VARt_per_bin, SKEWt_per_bin, KURTt_per_bin = spectral_moments(get('Sxx_amplitude'), axis=1) 
+        values.update(MEANt_per_bin = np.asarray(MEANt_per_bin).tolist(),
+                      VARt_per_bin = np.asarray(VARt_per_bin).tolist(),
+                      SKEWt_per_bin = np.asarray(SKEWt_per_bin).tolist(),
+                      KURTt_per_bin = np.asarray(KURTt_per_bin).tolist())
+        
     """**************************** Number of peaks ************************"""
-    NBPEAKS = number_of_peaks(S_amplitude,fn,display=display)
-    df_spectral_indices += [NBPEAKS]
-    if verbose :
-        print("NBPEAKS %2.5f" % NBPEAKS)
+    if 'NBPEAKS' in groups :
+        NBPEAKS = number_of_peaks(get('S_amplitude'),fn,display=display)
+        values['NBPEAKS'] = NBPEAKS
+        if verbose :
+            print("NBPEAKS %2.5f" % NBPEAKS)
     
     """********* total sound pressure level in frequency domain ************"""
-    LEQf, LEQf_per_bin = spectral_leq(Sxx_power, gain, Vadc, sensitivity, dBref, pRef)
-    df_spectral_indices += [LEQf]
-    df_per_bin_indices += [np.asarray(LEQf_per_bin).tolist()]
-    if verbose :
-        print("LEQf %2.5f" % LEQf)
+    if 'LEQf' in groups :
+        LEQf, LEQf_per_bin = spectral_leq(Sxx_power, gain, Vadc, sensitivity, dBref, pRef)
+        values['LEQf'] = LEQf
+        values['LEQf_per_bin'] = np.asarray(LEQf_per_bin).tolist()
+        if verbose :
+            print("LEQf %2.5f" % LEQf)
     
     """************ Signal to noise Ratio and noise energy   *************"""
     """ SNRf [TOWSEY] """
-    ENRf, BGNf, SNRf, ENRf_per_bin, BGNf_per_bin, SNRf_per_bin = spectral_snr(Sxx_power)
-    df_spectral_indices += [ENRf, BGNf, SNRf]
-    df_per_bin_indices += [np.asarray(ENRf_per_bin).tolist(),
-                           np.asarray(BGNf_per_bin).tolist(),
-                           np.asarray(SNRf_per_bin).tolist()]
-    if verbose :
-        print("ENRf %2.5f" % ENRf)
-        print("BGNf %2.5f" % BGNf)
-        print("SNRf %2.5f" % SNRf)
+    if 'SNRf' in groups :
+        ENRf, BGNf, SNRf, ENRf_per_bin, BGNf_per_bin, SNRf_per_bin = spectral_snr(Sxx_power)
+        values.update(ENRf=ENRf, BGNf=BGNf, SNRf=SNRf,
+                      ENRf_per_bin = np.asarray(ENRf_per_bin).tolist(),
+                      BGNf_per_bin = np.asarray(BGNf_per_bin).tolist(),
+                      SNRf_per_bin = np.asarray(SNRf_per_bin).tolist())
+        if verbose :
+            print("ENRf %2.5f" % ENRf)
+            print("BGNf %2.5f" % BGNf)
+            print("SNRf %2.5f" % SNRf)
 
     """*******************  energy concentration : entropy ****************"""
-    Hf, Ht_per_bin = frequency_entropy(Sxx_power, compatibility="QUT")
-    df_spectral_indices += [Hf] 
-    df_per_bin_indices += [np.asarray(Ht_per_bin).tolist()]
-    if verbose :
-        print("Hf %2.5f" % Hf)
-
-    """*********************** Remove stationnary noise ********************"""       
-    #### Use median_equalizer function as it is fast reliable
-    Sxx_power_noNoise = median_equalizer(Sxx_power, display=display, **kwargs)    
-    
-    #### Convert into dB
-    Sxx_dB_noNoise = power2dB(Sxx_power_noNoise)
+    if 'Hf' in groups :
+        Hf, Ht_per_bin = frequency_entropy(Sxx_power, compatibility="QUT")
+        values['Hf'] = Hf
+        values['Ht_per_bin'] = np.asarray(Ht_per_bin).tolist()
+        if verbose :
+            print("Hf %2.5f" % Hf)
 
     """******** Spectral indices from Spectrum (Amplitude or Energy) *******"""  
     """ EAS, ECU, ECV, EPS, KURT, SKEW [TOWSEY]  """
     #### Does not take into account low frequencies.
-    EAS, ECU, ECV, EPS, EPS_KURT, EPS_SKEW = spectral_entropy (Sxx_power_noNoise,
-                                                               fn,
-                                                               flim=(flim_mid[0],flim_hi[1]),
-                                                               display=display)
-    df_spectral_indices += [EAS, ECU, ECV, EPS, EPS_KURT, EPS_SKEW] 
-    if verbose :
-        print("EAS %2.5f" % EAS)
-        print("ECU %2.5f" % ECU)
-        print("ECV %2.5f" % ECV)
-        print("EPS %2.5f" % EPS)
-        print("EPS_KURT %2.5f" % EPS_KURT)
-        print("EPS_SKEW %2.5f" % EPS_SKEW)
+    if 'EPS' in groups :
+        EAS, ECU, ECV, EPS, EPS_KURT, EPS_SKEW = spectral_entropy (get('Sxx_power_noNoise'),
+                                                                   fn,
+                                                                   flim=(flim_mid[0],flim_hi[1]),
+                                                                   display=display)
+        values.update(EAS=EAS, ECU=ECU, ECV=ECV, EPS=EPS, EPS_KURT=EPS_KURT, 
+                      EPS_SKEW=EPS_SKEW)
+        if verbose :
+            print("EAS %2.5f" % EAS)
+            print("ECU %2.5f" % ECU)
+            print("ECV %2.5f" % ECV)
+            print("EPS %2.5f" % EPS)
+            print("EPS_KURT %2.5f" % EPS_KURT)
+            print("EPS_SKEW %2.5f" % EPS_SKEW)
     
     """=============================================================
     ECOLOGICAL INDICES :
@@ -2911,45 +3366,50 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
     
     #### Acoustic complexity index => 1st derivative of the spectrogram
     """ ACI """
-    _,ACI_per_bin,ACI_sum = acoustic_complexity_index(Sxx_amplitude)
-    ACI=ACI_sum
-    df_spectral_indices += [ACI]
-    df_per_bin_indices += [np.asarray(ACI_per_bin).tolist()]
-    if verbose :
-        print("ACI {seewave} %2.5f" %ACI)
+    if 'ACI' in groups :
+        _,ACI_per_bin,ACI_sum = acoustic_complexity_index(get('Sxx_amplitude'))
+        ACI=ACI_sum
+        values['ACI'] = ACI
+        values['ACI_per_bin'] = np.asarray(ACI_per_bin).tolist()
+        if verbose :
+            print("ACI {seewave} %2.5f" %ACI)
 
     #### energy repartition in the frequency bins
     """ NDSI & rBA """
-    NDSI, rBA, AnthroEnergy, BioEnergy = soundscape_index(Sxx_power, fn, 
-                                                         flim_bioPh=flim_mid,
-                                                         flim_antroPh=flim_low,
-                                                         R_compatible=R_compatible) 
-    df_spectral_indices += [NDSI, rBA, AnthroEnergy, BioEnergy]
-    if verbose :                                         
-        if R_compatible == 'soundecology' :
-            print("NDSI {soundecology} %2.5f" %NDSI)
-        else :
-            print("NDSI {seewave} %2.5f" %NDSI)
+    if 'NDSI' in groups :
+        NDSI, rBA, AnthroEnergy, BioEnergy = soundscape_index(Sxx_power, fn, 
+                                                             flim_bioPh=flim_mid,
+                                                             flim_antroPh=flim_low,
+                                                             R_compatible=R_compatible) 
+        values.update(NDSI=NDSI, rBA=rBA, AnthroEnergy=AnthroEnergy, 
+                      BioEnergy=BioEnergy)
+        if verbose :                                         
+            if R_compatible == 'soundecology' :
+                print("NDSI {soundecology} %2.5f" %NDSI)
+            else :
+                print("NDSI {seewave} %2.5f" %NDSI)
    
     ###### Bioacoustics Index : the calculation in R from soundecology is weird...
     """ BI """
-    BI = bioacoustics_index(Sxx_amplitude, fn, 
-                           flim=flim_mid, R_compatible=R_compatible) 
-    df_spectral_indices += [BI]
-    if verbose :
-        if R_compatible == 'soundecology' :
-            print("BI {SoundEcology} %2.5f" %BI)
-        else :
-            print("BI {MAAD} %2.5f" %BI)
+    if 'BI' in groups :
+        BI = bioacoustics_index(get('Sxx_amplitude'), fn, 
+                               flim=flim_mid, R_compatible=R_compatible) 
+        values['BI'] = BI
+        if verbose :
+            if R_compatible == 'soundecology' :
+                print("BI {SoundEcology} %2.5f" %BI)
+            else :
+                print("BI {MAAD} %2.5f" %BI)
     
     #### roughness
     """ ROU """
-    ROU_per_bin = roughness(Sxx_amplitude, norm=None, axis=1)
-    ROU = np.sum(ROU_per_bin) 
-    df_spectral_indices += [ROU]
-    df_per_bin_indices += [np.asarray(ROU_per_bin).tolist()]
-    if verbose :
-        print("roughness %2.2f" % ROU)    
+    if 'ROU' in groups :
+        ROU_per_bin = roughness(get('Sxx_amplitude'), norm=None, axis=1)
+        ROU = np.sum(ROU_per_bin) 
+        values['ROU'] = ROU
+        values['ROU_per_bin'] = np.asarray(ROU_per_bin).tolist()
+        if verbose :
+            print("roughness %2.2f" % ROU)    
     
     """*********** Spectral indices from the decibel spectrogram ***********"""
     #### Score
@@ -2959,27 +3419,32 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
                 - threshold : -50dB when norm by the max (as soundecology)
                               6dB if PSDxxdB_SansNoise
     """  
-    ADI = acoustic_diversity_index(Sxx_amplitude, fn, fmin=flim_low[0], 
-                                 fmax=flim_mid[1], bin_step=bin_step, 
-                                 dB_threshold=ADI_dB_threshold, index="shannon") 
-    AEI = acoustic_eveness_index(Sxx_amplitude, fn, fmin=flim_low[0], 
-                               fmax=flim_mid[1], bin_step=bin_step, 
-                               dB_threshold=AEI_dB_threshold) 
-    df_spectral_indices += [ADI, AEI]
-    if verbose :
-        print("ADI %2.5f" %ADI)
-        print("AEI %2.5f" %AEI)
+    if 'ADI' in groups :
+        ADI = acoustic_diversity_index(get('Sxx_amplitude'), fn, fmin=flim_low[0], 
+                                     fmax=flim_mid[1], bin_step=bin_step, 
+                                     dB_threshold=ADI_dB_threshold, index="shannon") 
+        values['ADI'] = ADI
+        if verbose :
+            print("ADI %2.5f" %ADI)
+    if 'AEI' in groups :
+        AEI = acoustic_eveness_index(get('Sxx_amplitude'), fn, fmin=flim_low[0], 
+                                   fmax=flim_mid[1], bin_step=bin_step, 
+                                   dB_threshold=AEI_dB_threshold) 
+        values['AEI'] = AEI
+        if verbose :
+            print("AEI %2.5f" %AEI)
                
     """************************** SPECTRAL COVER ***************************"""
     #### frequency cover 
     """ LFC, MFC, HFC [TOWSEY] """
-    LFC, MFC, HFC = spectral_cover (Sxx_dB_noNoise, fn,dB_threshold=dB_threshold, 
-                                    flim_LF=flim_low,flim_MF=flim_mid,flim_HF=flim_hi)
-    df_spectral_indices += [LFC, MFC, HFC]
-    if verbose :
-        print("LFC %2.5f" %LFC)
-        print("MFC %2.5f" %MFC)
-        print("HFC %2.5f" %HFC)
+    if 'COVER' in groups :
+        LFC, MFC, HFC = spectral_cover (get('Sxx_dB_noNoise'), fn,dB_threshold=dB_threshold, 
+                                        flim_LF=flim_low,flim_MF=flim_mid,flim_HF=flim_hi)
+        values.update(LFC=LFC, MFC=MFC, HFC=HFC)
+        if verbose :
+            print("LFC %2.5f" %LFC)
+            print("MFC %2.5f" %MFC)
+            print("HFC %2.5f" %HFC)
     
     """**************************** Activity *******************************"""
     # Time resolution (in s)
@@ -2988,168 +3453,121 @@ def all_spectral_alpha_indices (Sxx_power, tn, fn,
     if rejectDuration is None :
         rejectDuration = DELTA_T * 3
     
-    X = Sxx_dB_noNoise
-    ACTspFract, ACTspCount, ACTspMean = spectral_activity (X, dB_threshold=dB_threshold)
-    ACTspFract_avg = np.mean(ACTspFract)
-    ACTspCount_avg = np.mean(ACTspCount)
-    df_spectral_indices += [ACTspFract_avg, ACTspCount_avg, ACTspMean]
-    df_per_bin_indices += [np.asarray(ACTspFract).tolist(),
-                           np.asarray(ACTspCount).tolist()]
-    if verbose :
-        print("ACTspFract %2.5f" %ACTspFract_avg)
-        print("ACTspCount %2.5f" %ACTspCount_avg)
-        print("ACTspMean %2.5f" %ACTspMean)
-
-    EVNspFract, EVNspMean, EVNspCount, _ = spectral_events (X, 
-                                                            dt=DELTA_T,
-                                                            dB_threshold=dB_threshold,
-                                                            rejectDuration=rejectDuration,
-                                                            display=display,
-                                                            **kwargs)
-    EVNspFract_avg = np.mean(EVNspFract)
-    EVNspMean_avg = np.mean(EVNspMean)
-    EVNspCount_avg = np.mean(EVNspCount)
-    df_spectral_indices += [EVNspFract_avg, EVNspMean_avg, EVNspCount_avg]
-    df_per_bin_indices += [np.asarray(EVNspFract).tolist(),
-                           np.asarray(EVNspMean).tolist(),
-                           np.asarray(EVNspCount).tolist()]
-    if verbose :
-        print("EVNspFract %2.5f" %mean(EVNspFract))
-        print("EVNspMean %2.5f" %mean(EVNspMean))
-        print("EVNspCount %2.5f" %mean(EVNspCount))
+    if 'ACTsp' in groups :
+        X = get('Sxx_dB_noNoise')
+        ACTspFract, ACTspCount, ACTspMean = spectral_activity (X, dB_threshold=dB_threshold)
+        ACTspFract_avg = np.mean(ACTspFract)
+        ACTspCount_avg = np.mean(ACTspCount)
+        values.update(ACTspFract=ACTspFract_avg, ACTspCount=ACTspCount_avg,
+                      ACTspMean=ACTspMean,
+                      ACTspFract_per_bin = np.asarray(ACTspFract).tolist(),
+                      ACTspCount_per_bin = np.asarray(ACTspCount).tolist())
+        if verbose :
+            print("ACTspFract %2.5f" %ACTspFract_avg)
+            print("ACTspCount %2.5f" %ACTspCount_avg)
+            print("ACTspMean %2.5f" %ACTspMean)
+
+    if 'EVNsp' in groups :
+        X = get('Sxx_dB_noNoise')
+        EVNspFract, EVNspMean, EVNspCount, _ = spectral_events (X, 
+                                                                dt=DELTA_T,
+                                                                dB_threshold=dB_threshold,
+                                                                rejectDuration=rejectDuration,
+                                                                display=display,
+                                                                **kwargs)
+        EVNspFract_avg = np.mean(EVNspFract)
+        EVNspMean_avg = np.mean(EVNspMean)
+        EVNspCount_avg = np.mean(EVNspCount)
+        values.update(EVNspFract=EVNspFract_avg, EVNspMean=EVNspMean_avg,
+                      EVNspCount=EVNspCount_avg,
+                      EVNspFract_per_bin = np.asarray(EVNspFract).tolist(),
+                      EVNspMean_per_bin = np.asarray(EVNspMean).tolist(),
+                      EVNspCount_per_bin = np.asarray(EVNspCount).tolist())
+        if verbose :
+            print("EVNspFract %2.5f" %mean(EVNspFract))
+            print("EVNspMean %2.5f" %mean(EVNspMean))
+            print("EVNspCount %2.5f" %mean(EVNspCount))
           
     """**************************** New indices*****************************""" 
     """ TFSD """
-    # compute TFSD with mode = ThirdOctave and flim
-    TFSD= tfsd(Sxx_amplitude,fn,tn,flim=flim_mid,mode='thirdOctave')
-    df_spectral_indices += [TFSD]
-    if verbose :
-        print("TFSD %2.5f" % TFSD)
+    if 'TFSD' in groups :
+        # compute TFSD with mode = ThirdOctave and flim
+        TFSD= tfsd(get('Sxx_amplitude'),fn,tn,flim=flim_mid,mode='thirdOctave')
+        values['TFSD'] = TFSD
+        if verbose :
+            print("TFSD %2.5f" % TFSD)
     
     """ More entropy"""
-    X = S_power
-    H_Havrda, H_Renyi, H_pairedShannon, H_gamma, H_GiniSimpson = more_entropy(X, order=3)
-    df_spectral_indices += [H_Havrda, H_Renyi, H_pairedShannon, H_gamma, H_GiniSimpson]
-    if verbose :
-        print("H_Havrda %2.2f" % H_Havrda)
-        print("H_Renyi %2.2f" % H_Renyi)
-        print("H_pairedShannon %2.2f" % H_pairedShannon)
-        print("H_gamma %2.2f" % H_gamma)
-        print("H_GiniSimpson %2.2f" % H_GiniSimpson)  
+    if 'H_more' in groups :
+        X = get('S_power')
+        H_Havrda, H_Renyi, H_pairedShannon, H_gamma, H_GiniSimpson = more_entropy(X, order=3)
+        values.update(H_Havrda=H_Havrda, H_Renyi=H_Renyi, 
+                      H_pairedShannon=H_pairedShannon, H_gamma=H_gamma, 
+                      H_GiniSimpson=H_GiniSimpson)
+        if verbose :
+            print("H_Havrda %2.2f" % H_Havrda)
+            print("H_Renyi %2.2f" % H_Renyi)
+            print("H_pairedShannon %2.2f" % H_pairedShannon)
+            print("H_gamma %2.2f" % H_gamma)
+            print("H_GiniSimpson %2.2f" % H_GiniSimpson)  
 
     """ RAOQ """
-    X = S_power
-    RAOQ = frequency_raoq(X, fn, bin_step=bin_step) 
-    df_spectral_indices += [RAOQ]
-    if verbose :
-        print("RAOQ %2.2f" % RAOQ)
+    if 'RAOQ' in groups :
+        X = get('S_power')
+        RAOQ = frequency_raoq(X, fn, bin_step=bin_step) 
+        values['RAOQ'] = RAOQ
+        if verbose :
+            print("RAOQ %2.2f" % RAOQ)
     
     #### Acoustic gradient index => real 1st derivative of the spectrogram
     """ AGI """
-    # Time resolution (in s)
-    DELTA_T = tn[1]-tn[0]
-    X = Sxx_amplitude
-    _, AGI_per_bin, AGI, _ = acoustic_gradient_index(X, dt=DELTA_T, 
-                                                   order=1, norm='per_bin')
-    df_spectral_indices += [AGI]
-    df_per_bin_indices += [np.asarray(AGI_per_bin).tolist()]
-    if verbose :
-        print("AGI %2.3f" % AGI)
+    if 'AGI' in groups :
+        X = get('Sxx_amplitude')
+        _, AGI_per_bin, AGI, _ = acoustic_gradient_index(X, dt=DELTA_T, 
+                                                       order=1, norm='per_bin')
+        values['AGI'] = AGI
+        values['AGI_per_bin'] = np.asarray(AGI_per_bin).tolist()
+        if verbose :
+            print("AGI %2.3f" % AGI)
     
     """ ROI index """
-    # Time resolution (in s)
-    DELTA_T = tn[1]-tn[0]
-    # Frequency resolution (in Hz)
-    DELTA_F = fn[1]-fn[0]
-    # Minimum time duration of an event (in s)
-    MIN_EVENT_DUR = 30e-3
-    # Minimum frequency bandwidth (in Hz)
-    MIN_FREQ_BW = 100
-    # Min Region Of Interest ROI
-    if min_roi_area is None :
-        min_roi_area = int(MIN_EVENT_DUR/DELTA_T * MIN_FREQ_BW / DELTA_F)
-    ROItotal, ROIcover = region_of_interest_index(Sxx_dB_noNoise, 
-                                               tn, fn, 
-                                               smooth_param1, 
-                                               mask_mode,
-                                               mask_param1, 
-                                               mask_param2, 
-                                               min_roi=min_roi_area, 
-                                               max_roi=max_roi_area,
-                                               remove_rain = remove_rain,
-                                               max_ratio_xy = max_ratio_xy,
-                                               display=display)
-    df_spectral_indices += [ROItotal, ROIcover]
-    if verbose :
-        print("ROItotal %2.3f" % ROItotal)
-        print("ROIcover %2.3f" % ROIcover)
-        
-    df_spectral_indices = pd.DataFrame([df_spectral_indices], 
-                                    columns=['MEANf', 
-                                             'VARf', 
-                                             'SKEWf', 
-                                             'KURTf', 
-                                             'NBPEAKS', 
-                                             'LEQf', 
-                                             'ENRf', 
-                                             'BGNf', 
-                                             'SNRf',
-                                             'Hf', 
-                                             'EAS',
-                                             'ECU',
-                                             'ECV',
-                                             'EPS',
-                                             'EPS_KURT',
-                                             'EPS_SKEW',
-                                             'ACI',
-                                             'NDSI',
-                                             'rBA',
-                                             'AnthroEnergy',
-                                             'BioEnergy',
-                                             'BI',
-                                             'ROU',
-                                             'ADI',
-                                             'AEI',
-                                             'LFC',
-                                             'MFC',
-                                             'HFC',
-                                             'ACTspFract',
-                                             'ACTspCount',
-                                             'ACTspMean', 
-                                             'EVNspFract',
-                                             'EVNspMean',
-                                             'EVNspCount',
-                                             'TFSD',
-                                             'H_Havrda',
-                                             'H_Renyi',
-                                             'H_pairedShannon', 
-                                             'H_gamma', 
-                                             'H_GiniSimpson',
-                                             'RAOQ',
-                                             'AGI',
-                                             'ROItotal',
-                                             'ROIcover'])
-        
-    df_per_bin_indices = pd.DataFrame([df_per_bin_indices], 
-                                    columns=['frequencies',
-                                            'LTS',
-                                            'MEANt_per_bin',
-                                            'VARt_per_bin', 
-                                            'SKEWt_per_bin',
-                                            'KURTt_per_bin',
-                                            'LEQf_per_bin',
-                                            'ENRf_per_bin',
-                                            'BGNf_per_bin',
-                                            'SNRf_per_bin',
-                                            'Ht_per_bin',
-                                            'ACI_per_bin',
-                                            'ROU_per_bin',
-                                            'ACTspFract_per_bin',
-                                            'ACTspCount_per_bin',
-                                            'EVNspFract_per_bin',
-                                            'EVNspMean_per_bin',
-                                            'EVNspCount_per_bin',
-                                            'AGI_per_bin'])
+    if 'ROI' in groups :
+        # Frequency resolution (in Hz)
+        DELTA_F = fn[1]-fn[0]
+        # Minimum time duration of an event (in s)
+        MIN_EVENT_DUR = 30e-3
+        # Minimum frequency bandwidth (in Hz)
+        MIN_FREQ_BW = 100
+        # Min Region Of Interest ROI
+        if min_roi_area is None :
+            min_roi_area = int(MIN_EVENT_DUR/DELTA_T * MIN_FREQ_BW / DELTA_F)
+        ROItotal, ROIcover = region_of_interest_index(get('Sxx_dB_noNoise'), 
+                                                   tn, fn, 
+                                                   smooth_param1, 
+                                                   mask_mode,
+                                                   mask_param1, 
+                                                   mask_param2, 
+                                                   min_roi=min_roi_area, 
+                                                   max_roi=max_roi_area,
+                                                   remove_rain = remove_rain,
+                                                   max_ratio_xy = max_ratio_xy,
+                                                   display=display)
+        values.update(ROItotal=ROItotal, ROIcover=ROIcover)
+        if verbose :
+            print("ROItotal %2.3f" % ROItotal)
+            print("ROIcover %2.3f" % ROIcover)
+    
+    #### keep the requested indices in the order of _SPECTRAL_GROUPS
+    columns = [name for names, _ in _SPECTRAL_GROUPS.values() for name in names 
+               if name in values and (indices is None or name in indices)]
+    columns_per_bin = ['frequencies'] + [name for _, names in _SPECTRAL_GROUPS.values() 
+                       for name in names 
+                       if name in values and (indices is None or name in indices)]
+        
+    df_spectral_indices = pd.DataFrame([[values[name] for name in columns]], 
+                                       columns=columns)
+    df_per_bin_indices = pd.DataFrame([[values[name] for name in columns_per_bin]], 
+                                      columns=columns_per_bin)
                                     
     return df_spectral_indices, df_per_bin_indices
 
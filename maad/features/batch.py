@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+"""
+Collection of functions to compute acoustic indices on a collection of audio
+files
+"""
+#
+# Authors:  Juan Sebastian ULLOA <lisofomia@gmail.com>
+#           Sylvain HAUPERT <sylvain.haupert@mnhn.fr>
+#
+# License: New BSD License
+
+# =============================================================================
+# Load the modules
+# =============================================================================
+# Import external modules
+import os
+import json
+import hashlib
+from concurrent import futures
+from functools import partial
+import numpy as np
+import pandas as pd
+
+# Import internal modules
+from maad.sound import load, spectrogram
+from maad.features.alpha_indices import (all_temporal_alpha_indices,
+                                         all_spectral_alpha_indices,
+                                         _TEMPORAL_INDICES, _SPECTRAL_GROUPS)
+
+#%%
+# =============================================================================
+# private functions
+# =============================================================================
+def _alpha_indices_file(filename, temporal_indices, spectral_indices, channel,
+                        nperseg, noverlap, temporal_kwargs, spectral_kwargs):
+    """
+    Compute the temporal and spectral alpha indices of a single audio file.
+
+    Any exception is caught and returned as a message in order not to stop
+    the processing of the other files.
+
+    Returns
+    -------
+    values : 1d ndarray of floats or None
+        Indices in the order temporal_indices + spectral_indices. None if an
+        error occurred.
+    error : string or None
+        Error message. None if no error occurred.
+    """
+    try :
+        s, fs = load(filename, channel=channel, detrend=True)
+
+        values = []
+        if len(temporal_indices) > 0 :
+            df_temporal = all_temporal_alpha_indices(s, fs, **temporal_kwargs)
+            values.append(df_temporal[temporal_indices].values.ravel())
+
+        if len(spectral_indices) > 0 :
+            Sxx_power, tn, fn, _ = spectrogram(s, fs, window='hann',
+                                               nperseg=nperseg,
+                                               noverlap=noverlap)
+            df_spectral, _ = all_spectral_alpha_indices(Sxx_power, tn, fn,
+                                                        indices=spectral_indices,
+                                                        **spectral_kwargs)
+            values.append(df_spectral[spectral_indices].values.ravel())
+
+        return np.concatenate(values).astype(np.float64), None
+
+    except Exception as error :
+        return None, '{}: {}'.format(type(error).__name__, error)
+
+#%%
+def _file_key(filename):
+    """
+    Key of an audio file in the checkpoint : (path, size, modification time).
+    None if the file cannot be accessed.
+    """
+    try :
+        stat = os.stat(filename)
+    except OSError :
+        return None
+    return (filename, stat.st_size, stat.st_mtime_ns)
+
+#%%
+def _params_hash(**params):
+    """
+    Hash of the parameters of the processing, stored with each record of the
+    checkpoint. Values that are not JSON serializable (e.g. arrays) are
+    hashed from their string representation.
+    """
+    text = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+#%%
+def _read_checkpoint(checkpoint, params):
+    """
+    Read the indices of the files successfully processed from a checkpoint 
+    (JSON lines, one record per file). Lines that cannot be decoded (i.e. 
+    the last line if the process was killed while writing) are ignored, as
+    well as the records computed with other parameters (params is the hash
+    returned by _params_hash). If a file was processed several times, the
+    last record is kept.
+
+    Returns
+    -------
+    records : dict
+        {(path, size, mtime) : {index name : value}}
+    """
+    records = {}
+    if not os.path.exists(checkpoint) :
+        return records
+    with open(checkpoint, 'r') as f :
+        for line in f :
+            try :
+                record = json.loads(line)
+            except ValueError :
+                continue
+            if record.get('params') != params :
+                continue
+            key = (record['file'], record['size'], record['mtime'])
+            if record['error'] is None :
+                records[key] = record['indices']
+            else :
+                records.pop(key, None)
+    return records
+
+#%%
+# =============================================================================
+# public functions
+# =============================================================================
+def batch_alpha_indices(df_files, n_jobs=1, chunksize=None, indices=None,
+                        channel='left', nperseg=1024, noverlap=None,
+                        temporal_kwargs=None, spectral_kwargs=None,
+                        checkpoint=None, verbose=False):
+    """
+    Compute the temporal and spectral alpha indices of a collection of audio
+    files with a pool of processes.
+
+    Each file is loaded, the temporal indices are computed with
+    `all_temporal_alpha_indices` and the spectral indices are computed with
+    `all_spectral_alpha_indices` on the power spectrogram of the file. The
+    files are sent to the workers by chunks and the indices are collected
+    into a preallocated array. Errors do not stop the processing : they are
+    reported for each file in a separate table.
+
+    Parameters
+    ----------
+    df_files : Pandas dataframe
+        Dataframe with a column 'file' (full path to the audio file), as
+        returned by `util.date_parser`. The index of the dataframe (i.e. 'Date')
+        is kept in the output.
+    n_jobs : int, optional, default is 1
+        Number of worker processes. If -1, all the CPUs are used. If 1, the
+        files are processed sequentially in the current process. 0 and 
+        values below -1 are not valid.
+    chunksize : int, optional, default is None
+        Number of files sent at once to a worker. Large chunks reduce the
+        communication between the processes, small chunks balance the load
+        between the workers. If None, the chunks are set in order to have about
+        4 chunks per worker, with a maximum of 64 files per chunk.
+    indices : list of strings, optional, default is None
+        Names of the temporal (e.g. 'LEQt', 'Ht') and spectral (e.g. 'ACI',
+        'NDSI') indices to compute. If None, all the indices are computed.
+        Only the scalar indices can be selected (no per bin indices).
+    channel : {'left', 'right'}, optional, default is 'left'
+        Channel to load for stereo files.
+    nperseg : int, optional, default is 1024
+        Length of each segment to compute the spectrogram.
+    noverlap : int, optional, default is None
+        Number of points to overlap between segments. If None,
+        noverlap = nperseg // 2.
+    temporal_kwargs : dict, optional, default is None
+        Arguments of `all_temporal_alpha_indices` (e.g. gain, sensitivity,
+        dB_threshold, rejectDuration).
+    spectral_kwargs : dict, optional, default is None
+        Arguments of `all_spectral_alpha_indices` (e.g. flim_low, flim_mid,
+        flim_hi, gain, sensitivity, R_compatible, mask_param1).
+    checkpoint : string, optional, default is None
+        Path to a checkpoint file (JSON lines). The indices of each file are 
+        appended to the checkpoint as soon as they are computed, with the 
+        path, the size and the modification time of the file. When the 
+        function is called again with the same checkpoint (e.g. after a 
+        crash), the files already processed with the same size and 
+        modification time are not processed again and their indices are read
+        from the checkpoint. The files that failed are processed again. Each
+        record stores a hash of the processing parameters (channel, nperseg,
+        noverlap, temporal_kwargs and spectral_kwargs) : the records 
+        computed with other parameters are ignored and the files are 
+        processed again. A record is reused if it holds all the requested 
+        indices.
+    verbose : boolean, optional, default is False
+        Print the progress of the processing.
+
+    Returns
+    -------
+    df_indices : Pandas dataframe
+        Dataframe with the same index as df_files, the column 'file' and one
+        column per index. The indices of the files that failed are NaN.
+    df_errors : Pandas dataframe
+        Dataframe with the index of df_files, the column 'file' and the
+        column 'error' (error message) for each file that failed.
+
+    See Also
+    --------
+    all_temporal_alpha_indices, all_spectral_alpha_indices, util.date_parser
+
+    Examples
+    --------
+    >>> df = maad.util.date_parser("../data/indices/", dateformat='SM4')
+    >>> df_indices, df_errors = maad.features.batch_alpha_indices(df, n_jobs=-1,
+            indices=['LEQt', 'Ht', 'ACI', 'NDSI', 'BI'],
+            spectral_kwargs={'flim_mid':[1500,8000], 'R_compatible':'soundecology'})
+    >>> df_indices.columns.tolist()
+    ['file', 'LEQt', 'Ht', 'ACI', 'NDSI', 'BI']
+    """
+
+    #### select the temporal and spectral indices
+    spectral_names = [name for names, _ in _SPECTRAL_GROUPS.values()
+                      for name in names]
+    if indices is None :
+        temporal_indices = list(_TEMPORAL_INDICES)
+        spectral_indices = spectral_names
+    else :
+        if isinstance(indices, str) :
+            indices = [indices]
+        unknown = [name for name in indices
+                   if name not in _TEMPORAL_INDICES + spectral_names]
+        if len(unknown) > 0 :
+            raise ValueError ('Unknown alpha indices: {}'.format(unknown))
+        temporal_indices = [name for name in _TEMPORAL_INDICES if name in indices]
+        spectral_indices = [name for name in spectral_names if name in indices]
+    columns = temporal_indices + spectral_indices
+
+    #### arguments of the worker
+    worker = partial(_alpha_indices_file,
+                     temporal_indices=temporal_indices,
+                     spectral_indices=spectral_indices,
+                     channel=channel,
+                     nperseg=nperseg,
+                     noverlap=noverlap,
+                     temporal_kwargs=dict(temporal_kwargs or {}),
+                     spectral_kwargs=dict(spectral_kwargs or {}))
+
+    files = df_files['file'].tolist()
+    n_files = len(files)
+    params = _params_hash(channel=channel, nperseg=nperseg, noverlap=noverlap, 
+                          temporal_kwargs=dict(temporal_kwargs or {}),
+                          spectral_kwargs=dict(spectral_kwargs or {}))
+
+    if n_jobs == 0 or n_jobs < -1 :
+        raise ValueError ('n_jobs must be a positive int or -1')
+    if n_jobs == -1 :
+        n_jobs = os.cpu_count()
+    n_jobs = max(min(n_jobs, n_files), 1)
+
+    if chunksize is None :
+        chunksize = min(max(n_files // (4*n_jobs), 1), 64)
+
+    #### preallocate the outputs
+    X = np.full((n_files, len(columns)), np.nan)
+    errors = [None] * n_files
+
+    #### resume from the checkpoint
+    todo = list(range(n_files))
+    if checkpoint is not None :
+        keys = [_file_key(filename) for filename in files]
+        records = _read_checkpoint(checkpoint, params)
+        todo = []
+        for ii, key in enumerate(keys) :
+            record = records.get(key)
+            if record is not None and all(name in record for name in columns) :
+                X[ii] = [record[name] for name in columns]
+            else :
+                todo.append(ii)
+        if verbose :
+            print('{}/{} files read from the checkpoint'.format(
+                  n_files-len(todo), n_files))
+        f_checkpoint = open(checkpoint, 'a+')
+        # end the last line if the process was killed while writing
+        if f_checkpoint.tell() > 0 :
+            f_checkpoint.seek(f_checkpoint.tell()-1)
+            if f_checkpoint.read(1) != '\n' :
+                f_checkpoint.write('\n')
+
+    #### process the files
+    if n_jobs == 1 :
+        results = map(worker, [files[ii] for ii in todo])
+        pool = None
+    else :
+        pool = futures.ProcessPoolExecutor(max_workers=n_jobs)
+        results = pool.map(worker, [files[ii] for ii in todo], 
+                           chunksize=chunksize)
+
+    try :
+        for count, (ii, (values, error)) in enumerate(zip(todo, results)) :
+            if error is None :
+                X[ii] = values
+            else :
+                errors[ii] = error
+            # save the result as soon as it is available
+            if checkpoint is not None and keys[ii] is not None :
+                record = {'file' : keys[ii][0],
+                          'size' : keys[ii][1],
+                          'mtime' : keys[ii][2],
+                          'params' : params,
+                          'error' : error,
+                          'indices' : dict(zip(columns, X[ii].tolist()))}
+                f_checkpoint.write(json.dumps(record) + '\n')
+                f_checkpoint.flush()
+            if verbose and ((count+1) % chunksize == 0 or count+1 == len(todo)) :
+                print('{}/{} files processed'.format(count+1, len(todo)))
+    finally :
+        if pool is not None :
+            pool.shutdown()
+        if checkpoint is not None :
+            f_checkpoint.close()
+
+    #### create the dataframes
+    df_indices = pd.DataFrame(X, index=df_files.index, columns=columns)
+    df_indices.insert(0, 'file', files)
+
+    failed = np.array([error is not None for error in errors], dtype=bool)
+    df_errors = pd.DataFrame({'file' : np.asarray(files, dtype=object)[failed],
+                              'error' : [e for e in errors if e is not None]},
+                             index=df_files.index[failed])
+    if verbose and failed.any() :
+        print('{} files failed'.format(failed.sum()))
+
+    return df_indices, df_errors
@@ -19,14 +19,20 @@ from __future__ import print_function
 import numpy as np 
 import pandas as pd 
 from scipy import ndimage as ndi 
+from scipy import fft 
+from scipy.fft import next_fast_len 
 import itertools as it 
+import os 
+import threading 
+from concurrent import futures 
+from collections import OrderedDict 
+from functools import lru_cache 
 import matplotlib.pyplot as plt 
 from skimage import transform, measure 
 from scipy import ndimage 
 
 # Import internal modules
 from maad.util import format_features, overlay_rois, plot_shape, overlay_centroid
-from maad.rois import rois_to_imblobs
 from maad.sound import spectrogram 
  
 #%%
@@ -106,7 +112,7 @@ def _gabor_kernel_nodc(frequency, theta=0, bandwidth=1, gamma=1,
     rotx = x * np.cos(theta) + y * np.sin(theta) 
     roty = -x * np.sin(theta) + y * np.cos(theta) 
     # combine gambor and  
-    g = np.zeros(y.shape, dtype=np.complex) 
+    g = np.zeros(y.shape, dtype=complex) 
     g[:] = np.exp(-0.5 * (rotx ** 2 / sigma_x ** 2 + roty ** 2 / sigma_y ** 2)) 
     g /= 2 * np.pi * sigma_x * sigma_y # gaussian envelope 
     oscil = np.exp(1j * (2 * np.pi * frequency * rotx + offset)) # harmonic / oscilatory function 
@@ -257,6 +263,195 @@ def _filter_mag(im, kernel):
                    ndi.convolve(im, np.imag(kernel), mode='reflect')**2) 
     return im_out 
  
+#%%
+@lru_cache(maxsize=16) 
+def _filter_bank(ntheta, bandwidth, frequency, gamma): 
+    """ 
+    Filter bank built by filter_bank_2d_nodc, cached for the process in 
+    order to build the kernels only once for the same parameters. The 
+    kernels are read-only as they are shared by all the calls. 
+     
+    Returns 
+    ------- 
+    params: tuple 
+        Parameters (theta, freq) of each kernel 
+    kernels: tuple 
+        Complex kernels and their parameters 
+    """ 
+    params, kernels = filter_bank_2d_nodc(frequency, ntheta, bandwidth, gamma) 
+    for kernel, _ in kernels: 
+        kernel.setflags(write=False) 
+    return tuple(params), tuple(kernels) 
+ 
+# Cache of the spectra of the kernels for each FFT size (LRU, bounded by 
+# the total size in bytes of the spectra) 
+_KERNEL_FFT_CACHE = OrderedDict() 
+_KERNEL_FFT_CACHE_NBYTES = 2**28 
+_KERNEL_FFT_LOCK = threading.Lock() 
+ 
+#%%
+def _kernel_fft(kernel, fft_shape): 
+    """ 
+    Spectrum of a kernel zero padded to fft_shape. The FFT along the 
+    columns is only computed on the rows of the kernel. 
+     
+    The spectra are cached for the process, with the kernel values and 
+    fft_shape as key, so the spectra of a filter bank are computed only 
+    once for each image size. The least recently used spectra are removed 
+    when the cache exceeds _KERNEL_FFT_CACHE_NBYTES. 
+    """ 
+    key = (kernel.tobytes(), kernel.shape, kernel.dtype.str, tuple(fft_shape)) 
+    with _KERNEL_FFT_LOCK: 
+        kernel_fft = _KERNEL_FFT_CACHE.get(key) 
+        if kernel_fft is not None: 
+            _KERNEL_FFT_CACHE.move_to_end(key) 
+            return kernel_fft 
+     
+    kernel_fft = fft.fft(kernel, n=fft_shape[1], axis=1) 
+    kernel_fft = fft.fft(kernel_fft, n=fft_shape[0], axis=0) 
+    kernel_fft.setflags(write=False) 
+     
+    with _KERNEL_FFT_LOCK: 
+        _KERNEL_FFT_CACHE[key] = kernel_fft 
+        nbytes = sum(v.nbytes for v in _KERNEL_FFT_CACHE.values()) 
+        while nbytes > _KERNEL_FFT_CACHE_NBYTES and len(_KERNEL_FFT_CACHE) > 1: 
+            _, v = _KERNEL_FFT_CACHE.popitem(last=False) 
+            nbytes -= v.nbytes 
+    return kernel_fft 
+ 
+#%%
+def _filter_mag_fft(im, kernels): 
+    """ 
+    Normalizes the image and computes the modulus of the response to each 
+    complex kernel with the FFT. Same output as `_filter_mag` for each 
+    kernel, up to the floating point rounding.
+    
+    The image is padded with its reflection (same boundary as 
+    ``ndi.convolve(mode='reflect')``) and transformed once. The response to 
+    each kernel is a single complex inverse FFT of the product of the 
+    spectra of the image and of the kernel.
+     
+    Parameters 
+    ---------- 
+    im: 2D array 
+        Input image to process  
+    kernels: list of tuples
+        Complex kernels or filters and their parameters, as returned by 
+        filter_bank_2d_nodc
+             
+    Returns 
+    ------- 
+    im_out: list of 2D arrays
+        Modulus operand on filtered image for each kernel
+ 
+    """     
+    im_fft, pad = _image_fft(im, kernels) 
+    return [_filter_mag_spectrum(im_fft, kernel, pad, im.shape) 
+            for kernel, _ in kernels] 
+ 
+#%%
+def _image_fft(im, kernels): 
+    """ 
+    Normalizes the image, pads it with its reflection and computes its 
+    spectrum, shared by the responses to all the kernels (see 
+    `_filter_mag_fft`). 
+     
+    Returns 
+    ------- 
+    im_fft: 2D array 
+        Spectrum of the padded image 
+    pad: tuple 
+        Padding (py, px) of the image on each side 
+    """ 
+    im = (im - im.mean()) / im.std() 
+    
+    # pad the image with the largest half size of the kernels
+    py = max(kernel.shape[0] for kernel, _ in kernels) // 2
+    px = max(kernel.shape[1] for kernel, _ in kernels) // 2
+    im_pad = np.pad(im, ((py, py), (px, px)), mode='symmetric')
+    
+    # As the output is cropped, the circular convolution is the same as 
+    # the linear convolution without zero padding
+    fft_shape = (next_fast_len(im_pad.shape[0]), next_fast_len(im_pad.shape[1]))
+    im_fft = fft.fft2(im_pad, s=fft_shape)
+    return im_fft, (py, px) 
+ 
+#%%
+def _filter_mag_spectrum(im_fft, kernel, pad, shape): 
+    """ 
+    Modulus of the response of an image of the given shape to a complex 
+    kernel, from the spectrum and the padding returned by `_image_fft`. 
+    """ 
+    py, px = pad 
+    ky, kx = kernel.shape[0] // 2, kernel.shape[1] // 2
+    im_filt = fft.ifft2(im_fft * _kernel_fft(kernel, im_fft.shape))
+    im_filt = im_filt[py+ky:py+ky+shape[0], px+kx:px+kx+shape[1]]
+    return np.abs(im_filt) 
+ 
+#%%
+def _integral_image(im): 
+    """ 
+    Summed-area table of an image, padded with a first row and a first 
+    column of zeros : sat[i, j] is the sum of im[:i, :j]. 
+    """ 
+    sat = np.zeros((im.shape[0]+1, im.shape[1]+1)) 
+    np.cumsum(im, axis=0, out=sat[1:, 1:]) 
+    np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:]) 
+    return sat 
+ 
+#%%
+def _rois_bounds(rois, shape): 
+    """ 
+    Bounds [min, max[ of the rectangular rois (inclusive pixels min_y..max_y 
+    and min_x..max_x) clipped to an image of the given shape, as 1d arrays 
+    of ints (y0, x0, y1, x1). Empty rois have y1 == y0 or x1 == x0. 
+    """ 
+    y0 = np.clip(rois.min_y.values.astype(int), 0, shape[0]) 
+    x0 = np.clip(rois.min_x.values.astype(int), 0, shape[1]) 
+    y1 = np.clip((rois.max_y.values+1).astype(int), y0, shape[0]) 
+    x1 = np.clip((rois.max_x.values+1).astype(int), x0, shape[1]) 
+    return y0, x0, y1, x1 
+ 
+#%%
+def _rois_sum(sat, y0, x0, y1, x1): 
+    """ 
+    Sum of the image over each roi [y0, y1[ x [x0, x1[ from its summed-area 
+    table, for all the rois at once. 
+    """ 
+    return sat[y1, x1] - sat[y0, x1] - sat[y1, x0] + sat[y0, x0] 
+ 
+#%%
+def _integral_interp(sat, y, x): 
+    """ 
+    Summed-area table at fractional positions (y, x), i.e. the integral of 
+    the piecewise constant image over [0, y[ x [0, x[. The integral is 
+    bilinear between the nodes of the table, so the interpolation is exact. 
+    """ 
+    i = np.minimum(np.floor(y).astype(int), sat.shape[0]-2) 
+    j = np.minimum(np.floor(x).astype(int), sat.shape[1]-2) 
+    fy = y - i 
+    fx = x - j 
+    return ((1-fy) * ((1-fx)*sat[i, j] + fx*sat[i, j+1]) 
+            + fy * ((1-fx)*sat[i+1, j] + fx*sat[i+1, j+1])) 
+ 
+#%%
+def _rois_mean_scaled(im, y0, x0, y1, x1, shape): 
+    """ 
+    Mean of a reduced image (i.e. a level of the gaussian pyramid) over each 
+    roi [y0, y1[ x [x0, x1[ given in the pixels of the full image of the 
+    given shape. The bounds are scaled to the reduced image (same mapping 
+    as transform.rescale) and the mean is computed over the fractional 
+    pixels of the roi. Empty rois are NaN. 
+    """ 
+    ry = im.shape[0] / shape[0] 
+    rx = im.shape[1] / shape[1] 
+    sat = _integral_image(im) 
+    total = (_integral_interp(sat, y1*ry, x1*rx) - _integral_interp(sat, y0*ry, x1*rx) 
+             - _integral_interp(sat, y1*ry, x0*rx) + _integral_interp(sat, y0*ry, x0*rx)) 
+    area = (y1 - y0) * ry * (x1 - x0) * rx 
+    with np.errstate(invalid='ignore', divide='ignore'): 
+        return np.where(area > 0, total / area, np.nan) 
+ 
 #%%
 def _params_to_df(params_filter_bank, npyr): 
     """ 
@@ -295,7 +490,8 @@ def _params_to_df(params_filter_bank, npyr):
 #============================================================================ 
 # Public functions 
 #============================================================================ 
-def filter_multires(Sxx, kernels, npyr=4, rescale=True): 
+def filter_multires(Sxx, kernels, npyr=4, rescale=True, method='fft', rois=None, 
+                    n_jobs=1): 
     """ 
     Computes 2D wavelet coefficients at multiple scales using Gaussian pyramid  
     transformation to downscale the input spectrogram. 
@@ -310,11 +506,36 @@ def filter_multires(Sxx, kernels, npyr=4, rescale=True):
         Number of pyramids to compute. Default is 4. 
     rescale: boolean, optional 
         Indicates if the reduced images should be rescaled. Default is True. 
+    method: {'fft', 'direct'}, optional 
+        Method used to filter the images. With 'fft', each image of the 
+        pyramid is transformed once and the response to each kernel is 
+        computed with a single inverse FFT. With 'direct', the real and 
+        imaginary parts of each kernel are convolved with the image 
+        (scipy.ndimage.convolve). Both methods use the same reflect boundary 
+        and give the same output up to the floating point rounding. 
+        Default is 'fft'. 
+    rois: pandas DataFrame, optional 
+        Regions of interest with the columns min_y, min_x, max_y and max_x 
+        (see util.format_features). If provided, the filtered images are not 
+        returned but their mean over each roi : the coordinates of the rois 
+        are mapped to each level of the pyramid and the mean is computed at 
+        the native scale of the level, without rescaling the images (rescale 
+        is ignored). This avoids allocating one full-size image per kernel 
+        and per level. Default is None. 
+    n_jobs: int, optional 
+        Number of threads used to filter the images. The (pyramid level, 
+        kernel) pairs are spread over a pool of threads and the responses 
+        are returned in the same order as with a single thread. If -1, all 
+        the CPUs are used. The FFTs release the GIL, so the 'fft' method 
+        benefits the most from the threads. 0 and values below -1 are not 
+        valid. Default is 1. 
              
     Returns 
     ------- 
     Sxx_out: list of 2D arrays 
-        List of spectrograms filtered by each 2D kernel 
+        List of spectrograms filtered by each 2D kernel. If rois is provided, 
+        2D array (n_rois, n_filters) with the mean response to each filter 
+        over each roi. 
      
     Examples 
     -------- 
@@ -338,31 +559,64 @@ def filter_multires(Sxx, kernels, npyr=4, rescale=True):
     if npyr<2: 
         print('Warning: npyr should be int and larger than 2 for multiresolution') 
         im_pyr = tuple(transform.pyramid_gaussian(Sxx, downscale=2,  
-                                                  max_layer=1, multichannel=False))  
+                                                  max_layer=1))  
     else:     
         im_pyr = tuple(transform.pyramid_gaussian(Sxx, downscale=2,  
-                                                  max_layer=npyr-1, multichannel=False))  
+                                                  max_layer=npyr-1))  
  
     # filter 2d array at multiple resolutions using gabor kernels 
-    im_filt=[] 
-    for im in im_pyr:  # for each pyramid 
-        for kernel, param in kernels:  # for each kernel 
-            im_filt.append(_filter_mag(im, kernel))  #  magnitude response of filter 
-     
-    # Rescale image using gaussian pyramid 
-    if rescale: 
-        dims_raw = Sxx.shape 
-        Sxx_out=[] 
-        for im in im_filt: 
-            ratio = np.array(dims_raw)/np.array(im.shape) 
+    if method not in ('fft', 'direct'): 
+        raise ValueError("method must be 'fft' or 'direct'") 
+    if n_jobs == 0 or n_jobs < -1: 
+        raise ValueError("n_jobs must be a positive int or -1") 
+    if rois is not None: 
+        y0, x0, y1, x1 = _rois_bounds(rois, Sxx.shape) 
+     
+    def _response(level, kernel): 
+        """ response of one level of the pyramid to one kernel """ 
+        im = im_pyr[level] 
+        if method == 'fft': 
+            im_fft, pad = im_ffts[level] 
+            im_out = _filter_mag_spectrum(im_fft, kernel, pad, im.shape) 
+        else: 
+            im_out = _filter_mag(im, kernel)  #  magnitude response of filter 
+         
+        if rois is not None: 
+            # pool the rois at the scale of the level 
+            im_out = _rois_mean_scaled(im_out, y0, x0, y1, x1, Sxx.shape) 
+        elif rescale: 
+            # Rescale image using gaussian pyramid 
+            ratio = np.array(Sxx.shape)/np.array(im_out.shape) 
             if ratio[0] > 1: 
-                im = transform.rescale(im, scale = ratio, mode='reflect', 
-                                       multichannel=False, anti_aliasing=True) 
-            else: 
-                pass 
-            Sxx_out.append(im) 
+                im_out = transform.rescale(im_out, scale = ratio, mode='reflect', 
+                                           anti_aliasing=True) 
+        return im_out 
+     
+    # (pyramid level, kernel) pairs, ordered by level then by kernel 
+    levels, kernels_level = zip(*[(level, kernel) for level in range(len(im_pyr)) 
+                                  for kernel, param in kernels]) 
+     
+    if n_jobs == -1: 
+        n_jobs = os.cpu_count() 
+    if n_jobs > 1: 
+        pool = futures.ThreadPoolExecutor(max_workers=n_jobs) 
+        pool_map = pool.map 
     else: 
-        pass 
+        pool = None 
+        pool_map = map 
+     
+    try: 
+        if method == 'fft': 
+            # spectrum of each level, shared by all the kernels 
+            im_ffts = list(pool_map(_image_fft, im_pyr, [kernels]*len(im_pyr))) 
+        # map returns the results in the order of the pairs 
+        Sxx_out = list(pool_map(_response, levels, kernels_level)) 
+    finally: 
+        if pool is not None: 
+            pool.shutdown() 
+     
+    if rois is not None: 
+        return np.column_stack(Sxx_out) 
  
     return Sxx_out 
  
@@ -558,7 +812,8 @@ def opt_shape_presets(resolution, opt_shape=None):
     return opt_shape 
  
 #%%
-def shape_features(Sxx, resolution='low', rois=None): 
+def shape_features(Sxx, resolution='low', rois=None, method='fft', 
+                   pooling='rescale', n_jobs=1): 
     """ 
     Computes time-frequency shape coefficients at multiple resolutions using 2D Gabor filters.
      
@@ -576,6 +831,21 @@ def shape_features(Sxx, resolution='low', rois=None):
         have a valid input format with column names: min_t min_f, max_t, max_f. 
         Use format_features(rois,tn,fn) before using shape_features to be sure that 
         the format of the rois DataFrame is correct.
+    method: {'fft', 'direct'}, optional 
+        Method used to filter the spectrogram, see filter_multires. 
+        Default is 'fft'. 
+    pooling: {'rescale', 'native'}, optional 
+        How the responses of the coarse levels of the pyramid are averaged. 
+        With 'rescale', each response is rescaled to the size of Sxx before 
+        computing the mean over the rois. With 'native', the rois are mapped 
+        to each level of the pyramid and the mean is computed at the scale 
+        of the level (see filter_multires), which is faster and uses less 
+        memory. The coefficients are close but not identical as the rescaled 
+        responses are smoothed by the anti-aliasing and the interpolation. 
+        Default is 'rescale'. 
+    n_jobs: int, optional 
+        Number of threads used to filter the spectrogram, see 
+        filter_multires. Default is 1. 
              
     Returns 
     ------- 
@@ -641,29 +911,48 @@ def shape_features(Sxx, resolution='low', rois=None):
     npyr = opt_shape['npyr']
       
     # build filterbank 
-    params, kernels = filter_bank_2d_nodc(ntheta=opt_shape['ntheta'], 
-                                          bandwidth=opt_shape['bandwidth'], 
-                                          frequency=opt_shape['frequency'], 
-                                          gamma=opt_shape['gamma']) 
-    # filter spectrogram 
-    im_rs = filter_multires(Sxx, kernels, npyr, rescale=True)  
+    params, kernels = _filter_bank(ntheta=opt_shape['ntheta'], 
+                                   bandwidth=opt_shape['bandwidth'], 
+                                   frequency=tuple(opt_shape['frequency']), 
+                                   gamma=opt_shape['gamma']) 
+    if pooling not in ('rescale', 'native'): 
+        raise ValueError("pooling must be 'rescale' or 'native'") 
+ 
+    if pooling == 'native': 
+        # filter spectrogram and get the mean intensity for each ROI (or 
+        # the whole spectrogram) at the scale of each pyramid level 
+        if rois is None: 
+            bbox = pd.DataFrame({'min_y':[0], 'min_x':[0], 
+                                 'max_y':[Sxx.shape[0]-1], 
+                                 'max_x':[Sxx.shape[1]-1]}) 
+        else: 
+            bbox = rois 
+        shape = filter_multires(Sxx, kernels, npyr, method=method, rois=bbox, 
+                                n_jobs=n_jobs) 
+    else: 
+        # filter spectrogram 
+        im_rs = filter_multires(Sxx, kernels, npyr, rescale=True, method=method, 
+                                n_jobs=n_jobs)  
      
     # If rois are provided get mean intensity for each ROI,  
     # else compute mean intensity for the whole spectrogram 
-    if rois is None: 
+    if pooling == 'native': 
+        pass  # already pooled by filter_multires 
+    elif rois is None: 
         shape = [] 
         for im in im_rs: 
             shape.append(np.mean(im)) 
         shape = [shape]  # for dataframe formating below
     else: 
+        # mean of each filtered image over all the rois at once, from its 
+        # summed-area table
+        y0, x0, y1, x1 = _rois_bounds(rois, Sxx.shape) 
+        area = (y1 - y0) * (x1 - x0) 
         shape = np.zeros(shape=(len(rois),len(im_rs)))
-        im_rs = np.array(im_rs)
-        index_row = 0 
-        for _, row in rois.iterrows(): 
-            im_rs_blobs = im_rs[:, int(row.min_y):int(row.max_y)+1, int(row.min_x):int(row.max_x)+1]
-            roi_mean = np.mean(im_rs_blobs, axis=(1,2))
-            shape[index_row,:] = roi_mean 
-            index_row = index_row + 1 
+        for idx, im in enumerate(im_rs): 
+            shape[:, idx] = _rois_sum(_integral_image(im), y0, x0, y1, x1) 
+        with np.errstate(invalid='ignore', divide='ignore'): 
+            shape /= area[:, np.newaxis] 
     
     # organise parameters 
     params_multires = _params_to_df(params, npyr) 
@@ -679,7 +968,8 @@ def shape_features(Sxx, resolution='low', rois=None):
     return shape, params_multires 
  
 #%%
-def shape_features_raw(im, resolution='low', opt_shape=None): 
+def shape_features_raw(im, resolution='low', opt_shape=None, method='fft', 
+                       n_jobs=1): 
     """ 
     Computes raw shape of 2D signal (image or spectrogram) at multiple resolutions  
     using 2D Gabor filters. Contrary to ``shape_features``, this function 
@@ -696,6 +986,12 @@ def shape_features_raw(im, resolution='low', opt_shape=None):
         the number of filters. 
     opt_shape: dictionary (optional) 
         options for the filter bank (kbank_opt) and the number of scales (npyr) 
+    method: {'fft', 'direct'}, optional 
+        Method used to filter the spectrogram, see filter_multires. 
+        Default is 'fft'. 
+    n_jobs: int, optional 
+        Number of threads used to filter the spectrogram, see 
+        filter_multires. Default is 1. 
              
     Returns 
     ------- 
@@ -734,12 +1030,13 @@ def shape_features_raw(im, resolution='low', opt_shape=None):
     opt_shape = opt_shape_presets(resolution, opt_shape) 
     npyr = opt_shape['npyr'] 
     # build filterbank 
-    params, kernels = filter_bank_2d_nodc(ntheta=opt_shape['ntheta'], 
-                                          bandwidth=opt_shape['bandwidth'], 
-                                          frequency=opt_shape['frequency'], 
-                                          gamma=opt_shape['gamma']) 
+    params, kernels = _filter_bank(ntheta=opt_shape['ntheta'], 
+                                   bandwidth=opt_shape['bandwidth'], 
+                                   frequency=tuple(opt_shape['frequency']), 
+                                   gamma=opt_shape['gamma']) 
     # filter images 
-    shape_raw = filter_multires(im, kernels, npyr, rescale=True)  
+    shape_raw = filter_multires(im, kernels, npyr, rescale=True, method=method, 
+                                n_jobs=n_jobs)  
      
     # organise parameters 
     params_multires = _params_to_df(params, npyr) 
@@ -835,12 +1132,16 @@ def centroid_features(Sxx, rois=None, im_rois=None):
         else:
             # rectangular area (overestimation) 
             area = (rois.max_y -rois.min_y) * (rois.max_x -rois.min_x)  
-            # centroid of rectangular roi
-            for _, row in rois.iterrows() : 
-                row = pd.DataFrame(row).T 
-                im_blobs = rois_to_imblobs(np.zeros(Sxx.shape), row)     
-                rprops = measure.regionprops(im_blobs, intensity_image=Sxx)
-                centroid.append(rprops.pop().weighted_centroid) 
+            # centroid of rectangular roi weighted by the intensity, for 
+            # all the rois at once from the summed-area tables of Sxx, 
+            # y*Sxx and x*Sxx 
+            y0, x0, y1, x1 = _rois_bounds(rois, Sxx.shape) 
+            yy, xx = np.indices(Sxx.shape) 
+            sum_roi = _rois_sum(_integral_image(Sxx), y0, x0, y1, x1) 
+            with np.errstate(invalid='ignore', divide='ignore'): 
+                centroid_y = _rois_sum(_integral_image(yy*Sxx), y0, x0, y1, x1) / sum_roi 
+                centroid_x = _rois_sum(_integral_image(xx*Sxx), y0, x0, y1, x1) / sum_roi 
+            centroid = np.stack((centroid_y, centroid_x), axis=1) 
 
         centroid = pd.DataFrame(centroid, columns=['centroid_y', 'centroid_x'], index=rois.index)
         
@@ -858,7 +1159,8 @@ def centroid_features(Sxx, rois=None, im_rois=None):
  
 #%%     
 def all_shape_features(s, fs, rois, resolution='low',  
-                          display=False, **kwargs): 
+                          display=False, method='fft', pooling='rescale', 
+                          n_jobs=1, **kwargs): 
     """ 
     Computes shape and central frequency features from signal at specified 
     time-frequency limits defined by regions of interest (ROIs).
@@ -885,6 +1187,15 @@ def all_shape_features(s, fs, rois, resolution='low',
         values in Hertz 
     display: boolean, optional, default is False 
         Flag. If display is True, plot results 
+    method: {'fft', 'direct'}, optional 
+        Method used to filter the spectrogram, see filter_multires. 
+        Default is 'fft'. 
+    pooling: {'rescale', 'native'}, optional 
+        How the responses of the coarse levels of the pyramid are averaged 
+        over the rois, see shape_features. Default is 'rescale'. 
+    n_jobs: int, optional 
+        Number of threads used to filter the spectrogram, see 
+        filter_multires. Default is 1. 
         
     \*\*kwargs, optional. This parameter is used by plt.plot and savefig functions 
             
@@ -994,7 +1305,8 @@ def all_shape_features(s, fs, rois, resolution='low',
         print('number of rois : %d' % len(rois))
      
     # Compute shape features and centroid features 
-    shape, params = shape_features(Sxx, resolution, rois) 
+    shape, params = shape_features(Sxx, resolution, rois, method=method, 
+                                   pooling=pooling, n_jobs=n_jobs) 
     shape = format_features(shape, tn, fn)
     if verbose : 
         print('Dataframe with shapes features')
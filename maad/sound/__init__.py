@@ -11,6 +11,8 @@ Input and output
     :toctree: generated/
 
     load
+    wav_info
+    iter_blocks
     load_url
     load_spectrogram
     write
@@ -37,6 +39,9 @@ Transform audio
     :toctree: generated/
     
     spectrogram
+    SpectrogramEngine
+    StreamingSpectrogram
+    LongTermSpectrogram
     avg_power_spectro
     avg_amplitude_spectro
     linear_to_octave
@@ -59,6 +64,8 @@ Metrics
 """
 
 from .input_output import (load,
+                           wav_info,
+                           iter_blocks,
                            load_url,
                            load_spectrogram,
                            write)
@@ -84,6 +91,9 @@ from .transform import (envelope,
                         gain)
 
 from .spectro_func import (spectrogram,
+                           SpectrogramEngine,
+                           StreamingSpectrogram,
+                           LongTermSpectrogram,
                            avg_power_spectro,
                            avg_amplitude_spectro,
                            linear_to_octave)
@@ -95,6 +105,8 @@ from .metrics import (temporal_snr,
 __all__ = [
         # io.py
         'load',
+        'wav_info',
+        'iter_blocks',
         'load_url',
         'load_spectrogram',
         'write',
@@ -120,6 +132,9 @@ __all__ = [
         'gain',
         # spectro_func.py
         'spectrogram',
+        'SpectrogramEngine',
+        'StreamingSpectrogram',
+        'LongTermSpectrogram',
         'avg_power_spectro',
         'avg_amplitude_spectro',
         'linear_to_octave',
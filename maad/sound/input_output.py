@@ -16,6 +16,7 @@ its time-frequency representation
 import numpy as np
 from warnings import warn
 import io
+import struct
 from urllib.request import urlopen
 from scipy.io import wavfile 
 from skimage.io import imread 
@@ -24,17 +25,69 @@ from scipy.io.wavfile import write as write_wav
 # Import internal modules
 from maad.util import plot1d, plot2d, linear_scale
 
+#%%
+# =============================================================================
+# private functions
+# =============================================================================
+def _select_channel(s, channel='left', verbose=False):
+    """
+    Keep only one channel of a stereo signal. Mono signals are returned 
+    unchanged.
+    """
+    if s.ndim==2 :
+        if channel == 'left' :
+            if verbose :print("Select left channel")
+            s = s[:,0] 
+        else:
+            if verbose :print("Select right channel")
+            s = s[:,1] 
+    return s
+
+def _wav2float(s, dtype=None):
+    """
+    Normalize the integer samples read from a WAVE file between -1 to 1 
+    depending on the type (number of bits). Float samples are copied into 
+    memory without any scaling. 
+    
+    If dtype is None, integer samples are converted into float64 and float 
+    samples keep their type.
+    """
+    if s.dtype == np.int32:
+        bit = 32
+        s = s.astype(np.float64 if dtype is None else dtype)
+        s /= 2**(bit-1)
+    elif s.dtype == np.int16:
+        bit = 16
+        s = s.astype(np.float64 if dtype is None else dtype)
+        s /= 2**(bit-1)
+    elif s.dtype == np.uint8:
+        bit = 8
+        s = s.astype(np.float64 if dtype is None else dtype)
+        s /= 2**(bit) # as it's unsigned
+    elif dtype is not None:
+        s = s.astype(dtype)
+    elif isinstance(s, np.memmap):
+        # make sure that a memory-mapped array is read
+        s = np.array(s)
+    return s
+
 #%%
 # =============================================================================
 # public functions
 # =============================================================================
 def load(filename, channel='left', detrend=True, verbose=False,
-         display=False, savefig=None, **kwargs): 
+         display=False, savefig=None, offset=0, duration=None, dtype=None,
+         **kwargs): 
     """
     Load an audio file (stereo or mono). 
     
     Currently, this function con only load WAVE files.
     
+    When `offset` or `duration` are set, the file is memory-mapped and only 
+    the requested portion of the audio is read and converted into floats. 
+    This is much lighter than loading the whole file and then calling 
+    `sound.trim` when working with long recordings.
+    
     Parameters
     ----------
     filename : string 
@@ -50,6 +103,17 @@ def load(filename, channel='left', detrend=True, verbose=False,
     savefig : string, optional, default is None
         Root filename (with full path) is required to save the figures. Postfix
         is added to the root filename.
+    offset : scalar, optional, default is 0
+        Start reading the audio after this time (in s).
+    duration : scalar, optional, default is None
+        Only load up to this much audio (in s). If None, the audio is loaded
+        until the end of the file.
+    dtype : {np.float64, np.float32}, optional, default is None
+        Type of the output audiogram. If None, integer WAVE files are 
+        converted into float64 and float WAVE files keep their type. 
+        Use np.float32 to halve the memory footprint : the spectrogram and 
+        the spectral indices computed from the audiogram keep the same 
+        precision.
     \*\*kwargs, optional. This parameter is used by plt.plot and savefig functions    
         - savefilename : str, optional, default :'_audiogram.png'
             Postfix of the figure filename
@@ -103,43 +167,60 @@ def load(filename, channel='left', detrend=True, verbose=False,
     >>> ax1, _ = maad.util.plot1d(tn,s,ax=ax1, figtitle='canopy level')
     >>> ax1.set_ylim((-0.075,0.075))
     >>> fig.tight_layout()
+    
+    Load only 3 seconds of audio, starting at 5 seconds.
+    
+    >>> s, fs = maad.sound.load("../data/spinetail.wav", offset=5, duration=3)
+    >>> s.size/fs
+    3.0
+    
+    Load the audio in single precision.
+    
+    >>> import numpy as np
+    >>> s, fs = maad.sound.load("../data/spinetail.wav", dtype=np.float32)
+    >>> s.dtype
+    dtype('float32')
     """
     if verbose :
         print(72 * '_' )
         print("loading %s..." %filename)   
     
-    # read the .wav file and return the sampling frequency fs (Hz) 
-    # and the audiogram s as a 1D array of integer
-    fs, s = wavfile.read(filename)
-    if verbose :print("Sampling frequency: %dHz" % fs)
-    
-    # Normalize the signal between -1 to 1 depending on the type (number of bits)
-    if s.dtype == np.int32:
-        bit = 32
-        s = s/2**(bit-1)
-    elif s.dtype == np.int16:
-        bit = 16
-        s = s/2**(bit-1)
-    elif s.dtype == np.uint8:
-        bit = 8
-        s = s/2**(bit) # as it's unsigned
+    if offset < 0:
+        raise ValueError("offset must be >= 0.")
     
-    # test if stereo signal. if YES => keep only the ch_select
-    if s.ndim==2 :
-        if channel == 'left' :
-            if verbose :print("Select left channel")
-            s_out = s[:,0] 
+    if (offset > 0) or (duration is not None):
+        # read the .wav file as a memory map so that only the requested 
+        # samples are read from the disk
+        try:
+            fs, s = wavfile.read(filename, mmap=True)
+        except ValueError:
+            # some formats (e.g. 24 bits) cannot be memory-mapped
+            if hasattr(filename, 'seek'): filename.seek(0)
+            fs, s = wavfile.read(filename)
+        # select the samples between offset and offset+duration
+        start = int(round(offset*fs))
+        if duration is None:
+            stop = s.shape[0]
         else:
-            if verbose :print("Select right channel")
-            s_out = s[:,1] 
+            stop = min(start + int(round(duration*fs)), s.shape[0])
+        s = s[start:stop]
     else:
-        s_out = s;
+        # read the .wav file and return the sampling frequency fs (Hz) 
+        # and the audiogram s as a 1D array of integer
+        fs, s = wavfile.read(filename)
+    if verbose :print("Sampling frequency: %dHz" % fs)
+    
+    # test if stereo signal. if YES => keep only the ch_select
+    s = _select_channel(s, channel, verbose)
+    
+    # Normalize the signal between -1 to 1 depending on the type (number of bits)
+    s_out = _wav2float(s, dtype)
         
     # Detrend the signal by removing the DC offset
     if detrend: s_out = s_out - np.mean(s_out)
     
     # Time vector
-    tn = np.arange(s_out.size)/fs 
+    tn = offset + np.arange(s_out.size)/fs 
     
     # DISPLAY
     if display : 
@@ -158,6 +239,154 @@ def load(filename, channel='left', detrend=True, verbose=False,
                            
     return s_out, fs
 
+#%%
+def wav_info(filename):
+    """
+    Read the header of a WAVE file, without reading the audio samples.
+    
+    Parameters
+    ----------
+    filename : string 
+        Name or path of the WAVE file
+        
+    Returns
+    -------
+    fs : int
+        The sampling frequency in Hz
+    n_samples : int
+        Number of samples of each channel
+    n_channels : int
+        Number of channels (1 for mono, 2 for stereo)
+        
+    See Also
+    --------
+    load, iter_blocks
+        
+    Examples
+    --------
+    >>> fs, n_samples, n_channels = maad.sound.wav_info("../data/spinetail.wav")
+    >>> fs, n_samples / fs
+    (44100, 19.541927437641725)
+    """
+    f = filename if hasattr(filename, 'read') else open(filename, 'rb')
+    try:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError('%s is not a WAVE file' % filename)
+        fs, n_channels, block_align = None, None, None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError('No data chunk found in %s' % filename)
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+                n_channels, fs = struct.unpack('<HI', fmt[2:8])
+                block_align = struct.unpack('<H', fmt[12:14])[0]
+            elif chunk_id == b'data':
+                if fs is None:
+                    raise ValueError('No fmt chunk found in %s' % filename)
+                return fs, size // block_align, n_channels
+            else:
+                # chunks are padded to an even size
+                f.seek(size + size % 2, 1)
+    finally:
+        if f is not filename:
+            f.close()
+
+#%%
+def iter_blocks(filename, block_duration, overlap=0, channel='left', 
+                detrend=False, dtype=None, verbose=False):
+    """
+    Read an audio file (stereo or mono) block by block.
+    
+    The file is memory-mapped and each block is normalized between -1 to 1 
+    only when it is yielded, so the whole recording is never held in memory.
+    This is useful to process multi-hour recordings.
+    
+    Currently, this function con only read WAVE files.
+    
+    Parameters
+    ----------
+    filename : string 
+        Name or path of the audio file
+    block_duration : scalar
+        Duration of each block (in s)
+    overlap : scalar, optional, default is 0
+        Duration of the overlap between two consecutive blocks (in s). 
+        Must be smaller than block_duration.
+    channel : {'left', right'}, optional, default: left
+        In case of stereo sound select the channel that is kept 
+    detrend : boolean, optional, default is False
+        Subtract the DC value of each block. Contrary to `sound.load`, the 
+        mean value is computed on each block and not on the whole recording.
+    dtype : {np.float64, np.float32}, optional, default is None
+        Type of the blocks. If None, integer WAVE files are converted into 
+        float64 and float WAVE files keep their type.
+    verbose : boolean, optional, default is False
+        Print messages into the console or terminal if verbose is True
+        
+    Yields
+    ------
+    s_block : 1d ndarray of floats
+        Vector containing the audiogram of the block. The last block may be 
+        shorter than block_duration.
+    start : int
+        Index of the first sample of the block in the whole audiogram.
+        The sampling frequency can be read with `sound.wav_info`.
+        
+    See Also
+    --------
+    load, wav_info
+        
+    Examples
+    --------
+    >>> fs, _, _ = maad.sound.wav_info("../data/spinetail.wav")
+    >>> for s_block, start in maad.sound.iter_blocks("../data/spinetail.wav", block_duration=5, overlap=1):
+    ...     print(start, s_block.size)
+    0 220500
+    176400 220500
+    352800 220500
+    529200 220500
+    705600 156199
+    """
+    if overlap >= block_duration:
+        raise ValueError("overlap must be smaller than block_duration.")
+    if overlap < 0:
+        raise ValueError("overlap must be >= 0.")
+    
+    if verbose :
+        print(72 * '_' )
+        print("reading %s by blocks..." %filename)   
+    
+    try:
+        fs, s = wavfile.read(filename, mmap=True)
+    except ValueError:
+        # some formats (e.g. 24 bits) cannot be memory-mapped
+        if hasattr(filename, 'seek'): filename.seek(0)
+        fs, s = wavfile.read(filename)
+    if verbose :print("Sampling frequency: %dHz" % fs)
+    
+    # test if stereo signal. if YES => keep only the ch_select
+    s = _select_channel(s, channel, verbose)
+    
+    # number of samples per block and between the start of two blocks 
+    nblock = int(round(block_duration*fs))
+    nhop = nblock - int(round(overlap*fs))
+    if nblock < 1 or nhop < 1:
+        raise ValueError("block_duration and overlap give blocks of %d samples"
+                         " every %d samples at %dHz." % (nblock, nhop, fs))
+    
+    for start in range(0, s.shape[0], nhop):
+        # Normalize the signal between -1 to 1 depending on the type 
+        s_block = _wav2float(s[start:start+nblock], dtype)
+        # Detrend the block by removing the DC offset
+        if detrend: s_block = s_block - np.mean(s_block)
+        yield s_block, start
+        # the last block reaches the end of the file
+        if start + nblock >= s.shape[0]:
+            break
+
 #%%
 def load_spectrogram(filename, fs, duration, flims = None, flipud = True,
                 verbose=False, display=False, **kwargs): 
@@ -22,7 +22,7 @@ from maad.util import power2dB, mean_dB, get_unimode, running_mean
 # =============================================================================
 # public functions
 # =============================================================================
-def temporal_snr (s, mode ='fast', Nt=512) :
+def temporal_snr (s, mode ='fast', Nt=512, env=None) :
     """
     Compute the signal to noise ratio (SNR) of an audio signal in the time domain.
 
@@ -39,6 +39,9 @@ def temporal_snr (s, mode ='fast', Nt=512) :
         The method is slow
     Nt : integer, optional, default is 512
         Size of each frame. The largest, the highest is the approximation.
+    env : 1D array, optional, default is None
+        Precomputed envelope of s (see `sound.envelope`). If given, mode and 
+        Nt are ignored and the envelope is not computed again.
     
     Returns
     -------
@@ -64,7 +67,8 @@ def temporal_snr (s, mode ='fast', Nt=512) :
 
     """
     # Envelope
-    env = envelope(s, mode=mode, Nt=Nt)
+    if env is None :
+        env = envelope(s, mode=mode, Nt=Nt)
     # linear to power dB
     envdB = power2dB(env**2)
     # total energy estimation. 
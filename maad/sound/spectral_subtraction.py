@@ -15,6 +15,7 @@ spectral subtraction methods
 # Import external modules
 from maad.util import (plot1d, plot2d, running_mean,
                        get_unimode, mean_dB, power2dB)
+from maad.util.miscellaneous import _min_value
 import matplotlib.pyplot as plt
 import numpy as np
 from scipy.ndimage import morphology
@@ -183,14 +184,14 @@ def remove_background(Sxx, gauss_win=50, gauss_std=25, beta1=1, beta2=1,
     noise_profile[:2] = mean_profile[:2]
 
     # Create a matrix with the noise profile
-    noise_spectro = np.kron(np.ones((Nw, 1)), noise_profile)
+    noise_spectro = np.kron(np.ones((Nw, 1), dtype=Sxx.dtype), noise_profile)
     noise_spectro = noise_spectro.transpose()
 
     # snr estimate a posteriori
     SNR_est = Sxx - noise_spectro
     # to avoid dividing by 0
     SNR_est[SNR_est <= 0] = 0
-    noise_spectro[noise_spectro == 0] = _MIN_
+    noise_spectro[noise_spectro == 0] = _min_value(noise_spectro)
     # ratio
     SNR_est = (Sxx/noise_spectro)
     # keep only positive values
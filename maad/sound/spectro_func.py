@@ -14,7 +14,10 @@ manipulate spectrograms.
 # =============================================================================
 # Import external modules
 import numpy as np
+import pandas as pd
 import scipy as sp
+from scipy import sparse
+from functools import lru_cache
 
 # Import internal modules
 from maad.util import (plot1d, plot2d, crop_image, power2dB, amplitude2dB)
@@ -40,8 +43,14 @@ def spectrogram(x, fs, window='hann', nperseg=1024, noverlap=None,
 
     Parameters
     ----------
-    x : 1d ndarray
-        Vector containing the sound waveform 
+    x : 1d ndarray or 2d ndarray
+        Vector containing the sound waveform. If x is float32 (see the 
+        parameter dtype of `sound.load`), the spectrogram is computed in 
+        single precision (complex64 or float32), which halves the memory.
+        If x is a 2d array (n_signals, n_samples) of waveforms with the same
+        length, the spectrograms of the waveforms are computed one after 
+        the other into a 3d array Sxx (n_signals, n_frequencies, n_times). 
+        Only the spectrogram of the first waveform is displayed.
     fs : int
         The sampling frequency in Hz 
     window : str or tuple or array_like, optional, default to 'hann'
@@ -114,7 +123,7 @@ def spectrogram(x, fs, window='hann', nperseg=1024, noverlap=None,
 
     Returns
     -------
-    Sxx : 2d ndarray of floats
+    Sxx : 2d ndarray of floats (3d if x is 2d)
         Spectrogram : Matrix containing K frames with N/2 frequency bins, 
         K*N <= length (wave)
         Sxx unit is power => Sxx_power if mode is 'psd'
@@ -185,6 +194,14 @@ def spectrogram(x, fs, window='hann', nperseg=1024, noverlap=None,
     >>> maad.util.power2dB(E3)
     44.93083283875093
 
+    Compute the spectrograms of a batch of waveforms with the same length
+
+    >>> import numpy as np
+    >>> x = np.stack([s[:10*fs], s[10*fs:20*fs]])
+    >>> Sxx_batch,tn,fn,_ = maad.sound.spectrogram (x, fs)
+    >>> Sxx_batch.shape
+    (2, 512, 429)
+
     """
     
     # Get the argument detrend. By default is "constant" but some reasons (ADI
@@ -195,8 +212,23 @@ def spectrogram(x, fs, window='hann', nperseg=1024, noverlap=None,
     if noverlap is None:
         noverlap = nperseg // 2
 
+    x = np.asarray(x)
+    if x.ndim == 2:
+        # batch of waveforms : the engine computes the waveforms one after 
+        # the other by chunks of frames, directly into the 3d output, which 
+        # is faster than a single STFT of the whole batch and never holds 
+        # the complex STFT of the whole batch
+        engine = SpectrogramEngine(fs, window, nperseg, noverlap, flims, mode, 
+                                   detrend)
+        Sxx_out, tn, fn, extent = engine.transform(x, tlims)
+        if display:
+            spectrogram(x[0], fs, window, nperseg, noverlap, flims, tlims, mode,
+                        display=True, savefig=savefig, detrend=detrend, 
+                        **kwargs)
+        return Sxx_out, tn, fn, extent
+
     # compute the number of frames
-    K = len(x)//(nperseg-noverlap)-1
+    K = x.shape[-1]//(nperseg-noverlap)-1
 
     # compute spectrogram
     fn, tn, Sxx_complex = sp.signal.spectrogram(x, fs, window=window,
@@ -206,46 +238,62 @@ def spectrogram(x, fs, window='hann', nperseg=1024, noverlap=None,
                                                 detrend=detrend,
                                                 scaling='density', axis=-1)
 
-    # Mutliply by the frequency resolution step (fs/nperseg) to get the power
-    # so multiply by the sqrt((fs/nperseg)) to get the amplitude
-    # Also multiply by sqrt(2) in order to compensate that only the postive frequencies are kept
-    # complex
-    Sxx_complex = Sxx_complex*np.sqrt(2*(fs/nperseg))
-    # magnitude
-    Sxx = abs(Sxx_complex)
-    # power
-    PSDxx = Sxx**2
-
-    if mode == 'complex':
-        Sxx_out = Sxx_complex
-
-    if mode == 'amplitude':
-        Sxx_out = Sxx
+    if verbose:
+        print('spectrogram dimension Nx=%d Ny=%d' %
+              (Sxx_complex.shape[-2], Sxx_complex.shape[-1]))
 
-    if mode == 'psd':
-        Sxx_out = PSDxx
+    # The following steps only select views of the complex STFT, so that the
+    # magnitude or the power is only computed on the requested portion of the
+    # spectrogram and no temporary full-size array is created.
 
     # test if the last frames are computed on a whole time frame.
     # if note => remove these frames
-    if PSDxx.shape[1] > K:
-        sup = Sxx_out.shape[1] - K
-        Sxx_out = Sxx_out[:, :-sup]
+    if Sxx_complex.shape[-1] > K:
+        sup = Sxx_complex.shape[-1] - K
+        Sxx_complex = Sxx_complex[..., :-sup]
         tn = tn[:-sup]
 
     # Remove the last frequency bin in order to obtain nperseg/2 frequency bins
     # instead of nperseg/2 + 1
-    Sxx_out = Sxx_out[:-1, :]
+    Sxx_complex = Sxx_complex[..., :-1, :]
     fn = fn[:-1]
 
-    if verbose:
-        print('spectrogram dimension Nx=%d Ny=%d' %
-              (Sxx_complex.shape[0], Sxx_complex.shape[1]))
-
     # Crop the image in order to analyzed only a portion of it
+    # tn and fn are sorted, so the selection is a contiguous slice
     if (flims or tlims) is not None:
         if verbose:
             print('Crop the spectrogram along time axis and frequency axis')
-        Sxx_out, tn, fn = crop_image(Sxx_out, tn, fn, flims, tlims)
+        if tlims is not None:
+            it0, it1 = np.searchsorted(tn, tlims[0], 'left'), np.searchsorted(tn, tlims[1], 'right')
+            Sxx_complex = Sxx_complex[..., it0:it1]
+            tn = tn[it0:it1]
+        if flims is not None:
+            if0, if1 = np.searchsorted(fn, flims[0], 'left'), np.searchsorted(fn, flims[1], 'right')
+            Sxx_complex = Sxx_complex[..., if0:if1, :]
+            fn = fn[if0:if1]
+
+    # Mutliply by the frequency resolution step (fs/nperseg) to get the power
+    # so multiply by the sqrt((fs/nperseg)) to get the amplitude
+    # Also multiply by sqrt(2) in order to compensate that only the postive frequencies are kept
+    # The scaling factor is a python float in order to keep the precision of
+    # the STFT (complex64 if x is float32)
+    Sxx_complex *= float(np.sqrt(2*(fs/nperseg)))
+
+    if mode == 'complex':
+        # copy the crop in order to release the full STFT
+        if (flims or tlims) is not None:
+            Sxx_out = Sxx_complex.copy()
+        else:
+            Sxx_out = Sxx_complex
+
+    if mode == 'amplitude':
+        # magnitude
+        Sxx_out = np.abs(Sxx_complex)
+
+    if mode == 'psd':
+        # power (the magnitude is squared in place)
+        Sxx_out = np.abs(Sxx_complex)
+        Sxx_out **= 2
 
     if verbose:
         print('max value of the spectrogram %.5f' % Sxx_out.max())
@@ -272,13 +320,15 @@ def spectrogram(x, fs, window='hann', nperseg=1024, noverlap=None,
         figsize = kwargs.pop('figsize', (4, 0.33*(extent[1]-extent[0])))
         db_range = kwargs.pop('db_range', 96)
 
+        Sxx_disp = Sxx_out
+
         # convert into dB
         if mode == 'psd':
-            Sxx_disp = power2dB(Sxx_out, db_range=db_range)
+            Sxx_disp = power2dB(Sxx_disp, db_range=db_range)
         if mode == 'amplitude':
-            Sxx_disp = amplitude2dB(Sxx_out, db_range=db_range)
+            Sxx_disp = amplitude2dB(Sxx_disp, db_range=db_range)
         if mode == 'complex':
-            Sxx_disp = amplitude2dB(Sxx_out, db_range=db_range)
+            Sxx_disp = amplitude2dB(Sxx_disp, db_range=db_range)
 
         vmin = kwargs.pop('vmin', -db_range)
         vmax = kwargs.pop('vmax', Sxx_disp.max())
@@ -302,6 +352,738 @@ def spectrogram(x, fs, window='hann', nperseg=1024, noverlap=None,
 # %%
 
 
+class SpectrogramEngine(object):
+    """
+    Reusable short-time Fourier transform with a fixed configuration.
+
+    The window, the scaling constants, the frequency vector and the frequency
+    cropping are computed once when the engine is created. The method
+    `transform` can then be called on many audio signals sharing the same
+    sampling frequency and returns exactly what `sound.spectrogram` returns
+    with the same parameters (partial frames trimmed, last frequency bin
+    dropped, same scaling).
+
+    The frames are processed by chunks that are directly written into the
+    output, so that the full complex STFT is never stored when the output is
+    the power or the amplitude spectrogram.
+
+    Parameters
+    ----------
+    fs : int
+        The sampling frequency in Hz 
+    window : str or tuple or array_like, optional, default to 'hann'
+        Desired window to use. See `sound.spectrogram`.
+    nperseg : int, optional. Defaults to 1024.
+        Length of the segment used to compute the FFT. No zero padding. 
+    noverlap : int, optional. Defaults to None.
+        Number of points to overlap between segments. 
+        If None, noverlap = nperseg // 2. 
+    flims : list of 2 scalars [min, max], optional, default is None
+        flims corresponds to the min and max boundary frequency values
+    mode : str, optional. Default is 'psd'
+        Choose the output between 
+        - 'psd' : Power Spectral Density 
+        - 'amplitude' : module of the stft (sqrt(psd))
+        - 'complex' : real and imaginary part of the stft  
+    detrend : str or function or False, optional, default is 'constant'
+        Specifies how to detrend each segment (see scipy.signal.spectrogram)
+    workers : int, optional, default is None
+        Maximum number of workers to use for the parallel computation of the 
+        FFT (see scipy.fft.rfft). If negative, the value wraps around from 
+        os.cpu_count().
+    chunksize : int, optional, default is 1024
+        Number of frames processed at once. The waveforms of a batch are 
+        processed one after the other. 
+
+    See Also
+    --------
+    spectrogram
+
+    Examples
+    --------
+    >>> engine = maad.sound.SpectrogramEngine(fs=44100, nperseg=1024, workers=-1)
+    >>> s, fs = maad.sound.load('../data/spinetail.wav')
+    >>> Sxx_power, tn, fn, ext = engine.transform(s)
+
+    The output is the same as the function `sound.spectrogram`
+
+    >>> Sxx_power_ref, _, _, _ = maad.sound.spectrogram(s, fs, nperseg=1024)
+    >>> import numpy as np
+    >>> np.array_equal(Sxx_power, Sxx_power_ref)
+    True
+    """
+
+    def __init__(self, fs, window='hann', nperseg=1024, noverlap=None,
+                 flims=None, mode='psd', detrend='constant', workers=None,
+                 chunksize=1024):
+
+        if mode not in ('psd', 'amplitude', 'complex'):
+            raise ValueError("mode should be 'psd', 'amplitude' or 'complex'")
+
+        # Test if noverlap is None. By default, noverlap is half the length of the fft
+        if noverlap is None:
+            noverlap = nperseg // 2
+
+        self.fs = fs
+        self.nperseg = nperseg
+        self.noverlap = noverlap
+        self.step = nperseg - noverlap
+        self.mode = mode
+        self.workers = workers
+        self.chunksize = chunksize
+        self.flims = flims
+
+        # Detrending function of each frame
+        if not detrend:
+            self._detrend = lambda d: d
+        elif callable(detrend):
+            self._detrend = detrend
+        else:
+            self._detrend = lambda d: sp.signal.detrend(d, type=detrend, axis=-1)
+
+        # Window
+        if isinstance(window, str) or isinstance(window, tuple):
+            self.window = sp.signal.get_window(window, nperseg)
+        else:
+            self.window = np.asarray(window)
+            if self.window.shape != (nperseg,):
+                raise ValueError('window must have length of nperseg')
+
+        # Frequency vector without the last frequency bin and frequency crop
+        fn = sp.fft.rfftfreq(nperseg, 1/fs)[:-1]
+        if flims is not None:
+            if0, if1 = np.searchsorted(fn, flims[0], 'left'), np.searchsorted(fn, flims[1], 'right')
+        else:
+            if0, if1 = 0, len(fn)
+        self.fn = fn[if0:if1]
+        self._fslice = slice(if0, if1)
+
+        # Mutliply by the frequency resolution step (fs/nperseg) to get the power
+        # so multiply by the sqrt((fs/nperseg)) to get the amplitude
+        # Also multiply by sqrt(2) in order to compensate that only the postive frequencies are kept
+        self._gain = float(np.sqrt(2*(fs/nperseg)))
+
+        # window and density scaling per precision (float32 or float64)
+        self._layout = {}
+
+    def _get_layout(self, dtype):
+        """
+        Window and scaling for the precision of the input, as computed by 
+        scipy.signal.spectrogram.
+        """
+        if dtype not in self._layout:
+            outdtype = np.result_type(dtype, np.complex64)
+            win = self.window
+            if np.result_type(win, np.complex64) != outdtype:
+                win = win.astype(outdtype)
+            scale = np.sqrt(1.0 / (self.fs * (win*win).sum()))
+            self._layout[dtype] = (win, scale, outdtype)
+        return self._layout[dtype]
+
+    def _frames(self, x, nt):
+        """
+        Strided view of the nt first frames of x.
+        """
+        return np.lib.stride_tricks.as_strided(
+            x, shape=x.shape[:-1]+(nt, self.nperseg),
+            strides=x.strides[:-1]+(self.step*x.strides[-1], x.strides[-1]),
+            writeable=False)
+
+    def _empty(self, shape, dtype):
+        """
+        Allocate the output spectrogram for a waveform of type dtype.
+        """
+        _, _, outdtype = self._get_layout(dtype)
+        if self.mode == 'complex':
+            return np.empty(shape, dtype=outdtype)
+        else:
+            return np.empty(shape, dtype=np.finfo(outdtype).dtype)
+
+    def _stft(self, frames, Sxx_out):
+        """
+        Compute the spectrogram of the frames (..., n_times, nperseg) into 
+        Sxx_out (..., n_frequencies, n_times) by chunks of frames.
+        """
+        if frames.ndim > 2:
+            # batch of waveforms : one waveform after the other, which is 
+            # faster than chunks spread over all the waveforms
+            for idx in np.ndindex(frames.shape[:-2]):
+                self._stft(frames[idx], Sxx_out[idx])
+            return
+        win, scale, outdtype = self._get_layout(frames.dtype)
+        nt = frames.shape[-2]
+        nchunk = self.chunksize
+        for i0 in range(0, nt, nchunk):
+            i1 = min(i0 + nchunk, nt)
+            # detrend and window each frame
+            X = self._detrend(frames[..., i0:i1, :])
+            X = win * X
+            X = X.real
+            X = sp.fft.rfft(X, n=self.nperseg, workers=self.workers)
+            X *= scale
+            # frequency on the vertical axis, without the last frequency bin
+            X = np.swapaxes(X.astype(outdtype, copy=False), -1, -2)
+            X = X[..., self._fslice, :]
+            X *= self._gain
+            out = Sxx_out[..., i0:i1]
+            if self.mode == 'complex':
+                out[...] = X
+            elif self.mode == 'amplitude':
+                np.abs(X, out=out)
+            else:
+                np.abs(X, out=out)
+                out **= 2
+
+    def transform(self, x, tlims=None):
+        """
+        Compute the spectrogram of an audio signal.
+
+        Parameters
+        ----------
+        x : 1d ndarray or 2d ndarray
+            Vector containing the sound waveform. Its sampling frequency must
+            be the sampling frequency of the engine. If x is a 2d array 
+            (n_signals, n_samples), the spectrograms of all the waveforms are 
+            computed at once and Sxx is a 3d array.
+        tlims : list of 2 scalars [min, max], optional, default is None
+            tlims corresponds to the min and max boundary time values. Only 
+            the frames within tlims are computed.
+
+        Returns
+        -------
+        Sxx : 2d ndarray of floats (3d if x is 2d)
+            Spectrogram (see `sound.spectrogram`)
+        tn : 1d ndarray of floats
+            time vector (horizontal x-axis)    
+        fn : 1d ndarray of floats
+            Frequency vector (vertical y-axis)    
+        extent : list of scalars [left, right, bottom, top]
+            The location, in data-coordinates, of the lower-left and
+            upper-right corners. 
+        """
+        x = np.asarray(x)
+        if not np.issubdtype(x.dtype, np.floating):
+            x = x.astype(np.float64)
+
+        # number of frames computed by scipy and number of whole frames
+        nx = x.shape[-1]
+        nt = max((nx-self.noverlap)//self.step, 0)
+        K = nx//self.step-1
+        if nt > K:
+            nt = max(K, 0)
+        tn = np.arange(self.nperseg/2, nx - self.nperseg/2 + 1,
+                       self.step)/float(self.fs)
+        tn = tn[:nt]
+
+        # select the frames within tlims
+        it0, it1 = 0, nt
+        if tlims is not None:
+            it0, it1 = np.searchsorted(tn, tlims[0], 'left'), np.searchsorted(tn, tlims[1], 'right')
+            tn = tn[it0:it1]
+
+        Sxx_out = self._empty(x.shape[:-1]+(len(self.fn), len(tn)), x.dtype)
+        self._stft(self._frames(x, nt)[..., it0:it1, :], Sxx_out)
+
+        # Extent
+        extent = [tn[0], tn[-1], self.fn[0], self.fn[-1]]
+
+        return Sxx_out, tn, self.fn, extent
+
+# %%
+
+
+class StreamingSpectrogram(object):
+    """
+    Incremental spectrogram of an audio signal received block by block.
+
+    Consecutive blocks of the waveform (for example from `sound.iter_blocks`
+    without overlap) are pushed with `update`, which returns the spectrogram
+    columns of all the frames that are complete. The samples of the last 
+    incomplete frame are kept internally and are used with the next block.
+    Once the last block has been pushed, `flush` returns the remaining 
+    column. 
+
+    The concatenation of the outputs of `update` and `flush` is exactly the 
+    spectrogram computed by `sound.spectrogram` on the whole waveform, 
+    with constant memory whatever the duration of the recording.
+
+    Parameters
+    ----------
+    fs : int
+        The sampling frequency in Hz 
+    window : str or tuple or array_like, optional, default to 'hann'
+        Desired window to use. See `sound.spectrogram`.
+    nperseg : int, optional. Defaults to 1024.
+        Length of the segment used to compute the FFT. No zero padding. 
+    noverlap : int, optional. Defaults to None.
+        Number of points to overlap between segments. 
+        If None, noverlap = nperseg // 2. 
+    flims : list of 2 scalars [min, max], optional, default is None
+        flims corresponds to the min and max boundary frequency values
+    mode : str, optional. Default is 'psd'
+        Choose the output between 'psd', 'amplitude' and 'complex'.
+        See `sound.spectrogram`.
+    detrend : str or function or False, optional, default is 'constant'
+        Specifies how to detrend each segment (see scipy.signal.spectrogram)
+    workers : int, optional, default is None
+        Maximum number of workers to use for the parallel computation of the 
+        FFT (see scipy.fft.rfft).
+
+    Attributes
+    ----------
+    fn : 1d ndarray of floats
+        Frequency vector (vertical y-axis)    
+
+    See Also
+    --------
+    spectrogram, SpectrogramEngine, iter_blocks
+
+    Notes
+    -----
+    The last complete frame is only returned by the next call to `update` 
+    or by `flush`, because `sound.spectrogram` drops it for some signal
+    lengths. The output is therefore delayed by one frame.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> stream = maad.sound.StreamingSpectrogram(fs=44100, nperseg=1024)
+    >>> Sxx_list = []
+    >>> for s_block, _ in maad.sound.iter_blocks('../data/spinetail.wav', block_duration=5):
+    ...     Sxx_block, tn_block = stream.update(s_block)
+    ...     Sxx_list.append(Sxx_block)
+    >>> Sxx_block, tn_block = stream.flush()
+    >>> Sxx_list.append(Sxx_block)
+    >>> Sxx_power = np.concatenate(Sxx_list, axis=1)
+
+    The output is the same as the function `sound.spectrogram`
+
+    >>> s, fs = maad.sound.load('../data/spinetail.wav', detrend=False)
+    >>> Sxx_power_ref, _, _, _ = maad.sound.spectrogram(s, fs, nperseg=1024)
+    >>> np.array_equal(Sxx_power, Sxx_power_ref)
+    True
+    """
+
+    def __init__(self, fs, window='hann', nperseg=1024, noverlap=None,
+                 flims=None, mode='psd', detrend='constant', workers=None):
+        self._engine = SpectrogramEngine(fs, window=window, nperseg=nperseg,
+                                         noverlap=noverlap, flims=flims,
+                                         mode=mode, detrend=detrend,
+                                         workers=workers)
+        self.fs = fs
+        self.fn = self._engine.fn
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the previous blocks in order to process a new recording.
+        """
+        # samples that do not belong to a complete frame yet
+        self._tail = None
+        # total number of samples received
+        self._nsamples = 0
+        # number of columns already returned
+        self._ncols = 0
+        # last complete frame, not returned yet
+        self._last = None
+
+    def _times(self, ncols):
+        """
+        Time vector of the next ncols columns.
+        """
+        step = self._engine.step
+        i = np.arange(self._ncols, self._ncols + ncols)
+        return (self._engine.nperseg/2 + i*step)/float(self.fs)
+
+    def update(self, x):
+        """
+        Push the next block of the waveform.
+
+        Parameters
+        ----------
+        x : 1d ndarray
+            Next block of the sound waveform
+
+        Returns
+        -------
+        Sxx : 2d ndarray of floats
+            Spectrogram columns of the frames completed by the block. The 
+            number of columns may be 0.
+        tn : 1d ndarray of floats
+            time vector of the columns, from the beginning of the recording
+        """
+        x = np.asarray(x)
+        if not np.issubdtype(x.dtype, np.floating):
+            x = x.astype(np.float64)
+        self._nsamples += len(x)
+
+        # prepend the samples kept from the previous blocks
+        if self._tail is not None:
+            x = np.concatenate((self._tail, x))
+
+        # number of complete frames
+        step, noverlap = self._engine.step, self._engine.noverlap
+        nt = max((len(x)-noverlap)//step, 0)
+
+        # the previous last frame is returned first
+        nlast = 0 if self._last is None else 1
+        Sxx = self._engine._empty((len(self.fn), nlast+nt), x.dtype)
+        if nlast:
+            Sxx[:, :1] = self._last
+        self._engine._stft(self._engine._frames(x, nt), Sxx[:, nlast:])
+
+        # keep the samples of the incomplete frame
+        self._tail = x[nt*step:].copy()
+
+        # keep the last complete frame
+        if Sxx.shape[1] > 0:
+            self._last = Sxx[:, -1:].copy()
+            Sxx = Sxx[:, :-1]
+
+        tn = self._times(Sxx.shape[1])
+        self._ncols += Sxx.shape[1]
+
+        return Sxx, tn
+
+    def flush(self):
+        """
+        Return the last column once all the blocks have been pushed, and 
+        reset the internal state.
+
+        Returns
+        -------
+        Sxx : 2d ndarray of floats
+            Last spectrogram column (if any, according to the trimming of 
+            `sound.spectrogram`)
+        tn : 1d ndarray of floats
+            time vector of the column
+        """
+        # number of columns returned by sound.spectrogram
+        K = self._nsamples//self._engine.step - 1
+        if (self._last is not None) and (self._ncols < K):
+            Sxx = self._last
+        elif self._last is not None:
+            Sxx = self._last[:, :0]
+        else:
+            Sxx = self._engine._empty((len(self.fn), 0), np.float64)
+        tn = self._times(Sxx.shape[1])
+        self.reset()
+        return Sxx, tn
+
+# %%
+
+
+class LongTermSpectrogram(object):
+    """
+    Long term average of spectra on a grid day x time of the day.
+
+    Spectra (e.g. the output of `sound.avg_power_spectro` for each audio 
+    file, or the columns of a spectrogram) are pushed with `update` with 
+    their date. Each spectrum falls into a cell of the grid, defined by the 
+    calendar day and the time slot of the day (of duration dt), where the
+    running mean and the number of spectra are updated. The memory does not
+    depend on the number of spectra but only on the number of days with 
+    spectra : the grid of a day is allocated when its first spectrum is 
+    pushed.
+
+    Accumulators built separately (e.g. by different processes on different 
+    parts of the recordings) can be combined with `merge`, and saved to the 
+    disk with `save` and `load`.
+
+    Parameters
+    ----------
+    fn : 1d ndarray of floats
+        Frequency vector of the spectra
+    dt : int, optional, default is 900
+        Duration in seconds of the time slots of the day. 86400 must be a 
+        multiple of dt.
+    dtype : {np.float64, np.float32}, optional, default is np.float64
+        Type of the mean spectra. float32 halves the memory.
+
+    Attributes
+    ----------
+    fn : 1d ndarray of floats
+        Frequency vector
+    dt : int
+        Duration of the time slots in seconds
+    time_of_day : 1d ndarray of floats
+        Beginning of the time slots in hours
+    days : pandas DatetimeIndex
+        Days with at least one spectrum, sorted (n_days)
+    count : 2d ndarray of ints
+        Number of spectra in each cell (n_days, n_slots)
+    mean : 3d ndarray of floats
+        Mean spectrum in each cell (n_frequencies, n_days, n_slots). NaN if
+        the cell is empty.
+
+    See Also
+    --------
+    avg_power_spectro, spectrogram, StreamingSpectrogram
+
+    Notes
+    -----
+    The mean is updated with the formula of Chan et al. for the combination
+    of two means, which is numerically stable. 
+    
+    Each day takes 86400/dt x n_frequencies values : for 512 frequencies 
+    and dt=60, 5.9 MB per day in float64 and 2.9 MB in float32 (0.4 MB and 
+    0.2 MB with dt=900).
+
+    The days are the calendar days of the dates (local time for dates with
+    a time zone) : the spectra of different years or of 29 February are 
+    kept in their own days.
+
+    Examples
+    --------
+    >>> df = maad.util.date_parser("../data/indices/", dateformat='SM4')
+    >>> lts = None
+    >>> for date, filename in zip(df.index, df.file):
+    ...     s, fs = maad.sound.load(filename)
+    ...     Sxx_power, tn, fn, _ = maad.sound.spectrogram(s, fs)
+    ...     if lts is None:
+    ...         lts = maad.sound.LongTermSpectrogram(fn, dt=900)
+    ...     lts.update(Sxx_power, date)
+    >>> lts.circadian().shape
+    (512, 96)
+
+    Display the circadian spectrogram
+
+    >>> S_dB = maad.util.power2dB(lts.circadian())
+    >>> ext = [0, 24, fn[0], fn[-1]]
+    >>> fig, ax = maad.util.plot2d(S_dB, extent=ext, xlabel='Time of day (h)')
+    """
+
+    def __init__(self, fn, dt=900, dtype=np.float64):
+        if 86400 % dt != 0:
+            raise ValueError('86400 must be a multiple of dt')
+        self.fn = np.asarray(fn)
+        self.dt = int(dt)
+        self.dtype = np.dtype(dtype)
+        self.n_slots = 86400 // self.dt
+        self.time_of_day = np.arange(self.n_slots) * self.dt / 3600
+        # {day (days since 1970-01-01) : (mean (n_slots, nf), count (n_slots))}
+        self._days = {}
+
+    @property
+    def days(self):
+        return pd.DatetimeIndex(np.array(sorted(self._days), 
+                                         dtype='datetime64[D]'))
+
+    @property
+    def count(self):
+        count = [self._days[day][1] for day in sorted(self._days)]
+        return np.stack(count) if len(count) > 0 else \
+               np.zeros((0, self.n_slots), dtype=np.int64)
+
+    @property
+    def mean(self):
+        if len(self._days) == 0:
+            return np.zeros((len(self.fn), 0, self.n_slots), dtype=self.dtype)
+        mean = np.stack([self._days[day][0] for day in sorted(self._days)])
+        mean[self.count == 0] = np.nan
+        return mean.transpose(2, 0, 1)
+
+    def _cells(self, dates):
+        """
+        Index of the cells (day, slot) of the dates, day being the number of
+        days since 1970-01-01.
+        """
+        dates = pd.DatetimeIndex(dates)
+        if dates.tz is not None:
+            # local time
+            dates = dates.tz_localize(None)
+        seconds = dates.hour*3600 + dates.minute*60 + dates.second
+        day = np.asarray(dates.values.astype('datetime64[D]'), dtype=np.int64)
+        slot = np.asarray(seconds) // self.dt
+        return day * self.n_slots + slot
+
+    def _merge_cells(self, cells, mean, count):
+        """
+        Combine the means and counts of distinct sorted cells with the grid.
+        """
+        days = cells // self.n_slots
+        slots = cells % self.n_slots
+        # the cells of each day are contiguous
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        for sel in np.split(np.arange(len(cells)), bounds):
+            day = int(days[sel[0]])
+            if day not in self._days:
+                self._days[day] = (np.zeros((self.n_slots, len(self.fn)), 
+                                            dtype=self.dtype),
+                                   np.zeros(self.n_slots, dtype=np.int64))
+            day_mean, day_count = self._days[day]
+            s = slots[sel]
+            n = day_count[s] + count[sel]
+            w = (count[sel] / n)[:, np.newaxis]
+            day_mean[s] += (mean[sel] - day_mean[s]) * w
+            day_count[s] = n
+
+    def update(self, S, date, tn=None):
+        """
+        Push spectra with their date.
+
+        Parameters
+        ----------
+        S : 1d or 2d ndarray of floats
+            Spectrum (n_frequencies) or spectrogram (n_frequencies, n_times)
+        date : datetime, pandas Timestamp, string or array_like
+            Date of the spectrum. If S is a spectrogram and tn is None, 
+            date can be the dates of each column (n_times). Otherwise, 
+            the spectrogram is averaged with `avg_power_spectro` and the mean
+            spectrum is pushed at this date.
+        tn : 1d ndarray of floats, optional, default is None
+            Time vector of the spectrogram in seconds from date. If given, 
+            each column of S is pushed at date + tn.
+
+        Returns
+        -------
+        self : LongTermSpectrogram
+        """
+        S = np.asarray(S)
+        if S.ndim == 1:
+            S = S[:, np.newaxis]
+            dates = [pd.Timestamp(date)]
+        elif tn is not None:
+            dates = pd.Timestamp(date) + pd.to_timedelta(np.asarray(tn), 
+                                                         unit='s')
+        elif np.ndim(date) == 0:
+            S = avg_power_spectro(S)[:, np.newaxis]
+            dates = [pd.Timestamp(date)]
+        else:
+            dates = date
+        cells = self._cells(dates)
+
+        if S.shape[0] != len(self.fn):
+            raise ValueError('S must have {} frequencies'.format(len(self.fn)))
+        if S.shape[1] != len(cells):
+            raise ValueError('S and the dates must have the same length')
+
+        # mean of the spectra of each cell, then combination with the grid
+        cells, inv = np.unique(cells, return_inverse=True)
+        count = np.bincount(inv.ravel(), minlength=len(cells))
+        mean = np.zeros((len(cells), len(self.fn)))
+        np.add.at(mean, inv.ravel(), S.T)
+        mean /= count[:, np.newaxis]
+        self._merge_cells(cells, mean, count)
+
+        return self
+
+    def merge(self, other):
+        """
+        Combine with another accumulator (same frequencies and dt), as if 
+        all its spectra had been pushed into this accumulator.
+
+        Parameters
+        ----------
+        other : LongTermSpectrogram
+
+        Returns
+        -------
+        self : LongTermSpectrogram
+        """
+        if (other.dt != self.dt) or not np.array_equal(other.fn, self.fn):
+            raise ValueError('The accumulators must have the same fn and dt')
+        for day in sorted(other._days):
+            mean, count = other._days[day]
+            slots = np.flatnonzero(count)
+            self._merge_cells(day * self.n_slots + slots, mean[slots], 
+                              count[slots])
+        return self
+
+    def circadian(self):
+        """
+        Mean spectrum of each time slot of the day over all the days, 
+        weighted by the number of spectra of each day.
+
+        Returns
+        -------
+        S : 2d ndarray of floats
+            Circadian spectrogram (n_frequencies, n_slots). NaN if a slot is 
+            empty.
+        """
+        S = np.zeros((len(self.fn), self.n_slots))
+        total = np.zeros(self.n_slots, dtype=np.int64)
+        for mean, count in self._days.values():
+            S += (mean * count[:, np.newaxis]).T
+            total += count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            S /= total
+        return S
+
+    def save(self, path):
+        """
+        Save the accumulator into a .npz file.
+
+        Parameters
+        ----------
+        path : string
+            Path of the file
+        """
+        days = sorted(self._days)
+        mean = np.zeros((len(days), self.n_slots, len(self.fn)), 
+                        dtype=self.dtype)
+        for ii, day in enumerate(days):
+            mean[ii] = self._days[day][0]
+        np.savez(path, days=np.array(days, dtype=np.int64), mean=mean, 
+                 count=self.count, fn=self.fn, dt=self.dt)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an accumulator saved with `save`.
+
+        Parameters
+        ----------
+        path : string
+            Path of the .npz file
+
+        Returns
+        -------
+        lts : LongTermSpectrogram
+        """
+        with np.load(path) as data:
+            lts = cls(data['fn'], dt=int(data['dt']), dtype=data['mean'].dtype)
+            for day, mean, count in zip(data['days'], data['mean'], 
+                                        data['count']):
+                lts._days[int(day)] = (mean.copy(), count.copy())
+        return lts
+
+# %%
+
+
+@lru_cache(maxsize=32)
+def _octave_band_matrix(fn_bytes, fn_dtype, thirdOctave):
+    """
+    Sparse matrix (n_bands, n_frequencies) that sums the frequency bins of 
+    each octave or 1/3 octave band. The matrix is cached for each frequency 
+    vector (given as bytes in order to be hashable).
+    """
+    fn = np.frombuffer(fn_bytes, dtype=fn_dtype)
+
+    # define the third octave or octave frequency vector in Hz.
+    if thirdOctave:
+        bin_octave = np.array([16, 20, 25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315,
+                               400, 500, 630, 800, 1000, 1250, 1600, 2000, 2500, 3150, 4000,
+                               5000, 6300, 8000, 10000, 12500, 16000, 20000])  # third octave band.
+    else:
+        bin_octave = np.array(
+            [16, 31, 63, 125, 250, 500, 1000, 2000, 4000, 8000, 16000])  # octave
+
+    # get the corresponding octave from fn
+    bin_octave = bin_octave[(bin_octave >= np.min(fn))
+                            & (bin_octave <= np.max(fn))]
+
+    # Bins limit
+    bin_octave_low = bin_octave/(2**0.1666666)
+    bin_octave_up = bin_octave*(2**0.1666666)
+
+    # select the indices corresponding to the frequency bins range
+    ind = ((fn[np.newaxis, :] >= bin_octave_low[:, np.newaxis]) &
+           (fn[np.newaxis, :] <= bin_octave_up[:, np.newaxis]))
+    band_matrix = sparse.csr_matrix(ind, dtype=np.float64)
+
+    return band_matrix, bin_octave
+
 def linear_to_octave(X, fn, thirdOctave=True, display=False, **kwargs):
     """
     Transform a linear spectrum (1d) or Spectrogram (2d into octave or 1/3 octave
@@ -309,10 +1091,15 @@ def linear_to_octave(X, fn, thirdOctave=True, display=False, **kwargs):
 
     Our advice is to work with PSD (amplitude²) for energy conservation.
 
+    The frequency bins of each band are summed with a sparse matrix product.
+    The matrix is computed once for each frequency vector and is cached, 
+    which is fast when the function is called on many files.
+
     Parameters
     ----------
     X : ndarray of floats
-        Linear spectrum (1d) or Spectrogram (2d). 
+        Linear spectrum (1d) or Spectrogram (2d) or batch of spectrograms 
+        (3d, as returned by `sound.spectrogram` with a batch of waveforms). 
         Work with PSD to be consistent with energy conservation
     fn : 1d ndarray of floats
         Frequency vector of the linear spectrum/spectrogram
@@ -325,7 +1112,8 @@ def linear_to_octave(X, fn, thirdOctave=True, display=False, **kwargs):
     Returns
     -------
     X_octave : ndarray of floats
-        Octave or 1/3 octave Spectrum (1d) or Spectrogram (2d)
+        Octave or 1/3 octave Spectrum (1d) or Spectrogram (2d) or batch of 
+        spectrograms (3d)
     bin_octave : vector of floats
         New frequency vector (octave or 1/3 octave frequency repartition)
 
@@ -336,30 +1124,25 @@ def linear_to_octave(X, fn, thirdOctave=True, display=False, **kwargs):
     >>> maad.sound.linear_to_octave(Sxx_power, fn, display=True, extent=ext, vmin=-50)
     """
 
-    # define the third octave or octave frequency vector in Hz.
-    if thirdOctave:
-        bin_octave = np.array([16, 20, 25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315,
-                               400, 500, 630, 800, 1000, 1250, 1600, 2000, 2500, 3150, 4000,
-                               5000, 6300, 8000, 10000, 12500, 16000, 20000])  # third octave band.
-    else:
-        bin_octave = np.array(
-            [16, 31, 63, 125, 250, 500, 1000, 2000, 4000, 8000, 16000])  # octave
-
-    # get the corresponding octave from fn
-    bin_octave = bin_octave[(bin_octave >= np.min(fn))
-                            & (bin_octave <= np.max(fn))]
-
-    # Bins limit
-    bin_octave_low = bin_octave/(2**0.1666666)
-    bin_octave_up = bin_octave*(2**0.1666666)
+    X = np.asarray(X)
+    fn = np.asarray(fn)
 
-    # select the indices corresponding to the frequency bins range
-    X_octave = []
-    for ii in np.arange(len(bin_octave)):
-        ind = (fn >= bin_octave_low[ii]) & (fn <= bin_octave_up[ii])
-        X_octave.append(np.sum(X[ind, ], axis=0))
+    # get the sparse aggregation matrix from the cache
+    band_matrix, bin_octave = _octave_band_matrix(fn.tobytes(), fn.dtype.str,
+                                                  thirdOctave)
+    bin_octave = bin_octave.copy()
+    if np.issubdtype(X.dtype, np.floating):
+        band_matrix = band_matrix.astype(X.dtype, copy=False)
 
-    X_octave = np.asarray(X_octave)
+    # sum the frequency bins of each band with a single matrix product
+    if X.ndim <= 2:
+        X_octave = band_matrix @ X
+    else:
+        # batch of spectrograms (n, nf, nt) => frequency on the first axis
+        Xf = np.moveaxis(X, -2, 0)
+        X_octave = band_matrix @ Xf.reshape(Xf.shape[0], -1)
+        X_octave = X_octave.reshape((-1,)+Xf.shape[1:])
+        X_octave = np.moveaxis(X_octave, 0, -2)
 
     if display:
         X_octave_dB = power2dB(X_octave)
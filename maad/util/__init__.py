@@ -38,6 +38,7 @@ Mathematical
     kurtosis
     skewness
     moments
+    MomentsAccumulator
 
 Parser
 ------
@@ -50,6 +51,15 @@ Parser
     write_raven_annot
     date_parser
 
+Per bin indices
+---------------
+.. autosummary::
+    :toctree: generated/
+    
+    PerBinIndices
+    write_per_bin_indices
+    read_per_bin_indices
+
 Miscellaneous
 -------------
 .. autosummary::
@@ -134,7 +144,8 @@ from .math_func import (running_mean,
                          rms,
                          kurtosis,
                          skewness,
-                         moments)                     
+                         moments,
+                         MomentsAccumulator)                     
 
 from .parser import (read_audacity_annot,
                      write_audacity_annot,
@@ -142,6 +153,10 @@ from .parser import (read_audacity_annot,
                      write_raven_annot,
                      date_parser)
 
+from .per_bin_indices import (PerBinIndices,
+                              write_per_bin_indices,
+                              read_per_bin_indices)
+
 from .xeno_canto import (xc_query,
                          xc_multi_query,
                          xc_selection,
@@ -198,12 +213,17 @@ __all__ = [
            'kurtosis',
            'skewness',
            'moments',
+           'MomentsAccumulator',
            # parser
            'read_audacity_annot',
            'write_audacity_annot',
            'read_raven_annot',
            'write_raven_annot',
            'date_parser',
+           # per_bin_indices
+           'PerBinIndices',
+           'write_per_bin_indices',
+           'read_per_bin_indices',
            # xeno_canto
            'xc_query',
            'xc_multi_query',
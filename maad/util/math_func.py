@@ -24,7 +24,83 @@ _MIN_ = sys.float_info.min
 
 # Import internal modules
 from maad.util import linear_scale
+from maad.util.miscellaneous import _min_value
 
+#%%
+# =============================================================================
+# private functions
+# =============================================================================
+
+def _ale_mode(X, N, N_bins):
+    """
+    Histogram mode of each row of a 2d array (get_unimode with mode='ale').
+    
+    The histograms of all the rows are computed at once : the values are 
+    converted into bin indices exactly as numpy.histogram does (with the 
+    range (min, max) of each row), then the indices are offset by row and 
+    counted with a single bincount. The histograms are smoothed together 
+    along the bins, so the result is identical to numpy.histogram and 
+    running_mean applied row by row.
+    """
+    n_rows = X.shape[0]
+    
+    # Min and Max of each row (without taking into account nan)
+    first_edge = np.nanmin(X, axis=1)
+    last_edge = np.nanmax(X, axis=1)
+    if not (np.isfinite(first_edge).all() and np.isfinite(last_edge).all()):
+        raise ValueError('the range of the values of each row must be finite')
+    
+    # type of the bin edges and of the bin indices computation
+    if np.issubdtype(X.dtype, np.floating):
+        bin_type = X.dtype
+    else:
+        bin_type = np.dtype(np.float64)
+    first_edge = first_edge.astype(bin_type)
+    last_edge = last_edge.astype(bin_type)
+    # expand empty range to avoid divide by zero
+    empty = first_edge == last_edge
+    first_edge[empty] -= 0.5
+    last_edge[empty] += 0.5
+    
+    # bin edges of each row (computed in float64 as for a single row)
+    bin_edges = np.linspace(first_edge.astype(np.float64), 
+                            last_edge.astype(np.float64), 
+                            N_bins+1, axis=1).astype(bin_type).ravel()
+    # offset of each row in the flattened bin edges
+    offset = np.arange(0, n_rows*(N_bins+1), N_bins+1)[:, np.newaxis]
+    
+    # bin index of each value
+    X = X.astype(bin_type, copy=False)
+    f_indices = X - first_edge[:, np.newaxis]
+    f_indices /= (last_edge - first_edge)[:, np.newaxis]
+    f_indices *= N_bins
+    keep = ~np.isnan(X)
+    has_nan = not keep.all()
+    if has_nan:
+        f_indices[~keep] = 0
+    indices = f_indices.astype(np.intp)
+    indices[indices == N_bins] -= 1
+    indices += offset
+    # consistent results within ~1 ULP of the bin edges
+    indices[X < bin_edges.take(indices)] -= 1
+    increment = X >= bin_edges.take(indices + 1)
+    increment &= (indices != offset + N_bins - 1)
+    indices[increment] += 1
+    
+    # histogram of each row with a single bincount (the offset of the bins
+    # of each row are n_rows*(N_bins+1), the last edge of each row is unused)
+    if has_nan:
+        indices = indices[keep]
+    hist = np.bincount(indices.ravel(), minlength=n_rows*(N_bins+1))
+    hist = hist.astype(np.intp).reshape(n_rows, N_bins+1)[:, :-1]
+    
+    # smooth the histograms by running mean
+    hist_smooth = uniform_filter1d(hist, size=N, axis=1, mode="nearest")
+    
+    # the mode is the left edge of the bin of the maximum of the histogram
+    imax = np.argmax(hist_smooth, axis=1)
+    
+    return bin_edges[offset[:, 0] + imax]
 
 #%%
 # =============================================================================
@@ -156,46 +232,15 @@ def get_unimode (X, mode ='median', axis=1, N=7, N_bins=100, verbose=False):
         axis = 0
         
     if mode=='ale':
-                
+        # the histograms are computed by blocks of rows to limit the memory
         if X.ndim ==2:
-            unimode_value = []
-            for i, x in enumerate(X):  
-                # Min and Max of the envelope (without taking into account nan)
-                x_min = np.nanmin(x)
-                x_max = np.nanmax(x)
-                # Compute a 50-bin histogram ranging between Min and Max values
-                hist, bin_edges = np.histogram(x, bins=N_bins, range=(x_min, x_max))
-                
-                # smooth the histogram by running mean
-                hist_smooth = running_mean(hist, N, mode="nearest")
-                    
-                # find the maximum of the peak with quadratic interpolation
-                # don't take into account the first 4 bins.
-                imax = np.argmax(hist_smooth) 
-               
-                unimode_value.append(bin_edges[imax])
-                
-            # transpose the vector
-            unimode_value = np.asarray(unimode_value)
-            unimode_value = unimode_value.transpose()
+            n_rows = max(2**18 // max(X.shape[1], 1), 1)
+            unimode_value = np.concatenate(
+                [_ale_mode(X[i:i+n_rows], N, N_bins) 
+                 for i in range(0, X.shape[0], n_rows)])
         else:
-            x = X
-            # Min and Max of the envelope (without taking into account nan)
-            x_min = np.nanmin(x)
-            x_max = np.nanmax(x)
-            
-            # Compute a 50-bin histogram ranging between Min and Max values
-            hist, bin_edges = np.histogram(x, bins=N_bins, range=(x_min, x_max))
-            
-            # smooth the histogram by running mean
-            hist_smooth = running_mean(hist, N, mode="nearest")
-                                                 
-            # find the maximum of the peak with quadratic interpolation
-            imax = np.argmax(hist_smooth)
-                        
             # assuming an additive noise model : noise_bckg is the max of the histogram
-            # as it is an histogram, the value is unimode_value = bin_edges_interp[np.argmax(hist_interp)]
-            unimode_value = bin_edges[imax]
+            unimode_value = _ale_mode(X[np.newaxis, :], N, N_bins)[0]
 
     elif mode=='median':
         unimode_value = median(X, axis=axis)
@@ -382,6 +427,182 @@ def moments (X, axis=None):
     
     return mean(X, axis), var(X, axis), skewness(X, axis), kurtosis(X, axis)
 
+#%%
+class MomentsAccumulator(object):
+    """
+    Computes the first 4th moments (mean, variance, skewness, kurtosis) of a
+    signal or a spectrogram received chunk by chunk.
+    
+    The chunks are pushed with `update` and the moments are returned by 
+    `moments`, with the same definitions as `util.moments`. Accumulators 
+    built separately (e.g. by several processes on different parts of a 
+    long recording) can be combined with `merge`. Only the number of values
+    and the centered sums of powers 2, 3 and 4 are kept in memory.
+    
+    Parameters
+    ----------
+    axis : integer, optional, default is None
+        Axis along which the chunks are concatenated and the moments are 
+        computed (e.g. axis=1 for the moments of each frequency bin of a 
+        spectrogram received by blocks of columns). If None, the moments of 
+        all the values are computed (e.g. waveform).
+        
+    Attributes
+    ----------
+    n : int
+        Number of values pushed (along axis)
+    
+    See Also
+    --------
+    moments, features.temporal_moments, features.spectral_moments
+    
+    Notes
+    -----
+    The chunks are combined with the pairwise update formulas of Chan et al.
+    [1]_ generalized to the third and fourth moments [2]_, which are
+    numerically stable. The moments are the same as `util.moments` up to 
+    the floating point rounding.
+    
+    References
+    ----------
+    .. [1] Chan, T. F., Golub, G. H., & LeVeque, R. J. (1979). Updating 
+       formulae and a pairwise algorithm for computing sample variances. 
+       Technical Report STAN-CS-79-773, Stanford University.
+    .. [2] Pébay, P. (2008). Formulas for robust, one-pass parallel 
+       computation of covariances and arbitrary-order statistical moments. 
+       Technical Report SAND2008-6212, Sandia National Laboratories.
+    
+    Examples
+    --------
+    >>> from maad import sound, util
+    >>> acc = util.MomentsAccumulator()
+    >>> for s_block, _ in sound.iter_blocks('../data/spinetail.wav', block_duration=5):
+    ...     acc.update(s_block)
+    >>> mean, var, skew, kurt = acc.moments()
+    >>> print ('mean:%2.4f / var:%2.4f / skew:%2.4f / kurt:%2.4f' %(mean, var, skew, kurt)) 
+    mean:-0.0000 / var:0.0012 / skew:-0.0065 / kurt:24.7116  
+    
+    Moments of each frequency bin of a spectrogram computed by blocks
+    
+    >>> s, fs = sound.load('../data/spinetail.wav')
+    >>> Sxx, tn, fn, ext = sound.spectrogram(s, fs)
+    >>> acc = util.MomentsAccumulator(axis=1)
+    >>> for i in range(0, Sxx.shape[1], 100):
+    ...     acc.update(Sxx[:, i:i+100])
+    >>> mean_per_bin, var_per_bin, skew_per_bin, kurt_per_bin = acc.moments()
+    """
+    
+    def __init__(self, axis=None):
+        self.axis = axis
+        self.n = 0
+        self._mean = self._M2 = self._M3 = self._M4 = 0.
+    
+    def update(self, X):
+        """
+        Push the next chunk.
+        
+        Parameters
+        ----------
+        X : ndarray of floats
+            Next chunk of the signal (1d) or spectrogram (2d)
+        
+        Returns
+        -------
+        self : MomentsAccumulator
+        """
+        X = np.asarray(X, dtype=np.float64)
+        axis = self.axis
+        if axis is None:
+            X = X.ravel()
+            axis = 0
+        n = X.shape[axis]
+        if n == 0:
+            return self
+        
+        # centered sums of the chunk
+        mean_x = np.mean(X, axis=axis)
+        z = X - np.expand_dims(mean_x, axis)
+        z2 = z**2
+        M2 = np.sum(z2, axis=axis)
+        M3 = np.sum(z2*z, axis=axis)
+        M4 = np.sum(z2**2, axis=axis)
+        
+        self._combine(n, mean_x, M2, M3, M4)
+        return self
+    
+    def merge(self, other):
+        """
+        Combine with another accumulator, as if all its chunks had been 
+        pushed into this accumulator.
+        
+        Parameters
+        ----------
+        other : MomentsAccumulator
+        
+        Returns
+        -------
+        self : MomentsAccumulator
+        """
+        if other.axis != self.axis:
+            raise ValueError('The accumulators must have the same axis')
+        if other.n > 0:
+            self._combine(other.n, other._mean, other._M2, other._M3, 
+                          other._M4)
+        return self
+    
+    def _combine(self, nb, mean_b, M2b, M3b, M4b):
+        """
+        Combine the state with the number of values, mean and centered sums
+        of another set of values.
+        """
+        na = self.n
+        if na == 0:
+            self.n = nb
+            self._mean, self._M2, self._M3, self._M4 = mean_b, M2b, M3b, M4b
+            return
+        
+        M2a, M3a = self._M2, self._M3
+        n = na + nb
+        delta = mean_b - self._mean
+        delta_n = delta / n
+        
+        self._mean = self._mean + delta_n*nb
+        self._M2 = M2a + M2b + delta*delta_n*na*nb
+        self._M3 = (M3a + M3b 
+                    + delta*delta_n**2*na*nb*(na-nb)
+                    + 3*delta_n*(na*M2b - nb*M2a))
+        self._M4 = (self._M4 + M4b 
+                    + delta*delta_n**3*na*nb*(na*na - na*nb + nb*nb)
+                    + 6*delta_n**2*(na*na*M2b + nb*nb*M2a)
+                    + 4*delta_n*(na*M3b - nb*M3a))
+        self.n = n
+        
+    def moments(self):
+        """
+        Moments of all the values pushed.
+        
+        Returns
+        -------
+        mean : float or ndarray of floats
+            mean
+        var : float or ndarray of floats
+            variance
+        skew : float or ndarray of floats
+            skewness
+        kurt : float or ndarray of floats
+            kurtosis
+        """
+        n = self.n
+        if n == 0:
+            raise ValueError('No value was pushed with update')
+        var_x = self._M2 / n
+        skew = (self._M3/(n-1))/var_x**1.5
+        kurt = (self._M4/(n-1))/var_x**2
+        if self.axis is None:
+            return (float(self._mean), float(var_x), float(skew), 
+                    float(kurt))
+        return self._mean, var_x, skew, kurt
+
 #%%
 def entropy (x, axis=0):
     """
@@ -440,7 +661,7 @@ def entropy (x, axis=0):
                     pmf = x/np.sum(x,axis)
                 elif axis == 1 :                     
                     pmf = (x.transpose()/np.sum(x,axis)).transpose()
-                pmf[pmf==0] = _MIN_
+                pmf[pmf==0] = _min_value(pmf)
                 #normalized by the length : H=>[0,1]
                 H = -np.sum(pmf*np.log(pmf),axis)/np.log(n)
         else:
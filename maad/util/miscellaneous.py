@@ -23,6 +23,22 @@ import sys
 _MIN_ = sys.float_info.min
 
 # %%
+# =============================================================================
+# private functions
+# =============================================================================
+def _min_value(x):
+    """
+    Smallest positive value that can be represented with the precision of x.
+    
+    It is used to avoid zero values before taking the log. For float32 data,
+    sys.float_info.min would underflow to 0.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.floating):
+        return np.finfo(x.dtype).tiny
+    return _MIN_
+
+# %%
 
 
 def index_bw(fn, bw):
@@ -352,7 +368,7 @@ def amplitude2dB(x, db_range=None, db_gain=0):
         if x == 0:
             x = _MIN_
     else:
-        x[x == 0] = _MIN_  # Avoid zero value for log10
+        x[x == 0] = _min_value(x)  # Avoid zero value for log10
 
     # conversion in dB
     y = 20*log10(x)   # take log
@@ -407,7 +423,7 @@ def power2dB(x, db_range=None, db_gain=0):
         if x == 0:
             x = _MIN_
     else:
-        x[x == 0] = _MIN_  # Avoid zero value for log10
+        x[x == 0] = _min_value(x)  # Avoid zero value for log10
 
     # conversion in dB
     y = 10*log10(x)   # take log
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""
+Collection of functions to store the acoustic indices computed per frequency
+bin as dense arrays
+"""
+#
+# Authors:  Juan Sebastian ULLOA <lisofomia@gmail.com>
+#           Sylvain HAUPERT <sylvain.haupert@mnhn.fr>
+#
+# License: New BSD License
+
+# =============================================================================
+# Load the modules
+# =============================================================================
+# Import external modules
+import os
+import json
+from ast import literal_eval
+import numpy as np
+import pandas as pd
+
+#%%
+# =============================================================================
+# public functions
+# =============================================================================
+class PerBinIndices(object):
+    """
+    Acoustic indices computed per frequency bin, stored as dense arrays.
+
+    Each index is a 2d array (n_frequencies, n_times) where each column
+    corresponds to an audio file (e.g. the xxx_per_bin indices returned by
+    `features.all_spectral_alpha_indices` for a collection of files). The
+    arrays can be numpy memmaps (see `read_per_bin_indices`), in which case
+    the data are only read when they are used.
+
+    `features.all_spectral_alpha_indices` still returns the indices per bin
+    as a dataframe with one vector per cell : PerBinIndices is built from 
+    these dataframes afterwards with `PerBinIndices.from_dataframe`.
+
+    Parameters
+    ----------
+    data : 3d ndarray or list of 2d ndarrays
+        Values of the indices, with the shape (n_indices, n_frequencies,
+        n_times).
+    indices : list of strings
+        Names of the indices (e.g. ['ACI_per_bin', 'LTS']).
+    fn : 1d ndarray of floats
+        Frequency vector (n_frequencies).
+    time : array_like, optional, default is None
+        Time index (n_times), usually the dates of the audio files. If None,
+        time is 0...n_times-1.
+
+    Attributes
+    ----------
+    indices : list of strings
+        Names of the indices.
+    fn : 1d ndarray of floats
+        Frequency vector.
+    time : Pandas Index
+        Time index.
+    shape : tuple
+        (n_indices, n_frequencies, n_times)
+
+    See Also
+    --------
+    write_per_bin_indices, read_per_bin_indices, false_Color_Spectro
+
+    Examples
+    --------
+    >>> df = maad.util.date_parser("../data/indices/", dateformat='SM4')
+    >>> df_per_bin = []
+    >>> for date, filename in zip(df.index, df.file):
+    ...     s, fs = maad.sound.load(filename)
+    ...     Sxx_power, tn, fn, _ = maad.sound.spectrogram(s, fs)
+    ...     _, df_bin = maad.features.all_spectral_alpha_indices(Sxx_power, tn, fn)
+    ...     df_per_bin.append(df_bin.set_index(pd.Index([date], name='Date')))
+    >>> per_bin = maad.util.PerBinIndices.from_dataframe(pd.concat(df_per_bin))
+    >>> per_bin.shape
+    (18, 512, 96)
+    >>> per_bin['ACI_per_bin'].shape
+    (512, 96)
+    """
+
+    def __init__(self, data, indices, fn, time=None):
+        self._arrays = [np.asarray(X) for X in data]
+        self.indices = list(indices)
+        self.fn = np.asarray(fn)
+
+        if len(self._arrays) != len(self.indices) :
+            raise ValueError ('data and indices must have the same length')
+        for X in self._arrays :
+            if X.shape != self._arrays[0].shape or X.ndim != 2 :
+                raise ValueError ('each index must be a 2d array with the same'
+                                  ' shape (n_frequencies, n_times)')
+
+        n_times = self._arrays[0].shape[1] if len(self._arrays) > 0 else 0
+        if time is None :
+            time = np.arange(n_times)
+        self.time = pd.Index(time)
+
+    @property
+    def shape(self):
+        if len(self._arrays) == 0 :
+            return (0, len(self.fn), len(self.time))
+        return (len(self._arrays),) + self._arrays[0].shape
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def __getitem__(self, name):
+        """ Values (n_frequencies, n_times) of the index name """
+        return self._arrays[self.indices.index(name)]
+
+    def to_array(self, indices=None):
+        """
+        Stack the values of the indices into a single array (n_indices,
+        n_frequencies, n_times). If indices is None, all the indices are used.
+        """
+        if indices is None :
+            indices = self.indices
+        return np.stack([self[name] for name in indices])
+
+    @classmethod
+    def from_dataframe(cls, df, indices=None, dtype=np.float64):
+        """
+        Create a PerBinIndices from a dataframe of per bin indices.
+
+        Parameters
+        ----------
+        df : Pandas DataFrame
+            DataFrame with one row per audio file and one column per index,
+            each cell being the vector of values per frequency bin, as
+            returned by `features.all_spectral_alpha_indices` (one row) or
+            the concatenation of several of these dataframes. The cells can be
+            lists or strings (dataframe read from a csv file). The column
+            'frequencies' is used as frequency vector, the column 'file' is
+            ignored and the index of the dataframe is used as time index.
+        indices : list of strings, optional, default is None
+            Indices to keep. If None, all the indices are kept.
+        dtype : numpy dtype, optional, default is np.float64
+            Type of the arrays.
+
+        Returns
+        -------
+        per_bin : PerBinIndices
+        """
+        def _to_vector(v):
+            # the vectors are strings when df is read from a csv file
+            if isinstance(v, str) :
+                v = literal_eval(v)
+            return np.asarray(v, dtype=dtype)
+
+        if indices is None :
+            indices = [name for name in df.columns
+                       if name not in ('file', 'frequencies')]
+        if 'frequencies' in df.columns :
+            fn = _to_vector(df['frequencies'].iloc[0])
+        else :
+            fn = None
+
+        data = [np.stack([_to_vector(v) for v in df[name]], axis=1)
+                for name in indices]
+        if fn is None :
+            fn = np.arange(data[0].shape[0])
+
+        return cls(data, indices, fn, time=df.index)
+
+#%%
+def write_per_bin_indices(per_bin, path):
+    """
+    Write acoustic indices per frequency bin into a directory, in a binary
+    columnar format.
+
+    Each index is saved into its own .npy file (n_frequencies, n_times) that
+    can be memory mapped when it is read. The frequency vector and the time
+    index are saved into frequencies.npy and time.npy, and the list of the
+    indices into indices.json. Dates are saved as int64 nanoseconds (UTC) 
+    with their time zone in indices.json, and other non numeric times are 
+    saved as strings, so that no file needs to be unpickled.
+
+    Parameters
+    ----------
+    per_bin : PerBinIndices or Pandas DataFrame
+        Indices per frequency bin. A DataFrame is first converted with
+        `PerBinIndices.from_dataframe`.
+    path : string
+        Directory where the files are written. The directory is created if
+        it does not exist.
+
+    See Also
+    --------
+    read_per_bin_indices, PerBinIndices
+
+    Examples
+    --------
+    >>> maad.util.write_per_bin_indices(per_bin, './per_bin_indices')
+    >>> per_bin = maad.util.read_per_bin_indices('./per_bin_indices')
+    """
+    if isinstance(per_bin, pd.DataFrame) :
+        per_bin = PerBinIndices.from_dataframe(per_bin)
+
+    if not os.path.exists(path) :
+        os.makedirs(path)
+
+    for name in per_bin.indices :
+        np.save(os.path.join(path, name + '.npy'), per_bin[name])
+    np.save(os.path.join(path, 'frequencies.npy'), per_bin.fn)
+    time = per_bin.time
+    time_tz = None
+    if isinstance(time, pd.DatetimeIndex) :
+        time_kind = 'datetime'
+        time_tz = None if time.tz is None else str(time.tz)
+        values = time.values.astype('datetime64[ns]').astype(np.int64)
+    elif time.dtype.kind in 'biuf' :
+        time_kind = 'numeric'
+        values = np.asarray(time)
+    else :
+        time_kind = 'string'
+        values = np.asarray(time.astype(str), dtype=str)
+    np.save(os.path.join(path, 'time.npy'), values)
+    with open(os.path.join(path, 'indices.json'), 'w') as f :
+        json.dump({'indices' : per_bin.indices,
+                   'time_name' : time.name,
+                   'time_kind' : time_kind,
+                   'time_tz' : time_tz}, f)
+
+#%%
+def read_per_bin_indices(path, indices=None, mmap_mode='r'):
+    """
+    Read acoustic indices per frequency bin written by `write_per_bin_indices`.
+
+    Parameters
+    ----------
+    path : string
+        Directory written by `write_per_bin_indices`.
+    indices : list of strings, optional, default is None
+        Indices to read. If None, all the indices are read.
+    mmap_mode : {None, 'r', 'r+', 'c'}, optional, default is 'r'
+        Memory mapping mode of the arrays (see numpy.load). With 'r', the
+        values are only read from the disk when they are used. If None, the
+        arrays are loaded in memory.
+
+    Returns
+    -------
+    per_bin : PerBinIndices
+
+    See Also
+    --------
+    write_per_bin_indices, PerBinIndices
+    """
+    with open(os.path.join(path, 'indices.json'), 'r') as f :
+        metadata = json.load(f)
+    if indices is None :
+        indices = metadata['indices']
+
+    data = [np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+            for name in indices]
+    fn = np.load(os.path.join(path, 'frequencies.npy'))
+    time = np.load(os.path.join(path, 'time.npy'))
+    if metadata.get('time_kind') == 'datetime' :
+        time = pd.DatetimeIndex(time.astype('datetime64[ns]'))
+        if metadata['time_tz'] is not None :
+            time = time.tz_localize('UTC').tz_convert(metadata['time_tz'])
+    time = pd.Index(time, name=metadata['time_name'])
+
+    return PerBinIndices(data, indices, fn, time)
@@ -21,6 +21,7 @@ _MIN_ = sys.float_info.min
 
 # Importation from internal modules
 from maad.util import linear_scale, power2dB
+from maad.util.per_bin_indices import PerBinIndices
 
 #%%
 def _check_axes(axes):
@@ -1595,6 +1596,127 @@ def plot_correlation_map(df, R_threshold=0.75, method="spearman", **kwargs):
     return fig, ax
 
 
+def _percentile_by_chunks(X, q, chunksize=2**22, nbins=2**16):
+    """
+    Percentiles of the 2d array X (same as np.percentile with the linear
+    interpolation) computed by chunks of rows, in order to never load the
+    whole array (i.e. a memmap) into memory.
+
+    The order statistics are first located with histograms, then the values
+    of the selected bins are sorted. If a bin holds more than chunksize
+    values, its histogram is computed again. The infinite values are only
+    counted, as they are the first (-inf) and the last (+inf) values.
+    """
+    step = max(chunksize // max(X.shape[1], 1), 1)
+
+    def _chunks():
+        for i0 in range(0, X.shape[0], step):
+            yield np.asarray(X[i0 : i0 + step], dtype=np.float64).ravel()
+
+    def _bin(x, lo, hi):
+        # monotonic mapping of the values between lo and hi into nbins bins
+        idx = ((x - lo) * (nbins / (hi - lo))).astype(np.int64)
+        return np.minimum(idx, nbins - 1)
+
+    # rank of the values needed by the linear interpolation
+    n = X.size
+    virtual = np.asarray(q, dtype=np.float64) / 100 * (n - 1)
+    previous = np.floor(virtual).astype(np.int64)
+    following = np.minimum(previous + 1, n - 1)
+    gamma = virtual - previous
+
+    # min and max of the finite values, number of infinite values and nan
+    lo, hi = np.inf, -np.inf
+    n_neg, n_pos = 0, 0
+    for x in _chunks():
+        if np.isnan(x).any():
+            return np.full(virtual.shape, np.nan)[()]
+        n_neg += np.count_nonzero(x == -np.inf)
+        n_pos += np.count_nonzero(x == np.inf)
+        x = x[np.isfinite(x)]
+        if x.size > 0:
+            lo, hi = min(lo, x.min()), max(hi, x.max())
+
+    # select the values with these ranks
+    values = {}
+    ranks = np.unique(np.concatenate(([previous], [following])))
+    for r in ranks:
+        if r < n_neg:
+            values[r] = -np.inf
+        elif r >= n - n_pos:
+            values[r] = np.inf
+    ranks = ranks[(ranks >= n_neg) & (ranks < n - n_pos)]
+    pending = [(lo, hi, n_neg, ranks)] if len(ranks) > 0 else []
+    while len(pending) > 0:
+        lo, hi, below, ranks = pending.pop()
+        if lo == hi or not np.isfinite(nbins / (hi - lo)):
+            sel = np.sort(
+                np.concatenate([x[(x >= lo) & (x <= hi)] for x in _chunks()])
+            )
+            for r in ranks:
+                values[r] = sel[r - below]
+            continue
+        # histogram of the values between lo and hi
+        counts = np.zeros(nbins, dtype=np.int64)
+        for x in _chunks():
+            x = x[(x >= lo) & (x <= hi)]
+            counts += np.bincount(_bin(x, lo, hi), minlength=nbins)
+        cumcounts = np.cumsum(counts)
+        bins = np.searchsorted(cumcounts, ranks - below, side="right")
+        small = [b for b in np.unique(bins) if counts[b] <= chunksize]
+        # sort the values of the small bins
+        if len(small) > 0:
+            sel = [[] for b in small]
+            for x in _chunks():
+                x = x[(x >= lo) & (x <= hi)]
+                idx = _bin(x, lo, hi)
+                for ii, b in enumerate(small):
+                    sel[ii].append(x[idx == b])
+            for ii, b in enumerate(small):
+                s = np.sort(np.concatenate(sel[ii]))
+                offset = below + (cumcounts[b - 1] if b > 0 else 0)
+                for r in ranks[bins == b]:
+                    values[r] = s[r - offset]
+        # refine the large bins with the min and max of their values
+        for b in np.unique(bins):
+            if b in small:
+                continue
+            lo_b, hi_b = np.inf, -np.inf
+            for x in _chunks():
+                x = x[(x >= lo) & (x <= hi)]
+                x = x[_bin(x, lo, hi) == b]
+                if x.size > 0:
+                    lo_b, hi_b = min(lo_b, x.min()), max(hi_b, x.max())
+            offset = below + (cumcounts[b - 1] if b > 0 else 0)
+            pending.append((lo_b, hi_b, offset, ranks[bins == b]))
+
+    # linear interpolation, as numpy
+    a = np.array([values[r] for r in np.atleast_1d(previous)])
+    b = np.array([values[r] for r in np.atleast_1d(following)])
+    g = np.atleast_1d(gamma)
+    diff_b_a = b - a
+    p = a + diff_b_a * g
+    p = np.where(g >= 0.5, b - diff_b_a * (1 - g), p)
+    return p.reshape(virtual.shape)[()]
+
+
+class _FalseColorImages(object):
+    """
+    Sequence of false color images, each image being computed when it is
+    accessed.
+    """
+
+    def __init__(self, make_image, triplet):
+        self._make_image = make_image
+        self._triplet = triplet
+
+    def __len__(self):
+        return len(self._triplet)
+
+    def __getitem__(self, ii):
+        return self._make_image(self._triplet[ii])
+
+
 # =============================================================================
 def false_Color_Spectro(
     df,
@@ -1606,6 +1728,7 @@ def false_Color_Spectro(
     verbose=False,
     display=False,
     savefig=None,
+    chunksize=2 ** 22,
     **kwargs
 ):
     """
@@ -1615,9 +1738,16 @@ def false_Color_Spectro(
         
     Parameters
     ----------
-    df : Panda DataFrame
+    df : Panda DataFrame, PerBinIndices or 3d ndarray
         DataFrame with indices per frequency bin.
         
+        Or PerBinIndices (see `util.read_per_bin_indices`) or array 
+        (n_indices, n_frequencies, n_times), which can be memory mapped. 
+        The data are then processed by chunks and are never entirely loaded 
+        into memory. For an array, the indices are named by the list 
+        indices (if None, index0, index1...) and the x axis is the column 
+        number.
+        
     indices : list, default is None
         List of indices. 
         If permut is False (see permut), if indices is None : 1st indices is red (R), 2nd indice is green (G) 
@@ -1655,6 +1785,11 @@ def false_Color_Spectro(
     savefig : string, optional, default is None 
         if not None, figures will be safe. Savefig is the prefix of the save
         filename.
+        
+    chunksize : int, default is 2**22
+        Number of values of an indice read and normalized at once. The 
+        indices are processed by chunks of times in order to never load the
+        whole arrays (i.e. memmaps) into memory.
     
     \*\*kwargs, optional
        - dpi : scalar, optional, default 96
@@ -1664,7 +1799,11 @@ def false_Color_Spectro(
     -------
     false_color_image : ndarray of scalars
         Matrix with ndim = 4 if multiple false color spectro or ndim = 3, if
-        single false color spectro with 3 colors : R, G, B
+        single false color spectro with 3 colors : R, G, B.
+        If df is a PerBinIndices or an array and permut is True, 
+        false_color_image is a sequence of the false color spectros (ndim = 3), 
+        each one being computed when it is accessed (e.g. 
+        false_color_image[0]).
             
     triplet : list
         List of triplet of indices corresponding to each false color spectro
@@ -1696,69 +1835,107 @@ def false_Color_Spectro(
     >>> df.index = pd.date_range('20200101', periods=len(df))
     >>> maad.util.false_Color_Spectro (df, display=True ,unit='days', figsize=[3,3])
     
+    Indices per bin read from the disk (memory mapped)
+    
+    >>> per_bin = maad.util.read_per_bin_indices('./per_bin_indices')
+    >>> fcs, triplet = maad.util.false_Color_Spectro(per_bin, 
+                        indices=['KURTt_per_bin', 'EVNspCount_per_bin', 'MEANt_per_bin'], 
+                        permut=True)
+    >>> fcs[0].shape
+    (512, 96, 3)
+    
     """
-    # sort dataframe by date
-    df = df.sort_index(axis=0)
-    # set index as DatetimeIndex
-    df = df.set_index(pd.DatetimeIndex(df.index))
-    # remove column file
-    if "file" in df.columns:
-        df = df.drop(columns="file")
-    # test if frequencies is in columns
-    if "frequencies" in df.columns:
-        # get frequencies and remove the column
-        # test if type of df['frequencies'] is number or str
-        if isinstance(df.frequencies.iloc[0], str):
-            fn = df["frequencies"].apply(literal_eval).iloc[0]
-        else:
-            fn = df["frequencies"].iloc[0]
-        # drop frequencies
-        df = df.drop(columns="frequencies")
-    else:
-        fn = np.arange(0, len(df))
-
-    # Set the list of indices if indices is None
-    if indices is None:
-        indices = list(df)
-
-    # for each indice, check if values type is string and convert into scalars
-    # Values are vectors of strings when data are loading from csv
-    for indice in indices:
-        # test if type of df[indice] is string
-        if isinstance(df[indice].iloc[0], str):
-            # convert string into scalars
-            df[indice] = df[indice].apply(literal_eval)
-            
-    # create a dataframe with normalized values for each indices
-    df_z = pd.DataFrame()
-
-    for indice in indices:
-        z = []
-        if verbose:
-            print(indice)
-        for v in df[indice]:
-            z.append(v)
-        z = np.asarray(z).T
-        # Select the min and max value for each indice
-        z_min = np.percentile(z, plim[0])
-        z_max = np.percentile(z, plim[1])
-        # clip the value to the min and max found
-        z = np.clip(z, z_min, z_max)
-        # linear conversion
-        if reverseLUT == True:
-            # between 1 to 0
-            z = linear_scale(z, 1, 0)
+    if isinstance(df, pd.DataFrame):
+        # sort dataframe by date
+        df = df.sort_index(axis=0)
+        # set index as DatetimeIndex
+        df = df.set_index(pd.DatetimeIndex(df.index))
+        # remove column file
+        if "file" in df.columns:
+            df = df.drop(columns="file")
+        # test if frequencies is in columns
+        if "frequencies" in df.columns:
+            # get frequencies and remove the column
+            # test if type of df['frequencies'] is number or str
+            if isinstance(df.frequencies.iloc[0], str):
+                fn = df["frequencies"].apply(literal_eval).iloc[0]
+            else:
+                fn = df["frequencies"].iloc[0]
+            # drop frequencies
+            df = df.drop(columns="frequencies")
         else:
-            # between 0 to 1
-            z = linear_scale(z, 0, 1)
+            fn = np.arange(0, len(df))
+
+        # Set the list of indices if indices is None
+        if indices is None:
+            indices = list(df)
 
-        df_z[indice] = [z * 255]
+        # convert the vectors (or strings from csv) of each indice into arrays
+        per_bin = PerBinIndices.from_dataframe(df, indices=indices)
+        lazy = False
+    else:
+        if not isinstance(df, PerBinIndices):
+            # 3d array (n_indices, n_frequencies, n_times)
+            if indices is None:
+                indices = ["index%d" % ii for ii in range(len(df))]
+            if len(indices) != len(df):
+                raise ValueError("indices must name each index of the array")
+            df = PerBinIndices(df, indices, np.arange(df.shape[1]))
+        per_bin = df
+        if indices is None:
+            indices = per_bin.indices
+        fn = per_bin.fn
+        lazy = permut
+
+    # sort the times
+    time = per_bin.time
+    order = None
+    if not time.is_monotonic_increasing:
+        order = np.argsort(time, kind="stable")
+        time = time[order]
+
+    # min and max value of each indice (percentiles), computed once
+    zlim = {}
+
+    def _channel(indice, out):
+        """normalized values of the indice, computed by chunks of times"""
+        X = per_bin[indice]
+        if indice not in zlim:
+            if verbose:
+                print(indice)
+            # Select the min and max value for each indice
+            zlim[indice] = _percentile_by_chunks(X, plim, chunksize)
+        z_min, z_max = zlim[indice]
+        step = max(chunksize // max(X.shape[0], 1), 1)
+        for t0 in range(0, X.shape[1], step):
+            if order is None:
+                z = np.asarray(X[:, t0 : t0 + step])
+            else:
+                z = np.asarray(X[:, order[t0 : t0 + step]])
+            # clip the value to the min and max found
+            z = np.clip(z, z_min, z_max)
+            # linear conversion of each time (column)
+            if reverseLUT == True:
+                # between 1 to 0
+                z = linear_scale(z, 1, 0, axis=0)
+            else:
+                # between 0 to 1
+                z = linear_scale(z, 0, 1, axis=0)
+            out[:, t0 : t0 + step] = z * 255
+        return out
+
+    def _false_color_image(tri):
+        """create the false color image (R,G,B)"""
+        image = np.empty(per_bin.shape[1:] + (3,), dtype=np.uint8)
+        for cc, indice in enumerate(tri):
+            _channel(indice, image[:, :, cc])
+        return image
 
     # find all permutation of 3 indices among all indices
     if permut == True:
         import itertools
 
-        per = itertools.permutations(list(df_z), 3)
+        per = itertools.permutations(indices, 3)
         triplet = []
         for val in per:
             triplet.append([*val])
@@ -1772,7 +1949,7 @@ def false_Color_Spectro(
     #####################
 
     # get the number of pixels along frequency (Nf) and time (Nt)
-    Nf, Nt = df_z[triplet[0][0]].values.tolist()[0].shape
+    Nf, Nt = per_bin.shape[1:]
 
     # test if figsize is in kwargs
     figsize = kwargs.pop("figsize", None)
@@ -1783,7 +1960,7 @@ def false_Color_Spectro(
     fig_kwargs = {"figsize": figsize, "tight_layout": "tight_layout"}
 
     # number of days in the period
-    deltaT = df.index.max() - df.index.min()
+    deltaT = time.max() - time.min()
 
     # unit
     if unit == "minutes":
@@ -1802,14 +1979,28 @@ def false_Color_Spectro(
         normT = 60e9
         xlabel = "Minutes"
 
+    # the time is not a date (i.e. array) => the x axis is the column number
+    if isinstance(deltaT, pd.Timedelta):
+        xmax = deltaT.value / normT
+    else:
+        xmax = deltaT
+        xlabel = "Time index"
+
+    # remove the suffix _per_bin from the name of the indices
+    def _short(indice):
+        return indice[:-8] if indice.endswith("_per_bin") else indice
+
     false_color_image = []
     for tt in np.arange(len(triplet)):
 
+        # the images are computed later, when they are accessed
+        if lazy and not display:
+            break
+
         # create the false color image (R,G,B)
-        z0 = df_z[triplet[tt][0]].values.tolist()[0]
-        z1 = df_z[triplet[tt][1]].values.tolist()[0]
-        z2 = df_z[triplet[tt][2]].values.tolist()[0]
-        false_color_image.append((np.dstack((z0, z1, z2))).astype(np.uint8))
+        image = _false_color_image(triplet[tt])
+        if not lazy:
+            false_color_image.append(image)
 
         # Display the False Color Spectro
         if display:
@@ -1817,10 +2008,10 @@ def false_Color_Spectro(
             plt.rcParams.update({"font.family": "serif"})
             fig = plt.figure(facecolor="white", **fig_kwargs)
             plt.imshow(
-                false_color_image[tt],
+                image,
                 aspect="auto",
                 origin="lower",
-                extent=(fn[0], deltaT.value / normT, 0, fn[-1]),
+                extent=(fn[0], xmax, 0, fn[-1]),
                 **kwargs
             )
             plt.xlabel(xlabel)
@@ -1829,13 +2020,13 @@ def false_Color_Spectro(
                 "False Color Spectro "
                 + "\n"
                 + " [R:"
-                + triplet[tt][0][:-8]
+                + _short(triplet[tt][0])
                 + "; "
                 + "G:"
-                + triplet[tt][1][:-8]
+                + _short(triplet[tt][1])
                 + "; "
                 + "B:"
-                + triplet[tt][2][:-8]
+                + _short(triplet[tt][2])
                 + "]",
                 size=12,
             )
@@ -1850,11 +2041,11 @@ def false_Color_Spectro(
                 format = kwargs.pop("format", "png")
                 filename = (
                     "_fcs_"
-                    + triplet[tt][0][:-8]
+                    + _short(triplet[tt][0])
                     + "_"
-                    + triplet[tt][1][:-8]
+                    + _short(triplet[tt][1])
                     + "_"
-                    + triplet[tt][2][:-8]
+                    + _short(triplet[tt][2])
                 )
                 full_filename = savefig + filename + "." + format
                 if verbose:
@@ -1870,6 +2061,9 @@ def false_Color_Spectro(
                 # close fig
                 plt.close(fig)
 
+    if lazy:
+        return _FalseColorImages(_false_color_image, triplet), triplet
+
     # convert into ndarray
     false_color_image = np.asarray(false_color_image)
 
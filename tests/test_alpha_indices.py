@@ -22,6 +22,20 @@ def test_temporal_median():
     expected_values = 0.007934564717486147
     
     assert np.allclose(temporal_median_index, expected_values)
+
+def test_temporal_indices_precomputed_envelope():
+    # The indices computed from a precomputed envelope should be identical
+    s, fs = maad.sound.load('../data/spinetail.wav')
+    env = maad.sound.envelope(s, mode='fast', Nt=512)
+    assert maad.features.temporal_median(s, env=env) == maad.features.temporal_median(s)
+    assert maad.features.temporal_entropy(s, env=env) == maad.features.temporal_entropy(s)
+    assert maad.sound.temporal_snr(s, env=env) == maad.sound.temporal_snr(s)
+    assert (maad.features.temporal_activity(s, 6, env=env) 
+            == maad.features.temporal_activity(s, 6))
+    EVN = maad.features.temporal_events(s, fs, 6, env=env)
+    EVN_ref = maad.features.temporal_events(s, fs, 6)
+    assert EVN[:3] == EVN_ref[:3]
+    assert np.array_equal(EVN[3], EVN_ref[3])
     
 def test_temporal_entropy():
     # Compute temporal median
@@ -64,4 +78,162 @@ def test_spectral_entropy():
     assert np.allclose(spectral_entropy_indices,expected_values)
     
 
-#%% Spectro-temporal indices
\ No newline at end of file
+#%% Spectro-temporal indices
+
+#%% Single precision
+
+def test_all_spectral_alpha_indices_float32():
+    # Compute the spectral indices in double and single precision
+    s, fs = maad.sound.load('../data/spinetail.wav')
+    Sxx_power, tn, fn, _ = maad.sound.spectrogram(s, fs)
+    df_indices, _ = maad.features.all_spectral_alpha_indices(Sxx_power, tn, fn)
+    
+    s, fs = maad.sound.load('../data/spinetail.wav', dtype=np.float32)
+    Sxx_power, tn, fn, _ = maad.sound.spectrogram(s, fs)
+    assert Sxx_power.dtype == np.float32
+    df_indices_32, _ = maad.features.all_spectral_alpha_indices(Sxx_power, tn, fn)
+    
+    # The single precision indices should stay within 0.1% of the double 
+    # precision indices
+    assert np.allclose(df_indices_32, df_indices, rtol=1e-3, atol=1e-9)
+
+#%% Selection of indices
+
+def test_all_spectral_alpha_indices_selection():
+    s, fs = maad.sound.load('../data/spinetail.wav')
+    Sxx_power, tn, fn, _ = maad.sound.spectrogram(s, fs)
+    df_indices, df_per_bin = maad.features.all_spectral_alpha_indices(Sxx_power, tn, fn)
+    
+    indices = ['NDSI', 'ACI', 'LFC', 'ROItotal', 'ACI_per_bin']
+    df_sel, df_per_bin_sel = maad.features.all_spectral_alpha_indices(
+        Sxx_power, tn, fn, indices=indices)
+    assert list(df_sel.columns) == ['ACI', 'NDSI', 'LFC', 'ROItotal']
+    assert list(df_per_bin_sel.columns) == ['frequencies', 'ACI_per_bin']
+    assert df_sel.equals(df_indices[df_sel.columns])
+    assert df_per_bin_sel.ACI_per_bin[0] == df_per_bin.ACI_per_bin[0]
+
+#%% Batch processing
+
+def test_batch_alpha_indices():
+    df = maad.util.date_parser('../data/indices/', dateformat='SM4').iloc[:3]
+    df.loc[df.index[1], 'file'] = '../data/indices/missing.wav'
+    indices = ['LEQt', 'Ht', 'ACI', 'NDSI']
+    df_indices, df_errors = maad.features.batch_alpha_indices(df, n_jobs=2, 
+                                                              indices=indices)
+    assert list(df_indices.columns) == ['file'] + indices
+    assert df_indices.index.equals(df.index)
+    assert df_indices.iloc[1, 1:].isna().all()
+    assert list(df_errors.file) == ['../data/indices/missing.wav']
+    
+    s, fs = maad.sound.load(df.file.iloc[0])
+    Sxx_power, tn, fn, _ = maad.sound.spectrogram(s, fs, nperseg=1024)
+    df_spectral, _ = maad.features.all_spectral_alpha_indices(Sxx_power, tn, fn)
+    df_temporal = maad.features.all_temporal_alpha_indices(s, fs)
+    assert df_indices.ACI.iloc[0] == df_spectral.ACI[0]
+    assert df_indices.Ht.iloc[0] == df_temporal.Ht[0]
+    for n_jobs in [0, -2]:
+        with pytest.raises(ValueError):
+            maad.features.batch_alpha_indices(df, n_jobs=n_jobs)
+
+def test_batch_alpha_indices_checkpoint(tmp_path):
+    df = maad.util.date_parser('../data/indices/', dateformat='SM4').iloc[:4]
+    checkpoint = str(tmp_path / 'checkpoint.jsonl')
+    indices = ['LEQt', 'ACI']
+    # first run interrupted after 2 files, with the last line truncated
+    maad.features.batch_alpha_indices(df.iloc[:2], indices=indices, 
+                                      checkpoint=checkpoint)
+    with open(checkpoint) as f :
+        lines = f.read()
+    with open(checkpoint, 'w') as f :
+        f.write(lines[:-10])
+    # resume
+    df_indices, _ = maad.features.batch_alpha_indices(df, indices=indices, 
+                                                      checkpoint=checkpoint)
+    # the truncated file and the 2 last files are processed
+    with open(checkpoint) as f :
+        assert len(f.readlines()) == 2 + 3
+    df_expected, _ = maad.features.batch_alpha_indices(df, indices=indices)
+    assert df_indices.equals(df_expected)
+    # subset of the indices : the records are reused
+    df_indices, _ = maad.features.batch_alpha_indices(df, indices=['ACI'], 
+                                                      checkpoint=checkpoint)
+    with open(checkpoint) as f :
+        assert len(f.readlines()) == 2 + 3
+    assert df_indices.equals(df_expected[['file', 'ACI']])
+    # other parameters : the records of the checkpoint are not used
+    df_indices, _ = maad.features.batch_alpha_indices(df, indices=indices, 
+                                                      nperseg=512,
+                                                      checkpoint=checkpoint)
+    with open(checkpoint) as f :
+        assert len(f.readlines()) == 2 + 3 + 4
+    df_expected, _ = maad.features.batch_alpha_indices(df, indices=indices,
+                                                       nperseg=512)
+    assert df_indices.equals(df_expected)
+
+def test_streaming_aci_leq():
+    filename = os.path.join('..','data','spinetail.wav')
+    s, fs = maad.sound.load(filename, detrend=False)
+    leq = maad.features.StreamingTemporalLeq(fs, gain=42)
+    stream = maad.sound.StreamingSpectrogram(fs)
+    aci = maad.features.StreamingACI()
+    leqf = maad.features.StreamingSpectralLeq(gain=42)
+    for s_block, _ in maad.sound.iter_blocks(filename, block_duration=1.7):
+        leq.update(s_block)
+        Sxx_block, _ = stream.update(s_block)
+        aci.update(Sxx_block)
+        leqf.update(Sxx_block)
+    Sxx_block, _ = stream.flush()
+    aci.update(Sxx_block)
+    leqf.update(Sxx_block)
+    Sxx, _, _, _ = maad.sound.spectrogram(s, fs)
+    assert np.isclose(leq.finalize(), maad.features.temporal_leq(s, fs, gain=42),
+                      rtol=1e-12)
+    _, ACI_per_bin, ACI_sum = maad.features.acoustic_complexity_index(Sxx)
+    assert np.allclose(aci.finalize()[0], ACI_per_bin, rtol=1e-12)
+    assert np.isclose(aci.finalize()[1], ACI_sum, rtol=1e-12)
+    LEQf, LEQf_per_bin = maad.features.spectral_leq(Sxx, gain=42)
+    assert np.isclose(leqf.finalize()[0], LEQf, rtol=1e-12)
+    assert np.allclose(leqf.finalize()[1], LEQf_per_bin, rtol=1e-12)
+
+def test_streaming_finalize_empty():
+    aci = maad.features.StreamingACI().update(np.zeros((10, 0)))
+    with pytest.raises(ValueError):
+        aci.finalize()
+    with pytest.raises(ValueError):
+        maad.features.StreamingSpectralLeq(gain=42).finalize()
+    leq = maad.features.StreamingTemporalLeq(44100, gain=42).update(np.zeros(100))
+    with pytest.raises(ValueError):
+        leq.finalize()
+
+def test_raoq():
+    from maad.features.alpha_indices import _raoQ, _raoQ_pairwise
+    rng = np.random.default_rng(0)
+    for n in [2, 10, 1000]:
+        p = rng.random(n)
+        bins = rng.permutation(np.arange(n)*10.0)
+        assert np.isclose(_raoQ(p, bins), _raoQ_pairwise(p, bins), rtol=1e-12)
+
+def test_acoustic_events():
+    from scipy.ndimage import binary_erosion, binary_dilation
+    from maad.features.alpha_indices import _acoustic_events
+    rng = np.random.default_rng(0)
+    xdB = rng.normal(size=(20, 500))*6
+    dt = 0.01
+    for rejectDuration in [None, 0.01, 0.035]:
+        EVNsum, EVNmean, EVNcount, EVN = _acoustic_events(xdB, dt, 3, 
+                                                          rejectDuration)
+        # reference : opening of each row then run length encoding
+        ref = xdB >= 3
+        if rejectDuration is not None:
+            kernel = [list(np.ones(int(round(rejectDuration/dt))+1))]
+            ref = binary_dilation(binary_erosion(ref, kernel), kernel)
+        assert np.array_equal(EVN, ref)
+        for i, b in enumerate(ref):
+            l, v = maad.util.rle(b)
+            assert EVNsum[i] == sum(l[v==1])*dt
+            assert EVNmean[i] == (np.mean(l[v==1])*dt if v.any() else 0)
+            assert EVNcount[i] == sum(v)/(499*dt)
+        _, _, _, EVN_1d = _acoustic_events(xdB[0], dt, 3, rejectDuration)
+        assert np.array_equal(EVN_1d, ref[0])
+    with pytest.raises(ValueError):
+        _acoustic_events(xdB[np.newaxis], dt, 3)
@@ -5,6 +5,7 @@ Test module for shape features
 
 """
 import os
+import pytest
 import numpy as np
 import pandas as pd
 from maad import sound, features, util
@@ -16,4 +17,115 @@ def test_shape_features():
     Sxx, tn, fn, ext = sound.spectrogram(s, fs, db_range=100)
     Sxx_db = util.power2dB(Sxx, db_range=100)
     shape, params = features.shape_features(Sxx_db, resolution='low')
-    assert np.allclose(shape,DATA)
\ No newline at end of file
+    assert np.allclose(shape,DATA)
+
+
+def test_filter_multires_fft():
+    rng = np.random.default_rng(0)
+    _, kernels = features.filter_bank_2d_nodc(frequency=(0.35, 0.5), ntheta=4, 
+                                              bandwidth=0.8, gamma=2)
+    for shape in [(7, 5), (64, 150)]:
+        im = rng.normal(size=shape)
+        im_fft = features.filter_multires(im, kernels, npyr=2, method='fft')
+        im_direct = features.filter_multires(im, kernels, npyr=2, method='direct')
+        for a, b in zip(im_fft, im_direct):
+            assert np.allclose(a, b, atol=1e-12)
+
+
+def test_filter_bank_cache():
+    from maad.features.shape import _filter_bank, _KERNEL_FFT_CACHE
+    rng = np.random.default_rng(0)
+    im = rng.normal(size=(64, 150))
+    shape_raw, _ = features.shape_features_raw(im, resolution='low')
+    hits = _filter_bank.cache_info().hits
+    n_fft = len(_KERNEL_FFT_CACHE)
+    shape_raw_cached, _ = features.shape_features_raw(im, resolution='low')
+    assert _filter_bank.cache_info().hits == hits + 1
+    assert len(_KERNEL_FFT_CACHE) == n_fft
+    for a, b in zip(shape_raw, shape_raw_cached):
+        assert np.array_equal(a, b)
+    # the cached kernels are the same as a new filter bank
+    params, kernels = _filter_bank(2, 0.8, (0.35, 0.5), 2)
+    params_ref, kernels_ref = features.filter_bank_2d_nodc((0.35, 0.5), 2, 0.8, 2)
+    assert np.array_equal(params, params_ref)
+    for (kernel, _), (kernel_ref, _) in zip(kernels, kernels_ref):
+        assert np.array_equal(kernel, kernel_ref)
+        assert not kernel.flags.writeable
+
+
+def test_rois_summed_area_table():
+    from skimage import measure
+    rng = np.random.default_rng(0)
+    Sxx = rng.random((64, 150)) + 0.1
+    rois = pd.DataFrame({'min_y': [0, 10, 30, 63], 'min_x': [0, 20, 100, 140],
+                         'max_y': [5, 40, 63, 63], 'max_x': [149, 25, 120, 149]})
+    rois['min_t'] = rois['min_f'] = rois['max_t'] = rois['max_f'] = 0.
+    shape, _ = features.shape_features(Sxx, resolution='low', rois=rois)
+    shape_raw, _ = features.shape_features_raw(Sxx, resolution='low')
+    centroid = features.centroid_features(Sxx, rois)
+    for i, row in rois.iterrows():
+        blob = (slice(int(row.min_y), int(row.max_y)+1), 
+                slice(int(row.min_x), int(row.max_x)+1))
+        mean_ref = [np.mean(im[blob]) for im in shape_raw]
+        assert np.allclose(shape.filter(like='shp_').loc[i], mean_ref)
+        im_blob = np.zeros(Sxx.shape, dtype=int)
+        im_blob[blob] = 1
+        rprops = measure.regionprops(im_blob, intensity_image=Sxx)
+        assert np.allclose(centroid.loc[i, ['centroid_y', 'centroid_x']],
+                           rprops[0].weighted_centroid)
+
+
+def test_native_pooling():
+    rng = np.random.default_rng(0)
+    Sxx = rng.random((64, 160)) + 0.1
+    rois = pd.DataFrame({'min_y': [0, 10, 30, 63], 'min_x': [0, 21, 100, 140],
+                         'max_y': [5, 40, 63, 63], 'max_x': [159, 25, 120, 159]})
+    rois['min_t'] = rois['min_f'] = rois['max_t'] = rois['max_f'] = 0.
+    # mean at the scale of a level == mean of the level upsampled by 
+    # repeating its pixels
+    y0, x0, y1, x1 = features.shape._rois_bounds(rois, Sxx.shape)
+    for factor in [1, 2, 4, 8]:
+        im = rng.random((64//factor, 160//factor))
+        im_up = np.kron(im, np.ones((factor, factor)))
+        mean = features.shape._rois_mean_scaled(im, y0, x0, y1, x1, Sxx.shape)
+        mean_ref = [im_up[a:b, c:d].mean() for a, c, b, d in zip(y0, x0, y1, x1)]
+        assert np.allclose(mean, mean_ref)
+    # the first level is not rescaled : same coefficients
+    shape, params = features.shape_features(Sxx, resolution='low', rois=rois)
+    shape_native, _ = features.shape_features(Sxx, resolution='low', rois=rois,
+                                              pooling='native')
+    level1 = (params.pyr_level == 1).values
+    X = shape.filter(like='shp_').values
+    X_native = shape_native.filter(like='shp_').values
+    assert np.allclose(X[:, level1], X_native[:, level1])
+    # whole spectrogram : close to the mean of the rescaled responses
+    shape, _ = features.shape_features(Sxx, resolution='low')
+    shape_native, _ = features.shape_features(Sxx, resolution='low',
+                                              pooling='native')
+    assert np.allclose(shape.values, shape_native.values, rtol=0.05)
+
+
+def test_shape_features_n_jobs():
+    rng = np.random.default_rng(0)
+    Sxx = rng.random((64, 150)) + 0.1
+    rois = pd.DataFrame({'min_y': [0, 10, 30], 'min_x': [0, 20, 100],
+                         'max_y': [5, 40, 63], 'max_x': [149, 25, 120]})
+    rois['min_t'] = rois['min_f'] = rois['max_t'] = rois['max_f'] = 0.
+    for method in ['fft', 'direct']:
+        for pooling in ['rescale', 'native']:
+            shape, _ = features.shape_features(Sxx, 'low', rois, method=method,
+                                               pooling=pooling)
+            shape_threads, _ = features.shape_features(Sxx, 'low', rois, 
+                                                       method=method, 
+                                                       pooling=pooling, 
+                                                       n_jobs=3)
+            assert shape.equals(shape_threads)
+    shape_raw, _ = features.shape_features_raw(Sxx, resolution='low')
+    shape_raw_threads, _ = features.shape_features_raw(Sxx, resolution='low',
+                                                       n_jobs=-1)
+    assert len(shape_raw) == len(shape_raw_threads)
+    for im, im_threads in zip(shape_raw, shape_raw_threads):
+        assert np.array_equal(im, im_threads)
+    for n_jobs in [0, -2]:
+        with pytest.raises(ValueError):
+            features.shape_features_raw(Sxx, resolution='low', n_jobs=n_jobs)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test module for sound input and output functions
+
+"""
+import os
+import pytest
+import numpy as np
+from maad import sound
+
+
+def test_load_offset_duration():
+    s, fs = sound.load(os.path.join('..','data','spinetail.wav'), detrend=False)
+    s_slice, fs = sound.load(os.path.join('..','data','spinetail.wav'),
+                             offset=5, duration=3, detrend=False)
+    assert s_slice.size == 3*fs
+    assert np.array_equal(s_slice, s[5*fs:8*fs])
+
+def test_iter_blocks():
+    s, fs = sound.load(os.path.join('..','data','spinetail.wav'), detrend=False)
+    blocks = list(sound.iter_blocks(os.path.join('..','data','spinetail.wav'),
+                                    block_duration=5, overlap=1))
+    assert [start for _, start in blocks] == list(range(0, s.size, 4*fs))
+    for s_block, start in blocks:
+        assert np.array_equal(s_block, s[start:start+5*fs])
+    with pytest.raises(ValueError):
+        next(sound.iter_blocks(os.path.join('..','data','spinetail.wav'),
+                               block_duration=5, overlap=4.99999))
+
+def test_wav_info():
+    filename = os.path.join('..','data','spinetail.wav')
+    s, fs = sound.load(filename, detrend=False)
+    assert sound.wav_info(filename) == (fs, s.size, 1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test module for spectrogram functions
+
+"""
+import os
+import numpy as np
+import pandas as pd
+from maad import sound
+
+
+def test_spectrogram_engine():
+    s, fs = sound.load(os.path.join('..','data','spinetail.wav'))
+    for mode in ['psd', 'amplitude', 'complex']:
+        Sxx, tn, fn, ext = sound.spectrogram(s, fs, nperseg=512, mode=mode,
+                                             flims=(2000, 10000))
+        engine = sound.SpectrogramEngine(fs, nperseg=512, mode=mode,
+                                         flims=(2000, 10000), chunksize=100)
+        Sxx_engine, tn_engine, fn_engine, ext_engine = engine.transform(s)
+        assert np.array_equal(Sxx_engine, Sxx)
+        assert np.array_equal(tn_engine, tn)
+        assert np.array_equal(fn_engine, fn)
+        assert ext_engine == ext
+
+def test_spectrogram_batch():
+    s, fs = sound.load(os.path.join('..','data','spinetail.wav'))
+    x = np.stack([s[:5*fs], s[5*fs:10*fs], s[10*fs:15*fs]])
+    Sxx_batch, tn_batch, fn_batch, _ = sound.spectrogram(x, fs)
+    Sxx_engine, _, _, _ = sound.SpectrogramEngine(fs).transform(x)
+    assert Sxx_batch.ndim == 3
+    for i, xi in enumerate(x):
+        Sxx, tn, fn, _ = sound.spectrogram(xi, fs)
+        assert np.array_equal(Sxx_batch[i], Sxx)
+        assert np.array_equal(Sxx_engine[i], Sxx)
+        assert np.array_equal(tn_batch, tn)
+        assert np.array_equal(fn_batch, fn)
+
+def test_streaming_spectrogram():
+    s, fs = sound.load(os.path.join('..','data','spinetail.wav'), detrend=False)
+    Sxx, tn, fn, _ = sound.spectrogram(s, fs, nperseg=512, noverlap=128)
+    stream = sound.StreamingSpectrogram(fs, nperseg=512, noverlap=128)
+    Sxx_list, tn_list = [], []
+    for s_block, _ in sound.iter_blocks(os.path.join('..','data','spinetail.wav'),
+                                        block_duration=1.3):
+        Sxx_block, tn_block = stream.update(s_block)
+        Sxx_list.append(Sxx_block)
+        tn_list.append(tn_block)
+    Sxx_block, tn_block = stream.flush()
+    Sxx_list.append(Sxx_block)
+    tn_list.append(tn_block)
+    assert np.array_equal(np.concatenate(Sxx_list, axis=1), Sxx)
+    assert np.array_equal(np.concatenate(tn_list), tn)
+    assert np.array_equal(stream.fn, fn)
+
+def test_linear_to_octave():
+    s, fs = sound.load(os.path.join('..','data','spinetail.wav'))
+    Sxx, tn, fn, _ = sound.spectrogram(s, fs)
+    X, bin_octave = sound.linear_to_octave(Sxx, fn, thirdOctave=True)
+    bin_low = bin_octave*2**(-1/6)
+    bin_up = bin_octave*2**(1/6)
+    for i in range(len(bin_octave)):
+        mask = (fn >= bin_low[i]) & (fn <= bin_up[i])
+        assert np.allclose(X[i], Sxx[mask].sum(axis=0))
+    X_batch, _ = sound.linear_to_octave(np.stack([Sxx, 2*Sxx]), fn)
+    assert np.allclose(X_batch[0], X)
+    assert np.allclose(X_batch[1], 2*X)
+
+def test_long_term_spectrogram(tmp_path):
+    rng = np.random.default_rng(0)
+    fn = np.linspace(0, 22050, 65)
+    dates = pd.date_range('2024-01-01', periods=500, freq='37min')
+    S = rng.random((len(fn), len(dates)))
+    lts = sound.LongTermSpectrogram(fn, dt=900)
+    lts.update(S, dates)
+    # accumulators built separately, then merged
+    lts_a = sound.LongTermSpectrogram(fn, dt=900).update(S[:, :200], dates[:200])
+    lts_b = sound.LongTermSpectrogram(fn, dt=900)
+    for i in range(200, len(dates)):
+        lts_b.update(S[:, i], dates[i])
+    lts_a.merge(lts_b)
+    assert np.array_equal(lts_a.count, lts.count)
+    assert np.allclose(lts_a.mean, lts.mean, equal_nan=True)
+    # circadian spectrogram
+    slot = (dates.hour*3600 + dates.minute*60) // 900
+    assert np.allclose(lts.circadian()[:, 10], S[:, slot == 10].mean(axis=1))
+    # save and load
+    lts.save(tmp_path / 'lts.npz')
+    lts_load = sound.LongTermSpectrogram.load(tmp_path / 'lts.npz')
+    assert np.array_equal(lts_load.mean, lts.mean, equal_nan=True)
+    assert np.array_equal(lts_load.count, lts.count)
+    assert lts_load.days.equals(lts.days)
+    # the days of different years and 29 February are kept apart
+    lts = sound.LongTermSpectrogram(fn, dt=900, dtype=np.float32)
+    dates = pd.DatetimeIndex(['2023-03-01 10:00', '2024-02-29 10:00', 
+                              '2024-03-01 10:00', '2024-03-01 10:05'])
+    lts.update(S[:, :4], dates)
+    assert list(lts.days.strftime('%Y-%m-%d')) == ['2023-03-01', '2024-02-29', 
+                                                   '2024-03-01']
+    assert lts.count[:, 40].tolist() == [1, 1, 2]
+    assert lts.mean.dtype == np.float32 and lts.mean.shape == (65, 3, 96)
+    assert np.allclose(lts.mean[:, 2, 40], S[:, 2:4].mean(axis=1))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test module for utility functions
+
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from maad import sound, util
+
+
+def test_per_bin_indices_io(tmp_path):
+    fn = np.arange(5)*100.
+    time = pd.date_range('2020-01-01', periods=3, freq='min', name='Date')
+    A = np.random.rand(5, 3)
+    B = np.random.rand(5, 3)
+    df = pd.DataFrame({'frequencies' : [fn.tolist()]*3,
+                       'A_per_bin' : [A[:,i].tolist() for i in range(3)],
+                       'B_per_bin' : [str(B[:,i].tolist()) for i in range(3)]},
+                      index=time)
+    per_bin = util.PerBinIndices.from_dataframe(df)
+    assert per_bin.shape == (2, 5, 3)
+    assert np.array_equal(per_bin['A_per_bin'], A)
+    assert np.array_equal(per_bin['B_per_bin'], B)
+    
+    util.write_per_bin_indices(per_bin, str(tmp_path))
+    per_bin_read = util.read_per_bin_indices(str(tmp_path))
+    assert per_bin_read.indices == ['A_per_bin', 'B_per_bin']
+    assert np.array_equal(per_bin_read.to_array(), per_bin.to_array())
+    assert np.array_equal(per_bin_read.fn, fn)
+    assert per_bin_read.time.equals(time)
+    # dates with a time zone and strings
+    for time in [pd.date_range('2020-03-29 00:30', periods=3, freq='h', 
+                               tz='Europe/Paris', name='Date'),
+                 pd.Index(['a', 'b', 'c'], name='name')]:
+        per_bin = util.PerBinIndices([A], ['A_per_bin'], fn, time)
+        util.write_per_bin_indices(per_bin, str(tmp_path / 'tz'))
+        per_bin_read = util.read_per_bin_indices(str(tmp_path / 'tz'))
+        assert per_bin_read.time.equals(time)
+        assert per_bin_read.time.name == time.name
+        assert str(getattr(per_bin_read.time, 'tz', None)) == \
+               str(getattr(time, 'tz', None))
+
+def test_false_color_spectro_array():
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((3, 20, 15))**3
+    indices = ['A_per_bin', 'B_per_bin', 'C_per_bin']
+    df = pd.DataFrame({name : [X[ii, :, t].tolist() for t in range(15)] 
+                       for ii, name in enumerate(indices)},
+                      index=pd.date_range('2020-01-01', periods=15, freq='h'))
+    fcs, triplet = util.false_Color_Spectro(df, indices=indices)
+    fcs_array, triplet_array = util.false_Color_Spectro(X, indices=indices)
+    assert fcs.shape == (20, 15, 3)
+    assert np.array_equal(fcs_array, fcs)
+    assert triplet_array == triplet
+    
+    fcs, triplet = util.false_Color_Spectro(df, permut=True)
+    fcs_lazy, triplet_lazy = util.false_Color_Spectro(X, indices=indices, 
+                                                      permut=True)
+    assert len(fcs_lazy) == len(fcs) == 6
+    for ii in range(6):
+        assert np.array_equal(fcs_lazy[ii], fcs[ii])
+
+def test_false_color_spectro_chunks():
+    rng = np.random.default_rng(1)
+    X = rng.standard_normal((3, 64, 500))
+    # the range of the values differs between the chunks of times
+    X[:, :, 250:] *= 0.5
+    indices = ['A_per_bin', 'B_per_bin', 'C_per_bin']
+    for reverseLUT in [False, True]:
+        fcs, _ = util.false_Color_Spectro(X, indices=indices, 
+                                          reverseLUT=reverseLUT)
+        fcs_chunks, _ = util.false_Color_Spectro(X, indices=indices, 
+                                                 reverseLUT=reverseLUT,
+                                                 chunksize=64*30)
+        assert np.array_equal(fcs_chunks, fcs)
+        # clip with the percentiles of the indice and scale of each time
+        for ii in range(3):
+            z_min, z_max = np.percentile(X[ii], (1, 99))
+            z = np.clip(X[ii], z_min, z_max)
+            z = util.linear_scale(z, 1, 0) if reverseLUT else util.linear_scale(z)
+            assert np.array_equal(fcs[:, :, ii], (z*255).astype(np.uint8))
+
+def test_percentile_by_chunks():
+    from maad.util.visualization import _percentile_by_chunks
+    rng = np.random.default_rng(2)
+    X = rng.standard_normal((50, 40))
+    X.flat[rng.choice(X.size, 30, replace=False)] = -np.inf
+    X.flat[rng.choice(X.size, 20, replace=False)] = np.inf
+    q = [0, 0.5, 1, 5, 50, 99, 99.5, 100]
+    with np.errstate(invalid='ignore'):
+        assert np.array_equal(_percentile_by_chunks(X, q, chunksize=100),
+                              np.percentile(X, q), equal_nan=True)
+
+def test_moments_accumulator():
+    s, fs = sound.load('../data/spinetail.wav')
+    acc = util.MomentsAccumulator()
+    for i in range(0, len(s), 77777):
+        acc.update(s[i:i+77777])
+    _, var, skew, kurt = acc.moments()
+    assert np.allclose([var, skew, kurt], util.moments(s)[1:], rtol=1e-10)
+    # moments per frequency bin, merged from 2 accumulators
+    Sxx, _, _, _ = sound.spectrogram(s, fs)
+    acc_a = util.MomentsAccumulator(axis=1).update(Sxx[:, :100])
+    acc_b = util.MomentsAccumulator(axis=1)
+    for i in range(100, Sxx.shape[1], 37):
+        acc_b.update(Sxx[:, i:i+37])
+    for m, m_ref in zip(acc_a.merge(acc_b).moments(), util.moments(Sxx, axis=1)):
+        assert np.allclose(m, m_ref, rtol=1e-10)
+    with pytest.raises(ValueError):
+        util.MomentsAccumulator().moments()
+
+def test_get_unimode_ale():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 3000))
+    X[3] = 1.0
+    X[5, ::7] = np.nan
+    X[7] = np.round(X[7])
+    for X in [X, X.astype(np.float32)]:
+        # reference : histogram of each row
+        ref = []
+        for x in X:
+            hist, bin_edges = np.histogram(x, bins=100, 
+                                           range=(np.nanmin(x), np.nanmax(x)))
+            ref.append(bin_edges[np.argmax(util.running_mean(hist, 7))])
+        assert np.array_equal(util.get_unimode(X, mode='ale', N=7, N_bins=100), ref)
+        assert np.array_equal(util.get_unimode(X.T, mode='ale', axis=0), ref)
+        assert util.get_unimode(X[0], mode='ale') == ref[0]